@@ -9,6 +9,8 @@ from backend.llm.embeddings import embedding_generator
 from backend.utils.web_search import web_search
 from backend.config import settings
 from backend.database.connection import db_manager
+from backend.database.text_search import text_search
+from backend.database.value_index import normalize_value, RESOLVER_STOP_WORDS
 
 def enhanced_knowledge_agent(state: AgentState) -> Dict[str, Any]:
     """
@@ -27,6 +29,7 @@ def enhanced_knowledge_agent(state: AgentState) -> Dict[str, Any]:
     rag_results = []
     product_details = []
     category_info = None
+    review_matches = []
     
     # 1. Web search for external knowledge
     if settings.ENABLE_WEB_SEARCH:
@@ -53,13 +56,20 @@ def enhanced_knowledge_agent(state: AgentState) -> Dict[str, Any]:
     except Exception as e:
         print(f"Category insights error: {str(e)}")
     
+    # 5. Search review comments
+    try:
+        review_matches = get_review_matches(user_query)
+    except Exception as e:
+        print(f"Review search error: {str(e)}")
+    
     # Generate comprehensive response
     response = generate_enhanced_response(
         user_query,
         web_results,
         rag_results,
         product_details,
-        category_info
+        category_info,
+        review_matches
     )
     
     return {
@@ -67,6 +77,7 @@ def enhanced_knowledge_agent(state: AgentState) -> Dict[str, Any]:
         "rag_results": rag_results,
         "product_details": product_details,
         "category_info": category_info,
+        "review_matches": review_matches,
         "response": response
     }
 
@@ -122,6 +133,12 @@ def get_product_details(query: str) -> List[Dict[str, Any]]:
         if not keywords:
             return []
         
+        # Rank matching categories through the full-text index
+        categories = text_search.category_names(" ".join(keywords))
+        if not categories:
+            return []
+        category_list = ", ".join(f"'{name}'" for name in categories)
+        
         # Query database for matching products
         sql = f"""
         SELECT 
@@ -133,12 +150,11 @@ def get_product_details(query: str) -> List[Dict[str, Any]]:
             COUNT(DISTINCT or2.review_id) as total_reviews,
             ROUND(AVG(or2.review_score), 2) as avg_rating
         FROM products p
-        LEFT JOIN product_category_translation pct 
+        LEFT JOIN product_category_name_translation pct 
             ON p.product_category_name = pct.product_category_name
         LEFT JOIN order_items oi ON p.product_id = oi.product_id
         LEFT JOIN order_reviews or2 ON oi.order_id = or2.order_id
-        WHERE p.product_category_name LIKE '%{keywords[0]}%'
-           OR pct.product_category_name_english LIKE '%{keywords[0]}%'
+        WHERE p.product_category_name IN ({category_list})
         GROUP BY p.product_id, p.product_category_name, pct.product_category_name_english
         ORDER BY total_orders DESC
         LIMIT 10
@@ -164,6 +180,11 @@ def get_category_insights(query: str) -> Optional[Dict[str, Any]]:
         if not keywords:
             return None
         
+        # Best-ranked category from the full-text index
+        categories = text_search.category_names(" ".join(keywords), limit=1)
+        if not categories:
+            return None
+        
         # Get category statistics
         sql = f"""
         SELECT 
@@ -176,12 +197,11 @@ def get_category_insights(query: str) -> Optional[Dict[str, Any]]:
             COUNT(DISTINCT or2.review_id) as total_reviews,
             ROUND(AVG(or2.review_score), 2) as avg_rating
         FROM products p
-        LEFT JOIN product_category_translation pct 
+        LEFT JOIN product_category_name_translation pct 
             ON p.product_category_name = pct.product_category_name
         LEFT JOIN order_items oi ON p.product_id = oi.product_id
         LEFT JOIN order_reviews or2 ON oi.order_id = or2.order_id
-        WHERE p.product_category_name LIKE '%{keywords[0]}%'
-           OR pct.product_category_name_english LIKE '%{keywords[0]}%'
+        WHERE p.product_category_name = '{categories[0]}'
         GROUP BY p.product_category_name, pct.product_category_name_english
         LIMIT 1
         """
@@ -197,6 +217,23 @@ def get_category_insights(query: str) -> Optional[Dict[str, Any]]:
         print(f"Category insights error: {str(e)}")
         return None
 
+def get_review_matches(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Find review comments matching the query through the full-text index"""
+    review_terms = ['review', 'comment', 'feedback', 'complain', 'avaliacao', 'avaliacoes', 'comentario']
+    query_lower = normalize_value(query)
+    
+    if not any(term in query_lower for term in review_terms):
+        return []
+    
+    # Search the words that are neither question words nor review words
+    search_terms = [
+        word for word in query_lower.split()
+        if len(word) > 2 and word not in RESOLVER_STOP_WORDS
+        and not any(word.startswith(term) for term in review_terms)
+    ]
+    
+    return text_search.search_reviews(" ".join(search_terms), limit=limit)
+
 def extract_product_keywords(query: str) -> List[str]:
     """Extract potential product keywords from query"""
     # Common product categories and keywords
@@ -207,7 +244,8 @@ def extract_product_keywords(query: str) -> List[str]:
         'beleza', 'saude', 'casa', 'jardim', 'cama', 'mesa', 'banho'
     ]
     
-    query_lower = query.lower()
+    # Fold accents so "eletrônicos" finds "eletronicos"
+    query_lower = normalize_value(query)
     keywords = [term for term in product_terms if term in query_lower]
     
     # Also extract quoted terms
@@ -224,7 +262,8 @@ def generate_enhanced_response(
     web_results: List[Dict[str, Any]],
     rag_results: List[Dict[str, Any]],
     product_details: List[Dict[str, Any]],
-    category_info: Optional[Dict[str, Any]]
+    category_info: Optional[Dict[str, Any]],
+    review_matches: Optional[List[Dict[str, Any]]] = None
 ) -> str:
     """Generate comprehensive response from all knowledge sources"""
     
@@ -253,6 +292,12 @@ def generate_enhanced_response(
                 f"Rating: {product.get('avg_rating', 0):.1f}/5"
             )
     
+    # Add matching review comments
+    if review_matches:
+        context_parts.append("\n**Customer Reviews Mentioning This:**")
+        for i, review in enumerate(review_matches[:5], 1):
+            context_parts.append(f"{i}. ({review.get('review_score')}/5) {review.get('snippet')}")
+    
     # Add RAG results
     if rag_results:
         context_parts.append("\n**Product Information from Database:**")
@@ -1,14 +1,56 @@
 """
 SQL Agent - Generates and executes SQL queries
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple, Union
 import pandas as pd
+from backend.config import settings
 from backend.graph.state import AgentState
 from backend.llm.groq_client import groq_client
 from backend.database.connection import db_manager
+from backend.database.results import QueryResult
 from backend.database.queries import get_schema_description, get_example_queries
+from backend.database.value_index import value_index
+from backend.database.sampling import approximate_executor, is_exploratory_question
+from backend.database.olap_cube import olap_cube
+from backend.database.data_profile import data_profile
 from backend.utils.helpers import format_dataframe_for_display, clean_sql_query
 
+def run_query(sql_query: str, state: AgentState) -> Tuple[Union[pd.DataFrame, QueryResult], Optional[Dict[str, Any]]]:
+    """
+    Execute a query, answering from the OLAP cube when it covers the query and from
+    the stratified samples when a rough answer is acceptable
+    
+    Args:
+        sql_query: SQL query string
+        state: Current agent state
+        
+    Returns:
+        Tuple of (results, approximation info or None for exact results)
+    """
+    if settings.ENABLE_OLAP_CUBE:
+        try:
+            cube_result = olap_cube.answer_sql(sql_query)
+            if cube_result is not None:
+                return cube_result, None
+        except Exception as e:
+            print(f"OLAP cube error: {str(e)}")
+    
+    wants_estimate = state.get("approximate") or is_exploratory_question(state["user_query"])
+    
+    if settings.ENABLE_APPROXIMATE_QUERIES and wants_estimate:
+        try:
+            approximate = approximate_executor.execute(sql_query)
+            if approximate is not None:
+                return approximate
+        except Exception as e:
+            print(f"Approximate execution error: {str(e)}")
+    
+    return db_manager.execute_result(
+        sql_query,
+        query_id=state.get("query_id"),
+        compact=settings.COMPACT_QUERY_RESULTS
+    ), None
+
 def sql_agent(state: AgentState) -> Dict[str, Any]:
     """
     Generate and execute SQL query
@@ -22,23 +64,50 @@ def sql_agent(state: AgentState) -> Dict[str, Any]:
     user_query = state["user_query"]
     context = state.get("conversation_context", "")
     
+    # Single-column distribution questions are answered from the ingest-time profile
+    if settings.ENABLE_DATA_PROFILE:
+        try:
+            profiled = data_profile.answer(user_query)
+        except Exception as e:
+            print(f"Data profile error: {str(e)}")
+            profiled = None
+        
+        if profiled is not None:
+            profile_sql, result_df = profiled
+            return {
+                "sql_query": profile_sql,
+                "query_result": result_df,
+                "result_dataframe": format_dataframe_for_display(result_df),
+                "resolved_values": [],
+                "approximation": None,
+                "error": None
+            }
+    
     # Get schema and examples
     schema_info = get_schema_description()
     examples = get_example_queries()
     
+    # Link question terms to canonical database values
+    try:
+        resolved_values = value_index.resolve(user_query)
+    except Exception as e:
+        print(f"Value resolution error: {str(e)}")
+        resolved_values = []
+    
     # Generate SQL query
     try:
         sql_query = groq_client.generate_sql(
             question=f"{context}\n\nCurrent question: {user_query}",
             schema_info=schema_info,
-            examples=examples
+            examples=examples,
+            resolved_values=value_index.format_for_prompt(resolved_values)
         )
         
         # Clean the query
         sql_query = clean_sql_query(sql_query)
         
         # Execute query
-        result_df = db_manager.execute_query(sql_query)
+        result_df, approximation = run_query(sql_query, state)
         
         # Format results
         formatted_result = format_dataframe_for_display(result_df)
@@ -47,6 +116,8 @@ def sql_agent(state: AgentState) -> Dict[str, Any]:
             "sql_query": sql_query,
             "query_result": result_df,
             "result_dataframe": formatted_result,
+            "resolved_values": resolved_values,
+            "approximation": approximation,
             "error": None
         }
     
@@ -72,13 +143,15 @@ Generate a corrected SQL query. Return ONLY the SQL query."""
                 fixed_query = clean_sql_query(fixed_query)
                 
                 # Try executing fixed query
-                result_df = db_manager.execute_query(fixed_query)
+                result_df, approximation = run_query(fixed_query, state)
                 formatted_result = format_dataframe_for_display(result_df)
                 
                 return {
                     "sql_query": fixed_query,
                     "query_result": result_df,
                     "result_dataframe": formatted_result,
+                    "resolved_values": resolved_values,
+                    "approximation": approximation,
                     "retry_count": retry_count + 1,
                     "error": None
                 }
@@ -108,7 +181,11 @@ def execute_query_agent(state: AgentState) -> Dict[str, Any]:
         return {"error": "No SQL query to execute"}
     
     try:
-        result_df = db_manager.execute_query(sql_query)
+        result_df = db_manager.execute_result(
+            sql_query,
+            query_id=state.get("query_id"),
+            compact=settings.COMPACT_QUERY_RESULTS
+        )
         formatted_result = format_dataframe_for_display(result_df)
         
         return {
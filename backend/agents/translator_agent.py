@@ -4,7 +4,7 @@ Translator Agent - Handles translation between Portuguese and English
 from typing import Dict, Any
 from backend.graph.state import AgentState
 from backend.llm.groq_client import groq_client
-from backend.database.connection import db_manager
+from backend.database.text_search import text_search
 
 def translator_agent(state: AgentState) -> Dict[str, Any]:
     """
@@ -86,19 +86,12 @@ def check_category_translation(query: str) -> str:
         for word in words:
             clean_word = word.strip('"\',.:;?!')
             if len(clean_word) > 3:
-                # Check in database
-                sql = f"""
-                    SELECT product_category_name, product_category_name_english
-                    FROM product_category_name_translation
-                    WHERE product_category_name LIKE '%{clean_word}%'
-                       OR product_category_name_english LIKE '%{clean_word}%'
-                    LIMIT 1
-                """
-                result = db_manager.execute_query(sql)
+                # Check the full-text category index
+                matches = text_search.search_categories(clean_word, limit=1)
                 
-                if not result.empty:
-                    pt_name = result['product_category_name'].iloc[0]
-                    en_name = result['product_category_name_english'].iloc[0]
+                if matches and matches[0]['product_category_name_english']:
+                    pt_name = matches[0]['product_category_name']
+                    en_name = matches[0]['product_category_name_english']
                     return f"'{pt_name}' in Portuguese means '{en_name}' in English."
     
     except Exception as e:
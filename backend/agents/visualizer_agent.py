@@ -1,9 +1,10 @@
 """
 Visualizer Agent - Generates chart configurations from query results
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 import pandas as pd
 from backend.graph.state import AgentState
+from backend.database.results import QueryResult
 from backend.utils.helpers import detect_chart_type
 
 def visualizer_agent(state: AgentState) -> Dict[str, Any]:
@@ -18,7 +19,7 @@ def visualizer_agent(state: AgentState) -> Dict[str, Any]:
     """
     result_df = state.get("query_result")
     
-    if result_df is None or not isinstance(result_df, pd.DataFrame) or result_df.empty:
+    if result_df is None or not isinstance(result_df, (pd.DataFrame, QueryResult)) or result_df.empty:
         return {
             "chart_type": None,
             "chart_data": None
@@ -35,12 +36,12 @@ def visualizer_agent(state: AgentState) -> Dict[str, Any]:
         "chart_data": chart_data
     }
 
-def generate_chart_config(df: pd.DataFrame, chart_type: str) -> Optional[Dict[str, Any]]:
+def generate_chart_config(df: Union[pd.DataFrame, QueryResult], chart_type: str) -> Optional[Dict[str, Any]]:
     """
     Generate chart configuration based on data and chart type
     
     Args:
-        df: Data DataFrame
+        df: Data DataFrame or small QueryResult
         chart_type: Type of chart
         
     Returns:
@@ -50,15 +51,16 @@ def generate_chart_config(df: pd.DataFrame, chart_type: str) -> Optional[Dict[st
         return None
     
     try:
-        # Get column names
-        columns = df.columns.tolist()
+        # Get column names; a QueryResult reuses the records built for display
+        columns = list(df.columns)
+        records = df.records() if isinstance(df, QueryResult) else df.to_dict('records')
         
         if chart_type == "bar":
             return {
                 "type": "bar",
                 "x_axis": columns[0],
                 "y_axis": columns[1] if len(columns) > 1 else columns[0],
-                "data": df.to_dict('records')
+                "data": records
             }
         
         elif chart_type == "line":
@@ -66,7 +68,7 @@ def generate_chart_config(df: pd.DataFrame, chart_type: str) -> Optional[Dict[st
                 "type": "line",
                 "x_axis": columns[0],
                 "y_axis": columns[1] if len(columns) > 1 else columns[0],
-                "data": df.to_dict('records')
+                "data": records
             }
         
         elif chart_type == "pie":
@@ -74,7 +76,7 @@ def generate_chart_config(df: pd.DataFrame, chart_type: str) -> Optional[Dict[st
                 "type": "pie",
                 "label": columns[0],
                 "value": columns[1] if len(columns) > 1 else columns[0],
-                "data": df.to_dict('records')
+                "data": records
             }
         
         elif chart_type == "scatter":
@@ -82,7 +84,7 @@ def generate_chart_config(df: pd.DataFrame, chart_type: str) -> Optional[Dict[st
                 "type": "scatter",
                 "x_axis": columns[0],
                 "y_axis": columns[1] if len(columns) > 1 else columns[0],
-                "data": df.to_dict('records')
+                "data": records
             }
         
         return None
@@ -32,6 +32,29 @@ class Settings(BaseSettings):
     MAX_CONVERSATION_HISTORY: int = 10
     ENABLE_WEB_SEARCH: bool = True
     MAX_QUERY_RESULTS: int = 1000
+    SMALL_RESULT_ROWS: int = 50  # results up to this size skip pandas
+    COMPACT_QUERY_RESULTS: bool = True  # downcast numbers and categorize repeated strings
+    CATEGORICAL_MAX_UNIQUE_RATIO: float = 0.5
+    
+    # Query Execution
+    SQL_EXECUTOR_MODE: str = "inline"  # 'inline' or 'process_pool'
+    SQL_EXECUTOR_WORKERS: int = 0  # 0 = one worker per CPU core
+    SQL_QUERY_TIMEOUT: float = 30.0
+    ASYNC_DB_THREADS: int = 4  # database threads serving async endpoints
+    ENABLE_APPROXIMATE_QUERIES: bool = True
+    APPROXIMATE_SAMPLE_FRACTION: float = 0.05
+    DATABASE_SERVING_MODE: str = "disk"  # 'disk' or 'memory' (inline reads only)
+    MEMORY_REPLICA_CHECK_SECONDS: float = 30.0
+    ENABLE_QUERY_LOG: bool = False  # diagnostics; adds a writer thread and EXPLAIN per new slow fingerprint
+    SLOW_QUERY_THRESHOLD_MS: float = 250.0
+    QUERY_LOG_FLUSH_SECONDS: float = 2.0  # buffered log records are written in batches at this interval
+    ENABLE_OLAP_CUBE: bool = True
+    ENABLE_DATA_PROFILE: bool = True  # answer single-column distribution questions from the ingest-time profile
+    ANALYTICAL_ENGINE: str = "sqlite"  # 'sqlite', 'duckdb' or 'auto' (by estimated scan cost)
+    DUCKDB_PARQUET_DIR: str = ""  # read Parquet exports instead of copying the SQLite file
+    DUCKDB_MIN_SCAN_ROWS: int = 100000
+    ENABLE_PARQUET_SNAPSHOT: bool = True
+    TIME_PARTITIONING: str = "none"  # 'none', 'year' or 'quarter' (orders and order_items, applied at ingest)
     
     # Server Configuration
     HOST: str = "0.0.0.0"
@@ -48,8 +71,9 @@ class Settings(BaseSettings):
     BASE_DIR: Path = Path(__file__).parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
     DATABASE_DIR: Path = BASE_DIR / "database"
+    PARQUET_DIR: Path = DATABASE_DIR / "parquet"
     
-    @field_validator("ENABLE_WEB_SEARCH", mode="before")
+    @field_validator("ENABLE_WEB_SEARCH", "ENABLE_APPROXIMATE_QUERIES", "ENABLE_QUERY_LOG", "COMPACT_QUERY_RESULTS", "ENABLE_OLAP_CUBE", "ENABLE_DATA_PROFILE", "ENABLE_PARQUET_SNAPSHOT", mode="before")
     @classmethod
     def parse_bool(cls, v):
         if isinstance(v, bool):
@@ -67,45 +91,78 @@ settings = Settings()
 
 # Database schema information
 DATABASE_SCHEMA = {
+    "fact_order_items": {
+        "columns": [
+            "order_key", "order_item_id", "customer_key", "customer_unique_key",
+            "product_key", "seller_key", "order_status", "order_purchase_timestamp",
+            "purchase_year", "purchase_month", "purchase_quarter", "purchase_yyyymm",
+            "customer_city", "customer_state", "seller_city", "seller_state",
+            "product_category_name", "product_category_name_english",
+            "price", "freight_value", "order_payment_total", "order_review_score",
+            "delivery_days", "is_late", "shipping_distance_km", "shipping_distance_bucket"
+        ],
+        "description": (
+            "PREFERRED TABLE: one row per order item with order, customer, seller, category, "
+            "payment and review attributes already joined. order_payment_total and "
+            "order_review_score are per order and repeat on each of its items. "
+            "shipping_distance_km is the seller-to-customer distance; shipping_distance_bucket "
+            "is its bucket's lower bound in km (0, 50, 200, 500, 1000, 2000)"
+        )
+    },
     "orders": {
         "columns": [
             "order_id", "customer_id", "order_status", "order_purchase_timestamp",
             "order_approved_at", "order_delivered_carrier_date", 
-            "order_delivered_customer_date", "order_estimated_delivery_date"
+            "order_delivered_customer_date", "order_estimated_delivery_date",
+            "order_key", "customer_key",
+            "purchase_year", "purchase_month", "purchase_quarter", "purchase_yyyymm",
+            "delivery_days", "approval_hours", "carrier_handoff_days", "days_vs_estimate", "is_late"
         ],
-        "description": "Order details and status tracking"
+        "description": (
+            "Order details and status tracking. Delivery metrics: delivery_days (purchase to "
+            "customer delivery), approval_hours (purchase to approval), carrier_handoff_days "
+            "(approval to carrier), days_vs_estimate (delivery minus estimated date, positive "
+            "when late), is_late (1 late, 0 on time, NULL if not delivered)"
+        )
     },
     "order_items": {
         "columns": [
             "order_id", "order_item_id", "product_id", "seller_id",
-            "shipping_limit_date", "price", "freight_value"
+            "shipping_limit_date", "price", "freight_value",
+            "shipping_distance_km", "shipping_distance_bucket",
+            "order_key", "product_key", "seller_key"
         ],
-        "description": "Product items in each order with pricing"
+        "description": (
+            "Product items in each order with pricing. shipping_distance_km is the distance "
+            "between the seller's and the customer's zip centroids; shipping_distance_bucket "
+            "is its bucket's lower bound in km (0, 50, 200, 500, 1000, 2000)"
+        )
     },
     "order_payments": {
         "columns": [
             "order_id", "payment_sequential", "payment_type",
-            "payment_installments", "payment_value"
+            "payment_installments", "payment_value", "order_key"
         ],
         "description": "Payment information for orders"
     },
     "order_reviews": {
         "columns": [
             "review_id", "order_id", "review_score", "review_comment_title",
-            "review_comment_message", "review_creation_date", "review_answer_timestamp"
+            "review_comment_message", "review_creation_date", "review_answer_timestamp",
+            "review_key", "order_key"
         ],
         "description": "Customer reviews and ratings"
     },
     "customers": {
         "columns": [
             "customer_id", "customer_unique_id", "customer_zip_code_prefix",
-            "customer_city", "customer_state"
+            "customer_city", "customer_state", "customer_key", "customer_unique_key"
         ],
         "description": "Customer information and location"
     },
     "sellers": {
         "columns": [
-            "seller_id", "seller_zip_code_prefix", "seller_city", "seller_state"
+            "seller_id", "seller_zip_code_prefix", "seller_city", "seller_state", "seller_key"
         ],
         "description": "Seller details and location"
     },
@@ -113,7 +170,8 @@ DATABASE_SCHEMA = {
         "columns": [
             "product_id", "product_category_name", "product_name_length",
             "product_description_length", "product_photos_qty",
-            "product_weight_g", "product_length_cm", "product_height_cm", "product_width_cm"
+            "product_weight_g", "product_length_cm", "product_height_cm", "product_width_cm",
+            "product_key"
         ],
         "description": "Product catalog with dimensions and categories"
     },
@@ -128,7 +186,29 @@ DATABASE_SCHEMA = {
             "geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng",
             "geolocation_city", "geolocation_state"
         ],
-        "description": "Brazilian zip code geolocation data"
+        "description": (
+            "Raw Brazilian zip code geolocation points, many per prefix. Do not join it to "
+            "customers or sellers; join zip_centroids instead"
+        )
+    },
+    "zip_centroids": {
+        "columns": [
+            "zip_code_prefix", "lat", "lng", "city", "state", "point_count", "grid_cell"
+        ],
+        "description": (
+            "One row per zip code prefix: mean latitude/longitude of its geolocation points. "
+            "Join on customers.customer_zip_code_prefix or sellers.seller_zip_code_prefix = "
+            "zip_code_prefix"
+        )
+    },
+    "zip_neighbors": {
+        "columns": [
+            "zip_code_prefix", "neighbor_rank", "neighbor_zip_code_prefix", "distance_km"
+        ],
+        "description": (
+            "Up to 10 nearest other zip prefixes of each prefix within 50 km, ranked by "
+            "distance_km (1 = nearest); use it for 'near' or 'within N km' questions"
+        )
     }
 }
 
@@ -138,12 +218,10 @@ SQL_EXAMPLES = [
         "question": "What are the top 5 product categories by sales?",
         "sql": """
             SELECT 
-                COALESCE(pct.product_category_name_english, p.product_category_name) as category,
+                COALESCE(f.product_category_name_english, f.product_category_name) as category,
                 COUNT(*) as sales_count, 
-                SUM(oi.price) as total_revenue
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.product_id
-            LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
+                SUM(f.price) as total_revenue
+            FROM fact_order_items f
             GROUP BY category
             ORDER BY total_revenue DESC
             LIMIT 5
@@ -153,10 +231,10 @@ SQL_EXAMPLES = [
         "question": "Show average delivery time by state",
         "sql": """
             SELECT c.customer_state, 
-                   AVG(JULIANDAY(o.order_delivered_customer_date) - JULIANDAY(o.order_purchase_timestamp)) as avg_delivery_days
+                   AVG(o.delivery_days) as avg_delivery_days
             FROM orders o
-            JOIN customers c ON o.customer_id = c.customer_id
-            WHERE o.order_delivered_customer_date IS NOT NULL
+            JOIN customers c ON o.customer_key = c.customer_key
+            WHERE o.delivery_days IS NOT NULL
             GROUP BY c.customer_state
             ORDER BY avg_delivery_days
         """
@@ -164,14 +242,12 @@ SQL_EXAMPLES = [
     {
         "question": "What is the average order value for items in the electronics category?",
         "sql": """
-            SELECT AVG(oi.price) as average_order_value
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.product_id
-            LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
-            WHERE pct.product_category_name_english LIKE '%electronics%' 
-               OR pct.product_category_name_english LIKE '%eletronicos%'
-               OR p.product_category_name LIKE '%eletronicos%'
-               OR p.product_category_name LIKE '%informatica%'
+            SELECT AVG(f.price) as average_order_value
+            FROM fact_order_items f
+            WHERE f.product_category_name_english LIKE '%electronics%' 
+               OR f.product_category_name_english LIKE '%eletronicos%'
+               OR f.product_category_name LIKE '%eletronicos%'
+               OR f.product_category_name LIKE '%informatica%'
         """
     },
     {
@@ -182,7 +258,7 @@ SQL_EXAMPLES = [
                 COUNT(*) as order_count,
                 SUM(oi.price) as total_revenue
             FROM order_items oi
-            JOIN products p ON oi.product_id = p.product_id
+            JOIN products p ON oi.product_key = p.product_key
             LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
             WHERE pct.product_category_name_english LIKE '%furniture%'
                OR p.product_category_name LIKE '%moveis%'
@@ -193,16 +269,13 @@ SQL_EXAMPLES = [
         "question": "Which product category was the highest selling in the past 2 quarters?",
         "sql": """
             SELECT 
-                COALESCE(pct.product_category_name_english, p.product_category_name) as category,
+                COALESCE(f.product_category_name_english, f.product_category_name) as category,
                 COUNT(*) as sales_count,
-                SUM(oi.price) as total_revenue,
-                CAST(STRFTIME('%Y', o.order_purchase_timestamp) AS INTEGER) as year,
-                CAST((CAST(STRFTIME('%m', o.order_purchase_timestamp) AS INTEGER) + 2) / 3 AS INTEGER) as quarter
-            FROM order_items oi
-            JOIN orders o ON oi.order_id = o.order_id
-            JOIN products p ON oi.product_id = p.product_id
-            LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
-            WHERE o.order_purchase_timestamp >= DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-6 months')
+                SUM(f.price) as total_revenue,
+                f.purchase_year as year,
+                f.purchase_quarter as quarter
+            FROM fact_order_items f
+            WHERE f.order_purchase_timestamp >= DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-6 months')
             GROUP BY category
             ORDER BY total_revenue DESC
             LIMIT 1
@@ -212,12 +285,11 @@ SQL_EXAMPLES = [
         "question": "Show sales by month for the last 6 months",
         "sql": """
             SELECT 
-                STRFTIME('%Y-%m', o.order_purchase_timestamp) as month,
+                f.purchase_yyyymm as month,
                 COUNT(*) as order_count,
-                SUM(oi.price) as revenue
-            FROM orders o
-            JOIN order_items oi ON o.order_id = oi.order_id
-            WHERE o.order_purchase_timestamp >= DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-6 months')
+                SUM(f.price) as revenue
+            FROM fact_order_items f
+            WHERE f.order_purchase_timestamp >= DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-6 months')
             GROUP BY month
             ORDER BY month DESC
         """
@@ -231,13 +303,40 @@ SQL_EXAMPLES = [
                 COUNT(*) as sales_count,
                 SUM(oi.price) as revenue
             FROM order_items oi
-            JOIN orders o ON oi.order_id = o.order_id
-            JOIN products p ON oi.product_id = p.product_id
+            JOIN orders o ON oi.order_key = o.order_key
+            JOIN products p ON oi.product_key = p.product_key
             LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
-            WHERE STRFTIME('%Y', o.order_purchase_timestamp) = CAST(STRFTIME('%Y', (SELECT MAX(order_purchase_timestamp) FROM orders)) AS INTEGER) - 1
-            GROUP BY p.product_id, category
+            WHERE o.purchase_year = (SELECT MAX(purchase_year) FROM orders) - 1
+            GROUP BY p.product_key, category
             ORDER BY sales_count DESC
             LIMIT 10
         """
+    },
+    {
+        "question": "Does shipping distance affect delivery time?",
+        "sql": """
+            SELECT 
+                f.shipping_distance_bucket as distance_from_km,
+                COUNT(*) as item_count,
+                AVG(f.delivery_days) as avg_delivery_days,
+                AVG(f.is_late) as late_share
+            FROM fact_order_items f
+            WHERE f.shipping_distance_bucket IS NOT NULL AND f.delivery_days IS NOT NULL
+            GROUP BY f.shipping_distance_bucket
+            ORDER BY f.shipping_distance_bucket
+        """
+    },
+    {
+        "question": "What share of revenue comes from each price range?",
+        "sql": """
+            SELECT 
+                price_bucket(f.price) as price_range,
+                COUNT(*) as item_count,
+                SUM(f.price) as revenue,
+                pct_of_total(SUM(f.price), SUM(SUM(f.price)) OVER ()) as revenue_pct
+            FROM fact_order_items f
+            GROUP BY price_range
+            ORDER BY MIN(f.price)
+        """
     }
 ]
@@ -1,9 +1,10 @@
 """Database module"""
-from backend.database.models import Base, Order, OrderItem, OrderPayment, OrderReview, Customer, Seller, Product, ProductCategoryTranslation, Geolocation
+from backend.database.models import Base, OrderId, CustomerId, CustomerUniqueId, ProductId, SellerId, ReviewId, Order, OrderItem, OrderPayment, OrderReview, Customer, Seller, Product, ProductCategoryTranslation, FactOrderItem, Geolocation
 from backend.database.connection import DatabaseManager, get_db_session
 
 __all__ = [
-    "Base", "Order", "OrderItem", "OrderPayment", "OrderReview",
-    "Customer", "Seller", "Product", "ProductCategoryTranslation", "Geolocation",
+    "Base", "OrderId", "CustomerId", "CustomerUniqueId", "ProductId", "SellerId", "ReviewId",
+    "Order", "OrderItem", "OrderPayment", "OrderReview",
+    "Customer", "Seller", "Product", "ProductCategoryTranslation", "FactOrderItem", "Geolocation",
     "DatabaseManager", "get_db_session"
 ]
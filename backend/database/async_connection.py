@@ -0,0 +1,160 @@
+"""
+Awaitable database access for async endpoints and nodes
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+import pandas as pd
+from backend.config import settings
+from backend.database.results import QueryResult
+
+class AsyncDatabaseManager:
+    """Runs DatabaseManager calls on dedicated database threads so they never block the event loop"""
+
+    def __init__(self, db_manager=None, threads: Optional[int] = None):
+        """
+        Initialize async database manager
+
+        Args:
+            db_manager: Database manager to wrap (defaults to global manager)
+            threads: Number of database threads (defaults to ASYNC_DB_THREADS)
+        """
+        self._db_manager = db_manager
+        self.threads = threads or settings.ASYNC_DB_THREADS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Database threads fed from the executor's work queue, started on first use"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="database")
+        return self._executor
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking database call on a database thread
+
+        Args:
+            function: Callable to run
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            The callable's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def execute_query(
+        self,
+        query: str,
+        rewrite: bool = True,
+        query_id: Optional[str] = None,
+        compact: bool = False
+    ) -> pd.DataFrame:
+        """
+        Execute SQL query and return results as DataFrame
+
+        Args:
+            query: SQL query string
+            rewrite: Whether to apply SQL rewrites before execution
+            query_id: Identifier for cancelling a process-pool query
+            compact: Whether to downcast numbers and categorize repeated strings
+
+        Returns:
+            Query results as pandas DataFrame
+        """
+        return await self.run(
+            self.db_manager.execute_query, query, rewrite=rewrite, query_id=query_id, compact=compact
+        )
+
+    async def execute_result(
+        self,
+        query: str,
+        rewrite: bool = True,
+        query_id: Optional[str] = None,
+        compact: bool = False
+    ) -> Union[QueryResult, pd.DataFrame]:
+        """
+        Execute SQL query, returning small results as a QueryResult
+
+        Args:
+            query: SQL query string
+            rewrite: Whether to apply SQL rewrites before execution
+            query_id: Identifier for cancelling a process-pool query
+            compact: Whether to store DataFrame results in compact dtypes
+
+        Returns:
+            QueryResult or pandas DataFrame
+        """
+        return await self.run(
+            self.db_manager.execute_result, query, rewrite=rewrite, query_id=query_id, compact=compact
+        )
+
+    async def get_all_tables(self) -> list:
+        """
+        Get list of all tables in database
+
+        Returns:
+            List of table names
+        """
+        return await self.run(self.db_manager.get_all_tables)
+
+    async def get_user_tables(self) -> list:
+        """
+        Get list of the tables and views users query
+
+        Returns:
+            List of table and view names
+        """
+        return await self.run(self.db_manager.get_user_tables)
+
+    async def get_table_info(self, table_name: str) -> dict:
+        """
+        Get information about a table
+
+        Args:
+            table_name: Name of the table
+
+        Returns:
+            Dictionary with table information
+        """
+        return await self.run(self.db_manager.get_table_info, table_name)
+
+    async def get_table_counts(self, tables: List[str]) -> Dict[str, int]:
+        """
+        Count the rows of several tables in one database-thread call
+
+        Args:
+            tables: Table names
+
+        Returns:
+            Dictionary of table name to row count
+        """
+        def count() -> Dict[str, int]:
+            return {
+                table: int(self.db_manager.execute_query(f"SELECT COUNT(*) AS count FROM {table}")['count'].iloc[0])
+                for table in tables
+            }
+        return await self.run(count)
+
+    def shutdown(self):
+        """Stop the database threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# Global async database manager instance
+async_db_manager = AsyncDatabaseManager()
@@ -0,0 +1,140 @@
+"""
+Parquet snapshot of the dataset and Arrow result conversion
+"""
+import os
+import shutil
+from typing import Dict, Any, List, Optional, Union
+import pandas as pd
+from backend.database.duckdb_engine import DuckDBEngine
+from backend.database.results import QueryResult
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Tables written as one directory per purchase year
+PARQUET_PARTITIONS = {
+    "orders": "purchase_year",
+    "fact_order_items": "purchase_year"
+}
+
+# Media type of an Arrow IPC stream
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def require_pyarrow():
+    """Raise if pyarrow is not installed"""
+    if pa is None:
+        raise Exception("Arrow results require the pyarrow package (pip install pyarrow)")
+
+def write_parquet_snapshot(database_path: str, directory: str) -> Dict[str, Any]:
+    """
+    Write every table of the SQLite database as Parquet
+
+    The snapshot is written next to the target directory and swapped in when
+    complete, so readers never see a partial snapshot.
+
+    Args:
+        database_path: Path to the SQLite database
+        directory: Snapshot directory
+
+    Returns:
+        Dictionary with table count, partitioned tables and size on disk
+    """
+    staging = f"{directory}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+
+    engine = DuckDBEngine(database_path)
+    try:
+        written = engine.export_parquet(staging, partition_by=PARQUET_PARTITIONS)
+    finally:
+        engine.close()
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(staging, directory)
+
+    size_bytes = sum(
+        os.path.getsize(os.path.join(root, file_name))
+        for root, _, file_names in os.walk(directory) for file_name in file_names
+    )
+    return {
+        "tables": len(written),
+        "partitioned": [table for table in written if table in PARQUET_PARTITIONS],
+        "size_bytes": size_bytes,
+        "size_mb": round(size_bytes / (1024 * 1024), 1)
+    }
+
+def rows_to_arrow(names: List[str], rows: List[tuple]):
+    """
+    Build an Arrow table from row tuples, column by column
+
+    Args:
+        names: Column names
+        rows: Row tuples
+
+    Returns:
+        pyarrow Table
+    """
+    require_pyarrow()
+    arrays = []
+    for i in range(len(names)):
+        values = [row[i] for row in rows]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # SQLite columns can mix types; fall back to text
+            arrays.append(pa.array([None if value is None else str(value) for value in values]))
+    return pa.Table.from_arrays(arrays, names=names)
+
+def cursor_to_arrow(cursor):
+    """
+    Build an Arrow table from an executed DB-API cursor
+
+    Args:
+        cursor: Cursor with a pending result
+
+    Returns:
+        pyarrow Table
+    """
+    names = [description[0] for description in cursor.description or []]
+    return rows_to_arrow(names, cursor.fetchall())
+
+def dataframe_to_arrow(df: Union[pd.DataFrame, QueryResult, None]):
+    """
+    Convert a query result to an Arrow table
+
+    Args:
+        df: DataFrame or QueryResult (None for no result)
+
+    Returns:
+        pyarrow Table
+    """
+    require_pyarrow()
+    if df is None:
+        return pa.table({})
+    if isinstance(df, QueryResult):
+        return rows_to_arrow(df.columns, df.rows)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def arrow_to_ipc(table, metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Serialize an Arrow table as an IPC stream
+
+    Args:
+        table: pyarrow Table
+        metadata: Extra key/value pairs stored in the schema metadata
+
+    Returns:
+        IPC stream bytes
+    """
+    require_pyarrow()
+    if metadata:
+        merged = dict(table.schema.metadata or {})
+        merged.update({key.encode(): str(value).encode() for key, value in metadata.items()})
+        table = table.replace_schema_metadata(merged)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,104 @@
+"""
+Memory-compact query results: numeric downcasting, categorical strings and footprint reporting
+"""
+import sys
+from typing import Dict, Any, Union
+import numpy as np
+import pandas as pd
+from backend.database.results import QueryResult
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    """
+    Store a numeric column in the smallest type that holds its values exactly
+
+    Integers always downcast losslessly; floats only move to float32 when every
+    value survives the round trip, so prices and sums keep their cents.
+    """
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        downcast = series.astype(np.float32)
+        if np.array_equal(downcast.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return downcast
+
+    return series
+
+def _categorize_strings(series: pd.Series, max_unique_ratio: float) -> pd.Series:
+    """Convert a low-cardinality text column to a categorical"""
+    if series.dtype != object or len(series) == 0:
+        return series
+
+    values = series.dropna()
+    if not all(isinstance(value, str) for value in values):
+        return series
+
+    if series.nunique(dropna=True) > len(series) * max_unique_ratio:
+        return series
+
+    return series.astype("category")
+
+def compact_dataframe(df: pd.DataFrame, max_unique_ratio: float) -> pd.DataFrame:
+    """
+    Downcast numeric columns and turn repeated strings into categoricals
+
+    Args:
+        df: Query result
+        max_unique_ratio: Largest share of distinct values for a text column to become categorical
+
+    Returns:
+        DataFrame with compact dtypes (the input is left unchanged)
+    """
+    compacted = df.copy(deep=False)
+    for i in range(len(df.columns)):
+        series = df.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            compacted.isetitem(i, _downcast_numeric(series))
+        else:
+            compacted.isetitem(i, _categorize_strings(series, max_unique_ratio))
+    return compacted
+
+def result_memory_bytes(result: Union[pd.DataFrame, QueryResult, None]) -> int:
+    """
+    Memory held by a query result, including string contents
+
+    Args:
+        result: DataFrame or QueryResult
+
+    Returns:
+        Size in bytes
+    """
+    if result is None:
+        return 0
+
+    if isinstance(result, QueryResult):
+        size = sys.getsizeof(result.rows)
+        for row in result.rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        return size
+
+    return int(result.memory_usage(index=True, deep=True).sum())
+
+def memory_report(result: Union[pd.DataFrame, QueryResult, None]) -> Dict[str, Any]:
+    """
+    Footprint of a query result and the dtypes it is stored in
+
+    Args:
+        result: DataFrame or QueryResult
+
+    Returns:
+        Dictionary with bytes, megabytes and per-column dtypes
+    """
+    size = result_memory_bytes(result)
+    if isinstance(result, QueryResult):
+        dtypes = dict(zip(result.columns, result.types))
+    elif result is not None:
+        dtypes = {str(name): str(dtype) for name, dtype in result.dtypes.items()}
+    else:
+        dtypes = {}
+
+    return {
+        "bytes": size,
+        "mb": round(size / (1024 * 1024), 3),
+        "dtypes": dtypes
+    }
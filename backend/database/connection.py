@@ -1,14 +1,41 @@
 """
 Database connection manager
 """
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, QueuePool
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Optional, List, Dict, Any, Union
+import re
+import time
+import threading
 import pandas as pd
 from backend.config import settings
 from backend.database.models import Base
+from backend.database.metadata import read_dataset_metadata, rewrite_reference_subqueries
+from backend.database.surrogate_keys import rewrite_identifier_predicates, KEYED_TABLES, SURROGATE_KEYS
+from backend.database.sql_parsing import table_aliases
+from backend.database.executor import SQLWorkerPool
+from backend.database.query_log import query_log
+from backend.database.memory_replica import MemoryReplica, read_dataset_version
+from backend.database.duckdb_engine import DuckDBEngine
+from backend.database.columnar import cursor_to_arrow
+from backend.database.results import QueryResult, read_result
+from backend.database.compaction import compact_dataframe
+from backend.database.text_search import SEARCH_SHADOW_TABLES
+from backend.database.partitioning import load_partition_catalog, rewrite_partition_pruning
+from backend.database.sql_functions import register_on_engine, uses_sql_functions
+
+# Keyed physical table -> table name used in queries
+LOGICAL_TABLES = {physical: logical for logical, physical in KEYED_TABLES.items()}
+
+# Identifier mapping tables behind the keyed views
+ID_MAPPING_TABLES = {table for table, _ in SURROGATE_KEYS.values()}
+
+# Tables and views users query: the keyed views plus the other modelled tables
+USER_TABLES = [
+    LOGICAL_TABLES.get(name, name) for name in Base.metadata.tables if name not in ID_MAPPING_TABLES
+]
 
 class DatabaseManager:
     """Manages database connections and operations"""
@@ -30,12 +57,47 @@ class DatabaseManager:
             echo=False
         )
         
+        # Queries calling the Python SQL functions get pooled connections of their own
+        self.function_engine = self.engine
+        if "sqlite" in self.database_url:
+            self.function_engine = create_engine(
+                self.database_url,
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                echo=False
+            )
+            register_on_engine(self.function_engine)
+        
         # Create session factory
         self.SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=self.engine
         )
+        
+        # Dataset reference constants, loaded lazily from the metadata table
+        self._dataset_metadata = None
+        self._partition_catalog = None
+        
+        # Process pool for analytical reads, started on first use
+        self.executor_mode = settings.SQL_EXECUTOR_MODE
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Fingerprint log of executed statements
+        self.query_log = query_log if settings.ENABLE_QUERY_LOG else None
+        
+        # In-memory copy serving reads, loaded by load_memory_replica()
+        self.serving_mode = settings.DATABASE_SERVING_MODE
+        self._replica: Optional[MemoryReplica] = None
+        self._replica_lock = threading.Lock()
+        self._replica_checked_at = 0.0
+        
+        # DuckDB copy for wide aggregations: 'sqlite', 'duckdb' or 'auto' (by estimated cost)
+        self.analytical_engine = settings.ANALYTICAL_ENGINE
+        self._duckdb: Optional[DuckDBEngine] = None
+        self._duckdb_lock = threading.RLock()
+        self._duckdb_checked_at = 0.0
     
     def create_tables(self):
         """Create all database tables"""
@@ -63,22 +125,501 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def execute_query(self, query: str) -> pd.DataFrame:
+    def get_dataset_metadata(self) -> dict:
+        """
+        Get dataset reference constants computed at ingest
+        
+        Returns:
+            Dictionary of constant name to value (empty before ingestion)
+        """
+        if self._dataset_metadata is None:
+            self._dataset_metadata = read_dataset_metadata(self)
+        return self._dataset_metadata
+    
+    def refresh_dataset_metadata(self):
+        """Drop cached dataset constants so they are re-read on next use"""
+        self._dataset_metadata = None
+        self._partition_catalog = None
+    
+    def prepare_query(self, query: str) -> str:
+        """
+        Apply SQL rewrites before execution
+        
+        Args:
+            query: SQL query string
+            
+        Returns:
+            Rewritten SQL query
+        """
+        query = rewrite_reference_subqueries(query, self.get_dataset_metadata())
+        return rewrite_identifier_predicates(query)
+    
+    def get_partition_catalog(self) -> Optional[dict]:
+        """
+        Get the time partitions of orders and order items
+        
+        Returns:
+            Partition catalog, or None when the tables are not partitioned
+        """
+        if self._partition_catalog is None:
+            self._partition_catalog = load_partition_catalog(self.get_dataset_metadata()) or {}
+        return self._partition_catalog or None
+    
+    def prune_partitions(self, query: str) -> str:
+        """
+        Point date-filtered orders and order_items references at the matching partitions
+        
+        Applied to queries SQLite executes; the DuckDB copy holds the tables whole.
+        
+        Args:
+            query: Prepared SQL query string
+            
+        Returns:
+            Rewritten SQL query (unchanged when the tables are not partitioned)
+        """
+        catalog = self.get_partition_catalog()
+        return rewrite_partition_pruning(query, catalog) if catalog else query
+    
+    @property
+    def database_path(self) -> Optional[str]:
+        """Filesystem path of a file-backed SQLite database, if any"""
+        url = make_url(self.database_url)
+        if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+            return None
+        return url.database
+    
+    @property
+    def executor(self) -> Optional[SQLWorkerPool]:
+        """
+        Process pool executor, started lazily when process_pool mode is enabled
+        
+        Returns:
+            Worker pool, or None when queries run inline
+        """
+        if self.executor_mode != "process_pool" or self.database_path is None:
+            return None
+        
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = SQLWorkerPool(
+                        self.database_path,
+                        workers=settings.SQL_EXECUTOR_WORKERS or None,
+                        timeout=settings.SQL_QUERY_TIMEOUT
+                    )
+        return self._executor
+    
+    def load_memory_replica(self) -> Optional[dict]:
+        """
+        Copy the on-disk database into a shared-cache in-memory database
+        
+        Replaces any previously loaded copy once the new one is ready.
+        
+        Returns:
+            Replica statistics, or None if there is no file-backed database
+        """
+        if self.database_path is None:
+            return None
+        
+        with self._replica_lock:
+            replica = MemoryReplica(self.database_path)
+            previous, self._replica = self._replica, replica
+            self._replica_checked_at = time.monotonic()
+        
+        if previous is not None:
+            previous.close()
+        self.refresh_dataset_metadata()
+        return replica.stats()
+    
+    def get_replica_stats(self) -> Optional[dict]:
+        """Statistics of the loaded in-memory replica, if any"""
+        return self._replica.stats() if self._replica is not None else None
+    
+    def _check_replica_version(self):
+        """Reload the in-memory replica when the on-disk dataset version changes"""
+        now = time.monotonic()
+        if now - self._replica_checked_at < settings.MEMORY_REPLICA_CHECK_SECONDS:
+            return
+        self._replica_checked_at = now
+        
+        try:
+            with self.engine.connect() as connection:
+                disk_version = read_dataset_version(connection.connection.dbapi_connection)
+        except Exception as e:
+            print(f"Replica version check error: {str(e)}")
+            return
+        
+        if disk_version != self._replica.dataset_version:
+            print(f"Dataset version changed ({self._replica.dataset_version} -> {disk_version}), reloading replica")
+            self.load_memory_replica()
+    
+    def load_duckdb_engine(self) -> Optional[dict]:
+        """
+        Load the dataset into DuckDB from the SQLite file or its Parquet export
+        
+        Replaces any previously loaded copy once the new one is ready.
+        
+        Returns:
+            DuckDB engine statistics, or None if there is nothing to load from
+        """
+        parquet_dir = settings.DUCKDB_PARQUET_DIR or None
+        if parquet_dir is None and self.database_path is None:
+            return None
+        
+        with self._duckdb_lock:
+            engine = DuckDBEngine(self.database_path, parquet_dir=parquet_dir)
+            previous, self._duckdb = self._duckdb, engine
+            self._duckdb_checked_at = time.monotonic()
+        
+        if previous is not None:
+            previous.close()
+        return engine.stats()
+    
+    def get_duckdb_stats(self) -> Optional[dict]:
+        """Statistics of the loaded DuckDB engine, if any"""
+        return self._duckdb.stats() if self._duckdb is not None else None
+    
+    @property
+    def duckdb_engine(self) -> Optional[DuckDBEngine]:
+        """
+        DuckDB engine, loaded on first use and reloaded when the dataset version changes
+        
+        Returns:
+            DuckDB engine, or None when analytical queries stay on SQLite
+        """
+        if self.analytical_engine == "sqlite":
+            return None
+        
+        if self._duckdb is None:
+            with self._duckdb_lock:
+                if self._duckdb is None:
+                    try:
+                        self.load_duckdb_engine()
+                    except Exception as e:
+                        print(f"DuckDB engine unavailable, using SQLite: {str(e)}")
+                        self.analytical_engine = "sqlite"
+            return self._duckdb
+        
+        now = time.monotonic()
+        if self._duckdb.source == "sqlite" and now - self._duckdb_checked_at >= settings.MEMORY_REPLICA_CHECK_SECONDS:
+            self._duckdb_checked_at = now
+            try:
+                with self.engine.connect() as connection:
+                    disk_version = read_dataset_version(connection.connection.dbapi_connection)
+                if disk_version != self._duckdb.dataset_version:
+                    print(f"Dataset version changed ({self._duckdb.dataset_version} -> {disk_version}), reloading DuckDB engine")
+                    self.load_duckdb_engine()
+            except Exception as e:
+                print(f"DuckDB version check error: {str(e)}")
+        return self._duckdb
+    
+    def estimate_scan_rows(self, query: str, row_counts: Dict[str, int]) -> int:
+        """
+        Estimate the rows SQLite reads for a query from its plan
+        
+        Tables scanned in full (including covering-index scans) and tables SQLite
+        builds an automatic index on count with all their rows; indexed searches
+        count as free.
+        
+        Args:
+            query: SQL query string
+            row_counts: Row count per table name
+            
+        Returns:
+            Estimated rows read
+        """
+        aliases = table_aliases(query)
+        scanned = 0
+        for row in self.explain_query(query):
+            match = re.match(r"(SCAN|SEARCH) (\w+)", row["detail"])
+            if not match or (match.group(1) == "SEARCH" and "AUTOMATIC" not in row["detail"]):
+                continue
+            table = aliases.get(match.group(2), match.group(2))
+            scanned += row_counts.get(LOGICAL_TABLES.get(table, table), 0)
+        return scanned
+    
+    def choose_engine(self, query: str) -> str:
+        """
+        Pick the engine for a read query
+        
+        In 'auto' mode, aggregations that scan at least DUCKDB_MIN_SCAN_ROWS rows
+        without an index go to DuckDB; selective lookups stay on SQLite, where
+        indexes make them cheaper than DuckDB's per-query overhead.
+        
+        Args:
+            query: Prepared SQL query string
+            
+        Returns:
+            'duckdb' or 'sqlite'
+        """
+        if self.analytical_engine == "sqlite":
+            return "sqlite"
+        if not re.match(r"\s*(SELECT|WITH)\b", query, re.IGNORECASE) or re.search(r"\bsqlite_\w+|\bPRAGMA\b|\bMATCH\b", query, re.IGNORECASE):
+            return "sqlite"
+        # Python SQL functions are registered on SQLite connections only
+        if uses_sql_functions(query):
+            return "sqlite"
+        
+        duckdb_engine = self.duckdb_engine
+        if duckdb_engine is None:
+            return "sqlite"
+        if self.analytical_engine == "duckdb":
+            return "duckdb"
+        
+        if not re.search(r"\bGROUP\s+BY\b|\b(SUM|AVG|COUNT|MIN|MAX|TOTAL)\s*\(", query, re.IGNORECASE):
+            return "sqlite"
+        try:
+            scanned = self.estimate_scan_rows(query, duckdb_engine.row_counts)
+        except Exception:
+            return "sqlite"
+        return "duckdb" if scanned >= settings.DUCKDB_MIN_SCAN_ROWS else "sqlite"
+    
+    @property
+    def read_engine(self):
+        """
+        Engine serving read queries: the in-memory replica when loaded, else the file
+        
+        Returns:
+            SQLAlchemy engine
+        """
+        if self.serving_mode != "memory" or self._replica is None:
+            return self.engine
+        self._check_replica_version()
+        return self._replica.engine
+    
+    def engine_for(self, query: str):
+        """
+        Engine to run a read query on
+        
+        SQLite calls Python functions while holding the connection's mutex, and
+        the callback needs the GIL; on the shared connection that deadlocks with
+        a thread holding the GIL while it reads rows. Queries calling the SQL
+        functions therefore run on a pooled connection used by one thread at a time.
+        
+        Args:
+            query: SQL query string
+            
+        Returns:
+            SQLAlchemy engine
+        """
+        engine = self.read_engine
+        if not uses_sql_functions(query):
+            return engine
+        return self.function_engine if engine is self.engine else self._replica.function_engine
+    
+    def cancel_query(self, query_id: str) -> bool:
+        """
+        Cancel a running process-pool query by terminating its worker
+        
+        Args:
+            query_id: Identifier passed to execute_query
+            
+        Returns:
+            True if a running query was cancelled
+        """
+        if self._executor is None:
+            return False
+        return self._executor.cancel(query_id)
+    
+    def shutdown(self):
+        """Stop background executors and release connections"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._replica is not None:
+            self._replica.close()
+            self._replica = None
+        if self._duckdb is not None:
+            self._duckdb.close()
+            self._duckdb = None
+        if self.query_log is not None:
+            self.query_log.flush()
+        self.engine.dispose()
+        if self.function_engine is not self.engine:
+            self.function_engine.dispose()
+    
+    def explain_query(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Get the SQLite query plan of a statement
+        
+        Args:
+            query: SQL query string
+            
+        Returns:
+            EXPLAIN QUERY PLAN rows (id, parent, detail)
+        """
+        with self.engine_for(query).connect() as connection:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}").fetchall()
+        return [{"id": row[0], "parent": row[1], "detail": row[3]} for row in rows]
+    
+    def _log_query(self, query: str, started: float, row_count: int):
+        """Record an executed statement in the query log"""
+        if self.query_log is None:
+            return
+        try:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.query_log.record(query, duration_ms, row_count, explain=self.explain_query)
+        except Exception as e:
+            print(f"Query log error: {str(e)}")
+    
+    def _compact(self, result: Union[QueryResult, pd.DataFrame]) -> Union[QueryResult, pd.DataFrame]:
+        """Store a DataFrame result in compact dtypes (small QueryResults are left as rows)"""
+        if isinstance(result, pd.DataFrame) and len(result) > settings.SMALL_RESULT_ROWS:
+            return compact_dataframe(result, settings.CATEGORICAL_MAX_UNIQUE_RATIO)
+        return result
+    
+    def execute_query(
+        self,
+        query: str,
+        rewrite: bool = True,
+        query_id: Optional[str] = None,
+        compact: bool = False
+    ) -> pd.DataFrame:
         """
         Execute SQL query and return results as DataFrame
         
         Args:
             query: SQL query string
+            rewrite: Whether to apply SQL rewrites before execution
+            query_id: Identifier for cancelling a process-pool query
+            compact: Whether to downcast numbers and categorize repeated strings
             
         Returns:
             Query results as pandas DataFrame
         """
+        if rewrite:
+            query = self.prepare_query(query)
+        
+        started = time.perf_counter()
+        
+        if self.choose_engine(query) == "duckdb":
+            try:
+                result = self._duckdb.execute(query)
+                self._log_query(query, started, len(result))
+                return self._compact(result) if compact else result
+            except Exception as e:
+                print(f"DuckDB execution error, falling back to SQLite: {str(e)}")
+                started = time.perf_counter()
+        
+        if rewrite:
+            query = self.prune_partitions(query)
+        
+        executor = self.executor
+        if executor is not None:
+            try:
+                result = executor.execute(query, query_id=query_id)
+            except Exception as e:
+                raise Exception(f"Query execution error: {str(e)}")
+        else:
+            try:
+                with self.engine_for(query).connect() as connection:
+                    result = pd.read_sql_query(text(query), connection)
+            except Exception as e:
+                raise Exception(f"Query execution error: {str(e)}")
+        
+        self._log_query(query, started, len(result))
+        return self._compact(result) if compact else result
+    
+    def execute_result(
+        self,
+        query: str,
+        rewrite: bool = True,
+        query_id: Optional[str] = None,
+        compact: bool = False
+    ) -> Union[QueryResult, pd.DataFrame]:
+        """
+        Execute SQL query, returning small results without building a DataFrame
+        
+        Results of up to SMALL_RESULT_ROWS rows come back as a QueryResult read
+        from the cursor; larger results (and process-pool queries) as DataFrames.
+        
+        Args:
+            query: SQL query string
+            rewrite: Whether to apply SQL rewrites before execution
+            query_id: Identifier for cancelling a process-pool query
+            compact: Whether to store DataFrame results in compact dtypes
+            
+        Returns:
+            QueryResult or pandas DataFrame
+        """
+        if self.executor is not None:
+            return self.execute_query(query, rewrite=rewrite, query_id=query_id, compact=compact)
+        
+        if rewrite:
+            query = self.prepare_query(query)
+        
+        started = time.perf_counter()
+        
+        if self.choose_engine(query) == "duckdb":
+            try:
+                result = read_result(self._duckdb.execute_cursor(query), settings.SMALL_RESULT_ROWS)
+                self._log_query(query, started, len(result))
+                return self._compact(result) if compact else result
+            except Exception as e:
+                print(f"DuckDB execution error, falling back to SQLite: {str(e)}")
+                started = time.perf_counter()
+        
+        if rewrite:
+            query = self.prune_partitions(query)
+        
         try:
-            with self.engine.connect() as connection:
-                result = pd.read_sql_query(text(query), connection)
-            return result
+            with self.engine_for(query).connect() as connection:
+                cursor = connection.connection.dbapi_connection.cursor()
+                try:
+                    cursor.execute(query)
+                    result = read_result(cursor, settings.SMALL_RESULT_ROWS)
+                finally:
+                    cursor.close()
         except Exception as e:
             raise Exception(f"Query execution error: {str(e)}")
+        
+        self._log_query(query, started, len(result))
+        return self._compact(result) if compact else result
+    
+    def execute_arrow(self, query: str, rewrite: bool = True):
+        """
+        Execute SQL query and return results as an Arrow table
+        
+        DuckDB results are handed over in Arrow format directly; SQLite rows are
+        read from the cursor into Arrow columns without a DataFrame in between.
+        
+        Args:
+            query: SQL query string
+            rewrite: Whether to apply SQL rewrites before execution
+            
+        Returns:
+            pyarrow Table
+        """
+        if rewrite:
+            query = self.prepare_query(query)
+        
+        started = time.perf_counter()
+        
+        if self.choose_engine(query) == "duckdb":
+            try:
+                result = self._duckdb.execute_arrow(query)
+                self._log_query(query, started, result.num_rows)
+                return result
+            except Exception as e:
+                print(f"DuckDB execution error, falling back to SQLite: {str(e)}")
+                started = time.perf_counter()
+        
+        if rewrite:
+            query = self.prune_partitions(query)
+        
+        try:
+            with self.engine_for(query).connect() as connection:
+                cursor = connection.connection.dbapi_connection.cursor()
+                try:
+                    cursor.execute(query)
+                    result = cursor_to_arrow(cursor)
+                finally:
+                    cursor.close()
+        except Exception as e:
+            raise Exception(f"Query execution error: {str(e)}")
+        
+        self._log_query(query, started, result.num_rows)
+        return result
     
     def execute_raw_query(self, query: str):
         """
@@ -110,14 +651,28 @@ class DatabaseManager:
     
     def get_all_tables(self) -> list:
         """
-        Get list of all tables in database
+        Get list of all physical tables in database
+        
+        Includes the storage tables behind the keyed views and internal tables
+        (samples, indexes, logs); use get_user_tables for the tables users query.
         
         Returns:
             List of table names
         """
         query = "SELECT name FROM sqlite_master WHERE type='table'"
         result = self.execute_query(query)
-        return result['name'].tolist()
+        return [name for name in result['name'].tolist() if name not in SEARCH_SHADOW_TABLES]
+    
+    def get_user_tables(self) -> list:
+        """
+        Get list of the tables and views users query
+        
+        Returns:
+            List of table and view names that exist in the database
+        """
+        query = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+        existing = set(self.execute_query(query, rewrite=False)['name'])
+        return [name for name in USER_TABLES if name in existing]
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -0,0 +1,383 @@
+"""
+Per-column data profile computed at ingest: quantiles, histograms and top-k
+frequencies for answering distribution questions without a query
+"""
+import re
+import json
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from backend.database.surrogate_keys import KEYED_TABLES
+from backend.database.value_index import normalize_value
+
+# Table holding one profile row per column
+PROFILE_TABLE = "column_profile"
+
+# Tables profiled, under the names used in queries
+PROFILED_TABLES = list(KEYED_TABLES)
+
+# Identifier, key and location code columns have no meaningful distribution
+SKIPPED_COLUMN_SUFFIXES = ("_id", "_key", "_zip_code_prefix")
+
+# Columns with at most this many distinct values get exact frequencies
+LOW_CARDINALITY_MAX = 50
+TOP_K = 20
+
+QUANTILES = [0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0]
+HISTOGRAM_BINS = 20
+
+# Column name tokens too generic to identify a column on their own
+GENERIC_TOKENS = {
+    "order", "product", "customer", "seller", "payment", "review", "purchase",
+    "is", "vs", "g", "cm", "qty", "km"
+}
+
+# Extra phrases naming a column in questions: column -> phrases
+COLUMN_ALIASES = {
+    "review_score": ["rating", "stars"],
+    "delivery_days": ["delivery time"],
+    "payment_type": ["payment method"],
+    "payment_value": ["order value", "payment amount"],
+    "freight_value": ["shipping cost"]
+}
+
+DISTRIBUTION_PATTERN = re.compile(
+    r"\b(?:distribution|distributed|histogram|spread|range|percentiles?|quantiles?|median|"
+    r"how many \w+ do|how often)\b",
+    re.IGNORECASE
+)
+
+# Grouping, filters and comparisons need a real query
+FILTER_PATTERN = re.compile(
+    r"\b(?:for|in|by|per|each|where|during|since|between|last|past|from|compare|versus|vs|when|with)\b|\d",
+    re.IGNORECASE
+)
+
+# Questions about a value range or percentiles get the summary instead of the histogram
+SUMMARY_PATTERN = re.compile(r"\b(?:range|percentiles?|quantiles?|median)\b", re.IGNORECASE)
+
+def _plain(value: Any) -> Any:
+    """Python scalar of a NumPy value, for JSON"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def profile_column(series: pd.Series) -> Optional[Dict[str, Any]]:
+    """
+    Profile one column
+
+    Numeric columns get mean, spread and quantiles, plus a histogram when they
+    have more than LOW_CARDINALITY_MAX distinct values; columns with fewer
+    distinct values (numeric or not) get their TOP_K most frequent values.
+
+    Args:
+        series: Column values
+
+    Returns:
+        Profile dictionary, or None for high-cardinality text columns
+    """
+    values = series.dropna()
+    distinct = int(values.nunique())
+    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if not numeric and distinct > LOW_CARDINALITY_MAX:
+        return None
+
+    profile = {
+        "kind": "numeric" if numeric else "categorical",
+        "row_count": int(len(series)),
+        "null_count": int(len(series) - len(values)),
+        "distinct_count": distinct,
+        "min_value": None, "max_value": None, "mean": None, "std": None,
+        "quantiles": None, "histogram": None, "top_values": None
+    }
+
+    if numeric and len(values):
+        array = values.to_numpy(dtype=np.float64)
+        quantiles = np.quantile(array, QUANTILES)
+        profile.update({
+            "min_value": float(array.min()),
+            "max_value": float(array.max()),
+            "mean": float(array.mean()),
+            "std": float(array.std()),
+            "quantiles": json.dumps({str(q): float(value) for q, value in zip(QUANTILES, quantiles)})
+        })
+        if distinct > LOW_CARDINALITY_MAX:
+            counts, edges = np.histogram(array, bins=HISTOGRAM_BINS)
+            profile["histogram"] = json.dumps([
+                [float(edges[i]), float(edges[i + 1]), int(counts[i])] for i in range(len(counts))
+            ])
+
+    if distinct <= LOW_CARDINALITY_MAX and len(values):
+        counts = values.value_counts().head(TOP_K)
+        profile["top_values"] = json.dumps([[_plain(value), int(count)] for value, count in counts.items()])
+
+    return profile
+
+def build_data_profile(db_manager) -> int:
+    """
+    Profile every numeric and low-cardinality column of the profiled tables
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Number of profiled columns
+    """
+    rows = []
+    for table in PROFILED_TABLES:
+        columns = [
+            column['name'] for column in db_manager.get_table_info(table)
+            if not column['name'].endswith(SKIPPED_COLUMN_SUFFIXES)
+        ]
+        if not columns:
+            continue
+
+        df = db_manager.execute_query(f"SELECT {', '.join(columns)} FROM {table}", rewrite=False)
+        for column in columns:
+            profile = profile_column(df[column])
+            if profile is not None:
+                rows.append({"table_name": table, "column_name": column, **profile})
+
+    profile_df = pd.DataFrame(rows)
+    profile_df.to_sql(PROFILE_TABLE, db_manager.engine, if_exists="replace", index=False)
+    return len(profile_df)
+
+def _tokens(text: str) -> List[str]:
+    """Normalized tokens with a trailing plural 's' removed"""
+    return [token[:-1] if len(token) > 3 and token.endswith("s") else token for token in normalize_value(text).split()]
+
+class DataProfile:
+    """Distribution lookups over the column profile built at ingest"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize data profile
+
+        Args:
+            db_manager: Database manager to load from (defaults to global manager)
+        """
+        self._db_manager = db_manager
+        self.loaded = False
+        self.profiles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def load(self):
+        """Load the profile table into memory"""
+        self.profiles = {}
+        try:
+            df = self.db_manager.execute_query(f"SELECT * FROM {PROFILE_TABLE}", rewrite=False)
+        except Exception as e:
+            print(f"Data profile load error: {str(e)}")
+            self.loaded = True
+            return
+
+        for row in df.to_dict('records'):
+            for field in ("quantiles", "histogram", "top_values"):
+                row[field] = json.loads(row[field]) if isinstance(row[field], str) else None
+            self.profiles[(row['table_name'], row['column_name'])] = row
+        self.loaded = True
+
+    def refresh(self):
+        """Reload the profile on next use"""
+        self.loaded = False
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def get(self, table: str, column: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the profile of a column
+
+        Args:
+            table: Table name
+            column: Column name
+
+        Returns:
+            Profile dictionary, or None if the column is not profiled
+        """
+        self._ensure_loaded()
+        return self.profiles.get((table, column))
+
+    def quantile(self, table: str, column: str, q: float) -> Optional[float]:
+        """
+        Estimate a quantile, interpolating between the stored ones
+
+        Args:
+            table: Table name
+            column: Column name
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value, or None for columns without numeric quantiles
+        """
+        profile = self.get(table, column)
+        if not profile or not profile["quantiles"]:
+            return None
+        points = sorted((float(key), value) for key, value in profile["quantiles"].items())
+        return float(np.interp(q, [p for p, _ in points], [v for _, v in points]))
+
+    def frequencies(self, table: str, column: str) -> Optional[pd.DataFrame]:
+        """
+        Most frequent values with their counts and share of non-null rows
+
+        Args:
+            table: Table name
+            column: Column name
+
+        Returns:
+            DataFrame of value, count and share (an '(other)' row holds values
+            beyond the top TOP_K), or None for high-cardinality columns
+        """
+        profile = self.get(table, column)
+        if not profile or not profile["top_values"]:
+            return None
+
+        df = pd.DataFrame(profile["top_values"], columns=[column, "count"])
+        non_null = profile["row_count"] - profile["null_count"]
+        remainder = non_null - int(df["count"].sum())
+        if remainder > 0:
+            df = pd.concat([df, pd.DataFrame([{column: "(other)", "count": remainder}])], ignore_index=True)
+        df["share"] = (df["count"] / non_null).round(4)
+        if profile["kind"] == "numeric" and remainder <= 0:
+            df = df.sort_values(column, ignore_index=True)
+        return df
+
+    def histogram(self, table: str, column: str) -> Optional[pd.DataFrame]:
+        """
+        Equal-width histogram of a numeric column
+
+        Args:
+            table: Table name
+            column: Column name
+
+        Returns:
+            DataFrame of bin_start, bin_end, count and share, or None
+        """
+        profile = self.get(table, column)
+        if not profile or not profile["histogram"]:
+            return None
+
+        df = pd.DataFrame(profile["histogram"], columns=["bin_start", "bin_end", "count"])
+        df["share"] = (df["count"] / max(int(df["count"].sum()), 1)).round(4)
+        return df
+
+    def summary(self, table: str, column: str) -> Optional[pd.DataFrame]:
+        """
+        Range, mean and percentiles of a numeric column
+
+        Args:
+            table: Table name
+            column: Column name
+
+        Returns:
+            DataFrame of statistic and value, or None
+        """
+        profile = self.get(table, column)
+        if not profile or profile["kind"] != "numeric" or not profile["quantiles"]:
+            return None
+
+        quantiles = profile["quantiles"]
+        rows = [("min", profile["min_value"])]
+        rows += [(f"p{round(float(q) * 100)}", value) for q, value in quantiles.items() if 0 < float(q) < 1]
+        rows += [("max", profile["max_value"]), ("mean", profile["mean"]), ("std", profile["std"])]
+        rows += [("non_null_rows", profile["row_count"] - profile["null_count"])]
+        return pd.DataFrame(rows, columns=["statistic", "value"])
+
+    def find_column(self, question: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the profiled column a question is about
+
+        A column matches when the question names all its distinctive name
+        tokens (or one of its aliases); ties go to the column with more
+        matching tokens, and remaining ties match nothing.
+
+        Args:
+            question: User question
+
+        Returns:
+            (table, column), or None when no single column matches
+        """
+        self._ensure_loaded()
+        words = set(_tokens(question))
+        text = " ".join(_tokens(question))
+
+        scored = []
+        for table, column in self.profiles:
+            tokens = _tokens(column.replace("_", " "))
+            distinctive = [token for token in tokens if token not in GENERIC_TOKENS]
+            aliased = any(" ".join(_tokens(alias)) in text for alias in COLUMN_ALIASES.get(column, []))
+            if not aliased and (not distinctive or not all(token in words for token in distinctive)):
+                continue
+            context = set(tokens) | set(_tokens(table))
+            scored.append((len(context & words) + (2 if aliased else 0), table, column))
+
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        if len(scored) > 1 and scored[0][0] == scored[1][0]:
+            return None
+        return scored[0][1], scored[0][2]
+
+    def answer(self, question: str) -> Optional[Tuple[str, pd.DataFrame]]:
+        """
+        Answer a single-column distribution question from the profile
+
+        Args:
+            question: User question
+
+        Returns:
+            Tuple of (SQL reading the profile row, result DataFrame), or None when
+            the question needs a query (filters, grouping, several columns)
+        """
+        if not DISTRIBUTION_PATTERN.search(question) or FILTER_PATTERN.search(question):
+            return None
+
+        match = self.find_column(question)
+        if match is None:
+            return None
+        table, column = match
+
+        if SUMMARY_PATTERN.search(question):
+            result = self.summary(table, column)
+        else:
+            result = self.frequencies(table, column)
+            if result is None:
+                result = self.histogram(table, column)
+        if result is None:
+            result = self.frequencies(table, column)
+        if result is None:
+            return None
+
+        sql = (
+            f"SELECT * FROM {PROFILE_TABLE} "
+            f"WHERE table_name = '{table}' AND column_name = '{column}'"
+        )
+        return sql, result
+
+    def format_for_schema(self, table: str, column: str) -> str:
+        """
+        Quartiles of a numeric column for the schema prompt
+
+        Args:
+            table: Table name
+            column: Column name
+
+        Returns:
+            Text like 'quartiles 39.9 / 74.99 / 134.9, p99 890' (empty if not profiled)
+        """
+        profile = self.get(table, column)
+        if not profile or profile["kind"] != "numeric" or not profile["quantiles"]:
+            return ""
+        quantiles = profile["quantiles"]
+        return (
+            f"quartiles {quantiles['0.25']:g} / {quantiles['0.5']:g} / {quantiles['0.75']:g}, "
+            f"p99 {quantiles['0.99']:g}"
+        )
+
+# Global data profile instance
+data_profile = DataProfile()
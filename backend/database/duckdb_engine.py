@@ -0,0 +1,497 @@
+"""
+DuckDB analytical engine over a copy of the SQLite database or its Parquet export
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import pandas as pd
+from sqlalchemy import Integer
+from backend.database.models import Base
+from backend.database.metadata import METADATA_TABLE
+from backend.database.sql_parsing import (
+    mask_literals, paren_depths, split_top_level, find_top_level_keyword, select_list_span, select_items
+)
+from backend.database.surrogate_keys import KEYED_TABLES, KEY_COLUMNS
+from backend.database.text_search import is_search_table
+from backend.database.partitioning import PARTITIONED_TABLES, is_partition_relation
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Name of the attached SQLite database inside DuckDB
+SOURCE_ALIAS = "sqlite_source"
+
+# SQLite date functions rewritten by translate_query
+DATE_FUNCTION_PATTERN = re.compile(r"\b(STRFTIME|JULIANDAY|DATETIME|DATE|TIME)\s*\(", re.IGNORECASE)
+
+# Output format of the SQLite date functions returning text
+DATE_FUNCTION_FORMATS = {
+    "date": "%Y-%m-%d",
+    "datetime": "%Y-%m-%d %H:%M:%S",
+    "time": "%H:%M:%S"
+}
+
+# '+6 months', '-1 day', ...
+INTERVAL_MODIFIER_PATTERN = re.compile(
+    r"([+-]?)\s*(\d+(?:\.\d+)?)\s+(year|month|day|hour|minute|second)s?", re.IGNORECASE
+)
+
+# Unix epoch as a Julian day number
+JULIAN_EPOCH = 2440587.5
+
+def _quote(path: str) -> str:
+    """Escape a path for a SQL string literal"""
+    return path.replace("'", "''")
+
+def _sqlite_timestamp(argument: str, modifiers: List[str]) -> str:
+    """
+    Translate a SQLite time value and its modifiers into a DuckDB TIMESTAMP expression
+
+    Args:
+        argument: Time value expression
+        modifiers: Modifier expressions (string literals)
+
+    Returns:
+        DuckDB expression
+    """
+    if re.fullmatch(r"'now'", argument.strip(), re.IGNORECASE):
+        timestamp = "CAST(CURRENT_TIMESTAMP AS TIMESTAMP)"
+    else:
+        timestamp = f"TRY_CAST({argument} AS TIMESTAMP)"
+
+    for modifier in modifiers:
+        literal = re.fullmatch(r"'([^']*)'", modifier.strip())
+        if not literal:
+            raise Exception(f"Unsupported date modifier: {modifier}")
+        value = literal.group(1).strip().lower()
+
+        interval = INTERVAL_MODIFIER_PATTERN.fullmatch(value)
+        start_of = re.fullmatch(r"start of (year|month|day)", value)
+        if value == "unixepoch":
+            timestamp = f"make_timestamp(CAST(({argument}) * 1000000 AS BIGINT))"
+        elif interval:
+            sign = "-" if interval.group(1) == "-" else "+"
+            timestamp = f"({timestamp} {sign} INTERVAL '{interval.group(2)} {interval.group(3)}')"
+        elif start_of:
+            timestamp = f"date_trunc('{start_of.group(1)}', {timestamp})"
+        else:
+            raise Exception(f"Unsupported date modifier: {modifier}")
+    return timestamp
+
+def _translate_date_function(name: str, arguments: List[str]) -> str:
+    """Translate one SQLite date function call"""
+    name = name.lower()
+    if name == "strftime":
+        if len(arguments) < 2:
+            raise Exception("STRFTIME needs a format and a time value")
+        return f"strftime({_sqlite_timestamp(arguments[1], arguments[2:])}, {arguments[0]})"
+
+    if not arguments:
+        raise Exception(f"{name.upper()} needs a time value")
+    timestamp = _sqlite_timestamp(arguments[0], arguments[1:])
+    if name == "julianday":
+        return f"(epoch({timestamp}) / 86400.0 + {JULIAN_EPOCH})"
+    return f"strftime({timestamp}, '{DATE_FUNCTION_FORMATS[name]}')"
+
+def _wrap_ungrouped_columns(query: str) -> str:
+    """
+    Wrap bare columns missing from the outermost GROUP BY in ANY_VALUE()
+
+    SQLite returns such columns from an arbitrary row of the group, which is
+    how queries select names that depend on a grouped key; DuckDB rejects them.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        Query DuckDB can bind
+    """
+    span = select_list_span(query)
+    group_at = find_top_level_keyword(query, "GROUP")
+    if span is None or group_at is None:
+        return query
+
+    ends = [find_top_level_keyword(query, keyword, group_at) for keyword in ("HAVING", "WINDOW", "ORDER", "LIMIT")]
+    group_end = min([end for end in ends if end is not None], default=len(query))
+    by = re.match(r"GROUP\s+BY\b", query[group_at:], re.IGNORECASE)
+    if not by:
+        return query
+
+    items = select_items(query)
+    parts = split_top_level(query[span[0]:span[1]])
+    if len(items) != len(parts):
+        return query
+
+    grouped = set()
+    for term in split_top_level(query[group_at + by.end():group_end]):
+        term = re.sub(r"\s+", "", term).lower()
+        if term.isdigit() and 0 < int(term) <= len(items):
+            term = re.sub(r"\s+", "", items[int(term) - 1][0]).lower()
+        grouped.add(term)
+        grouped.add(term.split(".")[-1])
+
+    changed = False
+    for index, (expression, name) in enumerate(items):
+        column = expression.strip().lower()
+        if not re.fullmatch(r"(?:\w+\.)?\w+", column) or column.isdigit():
+            continue
+        if column in grouped or column.split(".")[-1] in grouped or name.lower() in grouped:
+            continue
+        parts[index] = f" ANY_VALUE({expression.strip()}) AS {name}"
+        changed = True
+
+    if not changed:
+        return query
+    return query[:span[0]] + ",".join(parts) + " " + query[span[1]:]
+
+def translate_query(query: str) -> str:
+    """
+    Translate SQLite-specific SQL into DuckDB's dialect
+
+    Rewrites STRFTIME, JULIANDAY, DATE, DATETIME and TIME calls (with interval,
+    'start of' and 'unixepoch' modifiers), case-insensitive LIKE, and the
+    REAL/INTEGER casts and negative LIMITs, and wraps ungrouped bare columns of the outermost
+    select in ANY_VALUE(). Integer division and NULL ordering are matched through
+    connection settings instead (see DuckDBEngine).
+
+    Args:
+        query: SQLite query string
+
+    Returns:
+        DuckDB query string
+
+    Raises:
+        Exception: If the query uses a construct without a DuckDB translation
+    """
+    # Rewrite calls right to left so nested calls are already translated
+    # when the call containing them is rewritten
+    limit = len(query)
+    while True:
+        masked = mask_literals(query)
+        matches = [match for match in DATE_FUNCTION_PATTERN.finditer(masked) if match.start() < limit]
+        if not matches:
+            break
+        match = matches[-1]
+        # Skip column names such as "date" that are not calls
+        if masked[max(0, match.start() - 1)] in "._":
+            limit = match.start()
+            continue
+
+        depths = paren_depths(masked)
+        depth = depths[match.end() - 1]
+        end = match.end()
+        while end < len(masked) and not (masked[end] == ")" and depths[end] == depth):
+            end += 1
+        if end >= len(masked):
+            raise Exception(f"Unbalanced parentheses in {match.group(1)} call")
+
+        inner = query[match.end():end]
+        arguments = [argument.strip() for argument in split_top_level(inner)] if inner.strip() else []
+        replacement = _translate_date_function(match.group(1), arguments)
+        query = query[:match.start()] + replacement + query[end + 1:]
+        limit = match.start()
+
+    query = _wrap_ungrouped_columns(query)
+    masked = mask_literals(query)
+    edits = []
+    for match in re.finditer(r"\bNOT\s+LIKE\b|\bLIKE\b", masked, re.IGNORECASE):
+        edits.append((match.start(), match.end(), "NOT ILIKE" if match.group(0).upper().startswith("NOT") else "ILIKE"))
+    for match in re.finditer(r"\bAS\s+(REAL|INTEGER)\b", masked, re.IGNORECASE):
+        edits.append((match.start(), match.end(), "AS DOUBLE" if match.group(1).upper() == "REAL" else "AS BIGINT"))
+    # A negative LIMIT means no limit in SQLite
+    for match in re.finditer(r"\bLIMIT\s+-\s*\d+\b", masked, re.IGNORECASE):
+        edits.append((match.start(), match.end(), ""))
+    for start, end, replacement in sorted(edits, reverse=True):
+        query = query[:start] + replacement + query[end:]
+    return query
+
+def decoded_table_select(view_name: str, source: str) -> str:
+    """
+    Build the DuckDB SELECT materializing a keyed table under its original columns
+
+    Mirrors the SQLite view (see surrogate_keys.view_definition): identifiers
+    are joined back from the mapping tables, epoch timestamps are formatted as
+    text and the surrogate keys follow as extra columns.
+
+    Args:
+        view_name: Original table name
+        source: Schema holding the physical and mapping tables
+
+    Returns:
+        SELECT statement
+    """
+    table = Base.metadata.tables[KEYED_TABLES[view_name]]
+    select_list: List[str] = []
+    key_columns: List[str] = []
+    joins: List[str] = []
+
+    for column in table.columns:
+        if column.name in KEY_COLUMNS:
+            mapping_table, id_column = KEY_COLUMNS[column.name]
+            alias = f"m_{column.name}"
+            select_list.append(f"{alias}.{id_column} AS {id_column}")
+            joins.append(
+                f"LEFT JOIN {source}.{mapping_table} {alias} ON {alias}.{column.name} = t.{column.name}"
+            )
+            key_columns.append(f"t.{column.name}")
+        elif column.info.get("epoch"):
+            select_list.append(
+                f"strftime(make_timestamp(t.{column.name} * 1000000), '%Y-%m-%d %H:%M:%S') AS {column.name}"
+            )
+        else:
+            select_list.append(f"t.{column.name}")
+
+    return (
+        f"SELECT {', '.join(select_list + key_columns)} FROM {source}.{table.name} t "
+        + " ".join(joins)
+    )
+
+class DuckDBEngine:
+    """In-process DuckDB database holding a columnar copy of the dataset"""
+
+    def __init__(self, database_path: Optional[str] = None, parquet_dir: Optional[str] = None):
+        """
+        Load the dataset into DuckDB
+
+        Args:
+            database_path: Path to the SQLite database to copy
+            parquet_dir: Directory of <table>.parquet exports to read instead
+        """
+        if duckdb is None:
+            raise Exception("DuckDB engine requires the duckdb package (pip install duckdb)")
+        if not database_path and not parquet_dir:
+            raise Exception("DuckDB engine needs a SQLite database or a Parquet directory")
+
+        self.database_path = database_path
+        self.parquet_dir = parquet_dir
+        self._connection = duckdb.connect(":memory:")
+        # Match SQLite: integer / integer stays an integer, NULLs sort first ascending
+        self._connection.execute("SET GLOBAL integer_division = true")
+        self._connection.execute("SET GLOBAL default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        self._local = threading.local()
+
+        started = time.perf_counter()
+        if parquet_dir:
+            self.source = "parquet"
+            self.tables = self._load_parquet(parquet_dir)
+        else:
+            self.source = "sqlite"
+            self.tables = self._load_sqlite(database_path)
+        self.load_seconds = time.perf_counter() - started
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+
+        self.row_counts = {
+            table: self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in self.tables
+        }
+        try:
+            row = self._connection.execute(
+                f"SELECT value FROM {METADATA_TABLE} WHERE key = 'dataset_version'"
+            ).fetchone()
+            self.dataset_version = row[0] if row else None
+        except duckdb.Error:
+            self.dataset_version = None
+
+    def _load_sqlite(self, database_path: str) -> List[str]:
+        """
+        Copy every table of the SQLite database into DuckDB
+
+        Uses DuckDB's sqlite extension when it can be loaded, and otherwise reads
+        the tables through Python's sqlite3 module.
+
+        Args:
+            database_path: Path to the SQLite database
+
+        Returns:
+            Names of the loaded tables
+        """
+        source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            names = [
+                row[0] for row in source.execute(
+                    "SELECT name FROM sqlite_master WHERE (type = 'table' OR name IN ({})) "
+                    "AND name NOT LIKE 'sqlite_%'".format(
+                        ", ".join(f"'{KEYED_TABLES[table]}'" for table in PARTITIONED_TABLES)
+                    )
+                )
+                # Full-text indexes need SQLite's FTS5 module; time-partitioned
+                # tables are read whole through their UNION ALL views
+                if not is_search_table(row[0]) and not is_partition_relation(row[0])
+            ]
+        finally:
+            source.close()
+
+        self._connection.execute("CREATE SCHEMA staging")
+        try:
+            self._connection.execute(f"ATTACH '{database_path}' AS {SOURCE_ALIAS} (TYPE sqlite, READ_ONLY)")
+            for name in names:
+                self._connection.execute(f"CREATE TABLE staging.{name} AS SELECT * FROM {SOURCE_ALIAS}.{name}")
+            self._connection.execute(f"DETACH {SOURCE_ALIAS}")
+        except duckdb.Error as e:
+            print(f"DuckDB sqlite extension unavailable, copying through sqlite3: {str(e).splitlines()[0]}")
+            self._copy_with_sqlite3(database_path, names)
+
+        # Keyed tables are stored decoded under their original names; the
+        # mapping tables stay for identifier lookups
+        physical_tables = set(KEYED_TABLES.values())
+        for view_name in KEYED_TABLES:
+            if KEYED_TABLES[view_name] in names:
+                self._connection.execute(f"CREATE TABLE {view_name} AS {decoded_table_select(view_name, 'staging')}")
+        for name in names:
+            if name not in physical_tables and name not in KEYED_TABLES:
+                self._connection.execute(f"CREATE TABLE {name} AS SELECT * FROM staging.{name}")
+        self._connection.execute("DROP SCHEMA staging CASCADE")
+
+        return [name for name in KEYED_TABLES if KEYED_TABLES[name] in names] + [
+            name for name in names if name not in physical_tables and name not in KEYED_TABLES
+        ]
+
+    def _copy_with_sqlite3(self, database_path: str, names: List[str]):
+        """Copy tables into the staging schema through pandas"""
+        source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            for name in names:
+                self._connection.execute(f"DROP TABLE IF EXISTS staging.{name}")
+                # Keep nullable integer columns integral
+                dtype = None
+                if name in Base.metadata.tables:
+                    dtype = {
+                        column.name: "Int64" for column in Base.metadata.tables[name].columns
+                        if isinstance(column.type, Integer)
+                    }
+                frame = pd.read_sql_query(f"SELECT * FROM {name}", source, dtype=dtype)
+                self._connection.register("staging_frame", frame)
+                self._connection.execute(f"CREATE TABLE staging.{name} AS SELECT * FROM staging_frame")
+                self._connection.unregister("staging_frame")
+        finally:
+            source.close()
+
+    def _load_parquet(self, parquet_dir: str) -> List[str]:
+        """
+        Expose each <table>.parquet file or <table>/ partition directory as a view
+
+        Partitioned tables are read with hive partitioning, so filters on the
+        partition column skip the files of other partitions.
+
+        Args:
+            parquet_dir: Directory written by export_parquet()
+
+        Returns:
+            Names of the exposed tables
+        """
+        sources = {}
+        for entry in sorted(os.listdir(parquet_dir)):
+            path = os.path.join(parquet_dir, entry)
+            if entry.endswith(".parquet") and os.path.isfile(path):
+                sources[entry[:-len(".parquet")]] = f"read_parquet('{_quote(path)}')"
+            elif os.path.isdir(path):
+                pattern = os.path.join(path, "**", "*.parquet")
+                sources[entry] = f"read_parquet('{_quote(pattern)}', hive_partitioning = true)"
+        if not sources:
+            raise Exception(f"No Parquet files found in {parquet_dir}")
+        for name, source in sources.items():
+            self._connection.execute(f"CREATE VIEW {name} AS SELECT * FROM {source}")
+        return list(sources)
+
+    def export_parquet(self, directory: str, partition_by: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Write every loaded table as Parquet
+
+        Tables listed in partition_by become <directory>/<table>/<column>=<value>/
+        directories; the others are written to <directory>/<table>.parquet.
+
+        Args:
+            directory: Output directory (created if missing)
+            partition_by: Table name to partition column
+
+        Returns:
+            Dictionary of table name to written file or directory
+        """
+        partition_by = partition_by or {}
+        os.makedirs(directory, exist_ok=True)
+        written = {}
+        for table in self.tables:
+            column = partition_by.get(table)
+            if column:
+                path = os.path.join(directory, table)
+                options = f"FORMAT parquet, PARTITION_BY ({column}), WRITE_PARTITION_COLUMNS true, OVERWRITE_OR_IGNORE"
+            else:
+                path = os.path.join(directory, f"{table}.parquet")
+                options = "FORMAT parquet"
+            self._connection.execute(f"COPY {table} TO '{_quote(path)}' ({options})")
+            written[table] = path
+        return written
+
+    def _cursor(self):
+        """Per-thread DuckDB connection sharing the loaded database"""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._connection.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def execute(self, query: str) -> pd.DataFrame:
+        """
+        Execute a SQLite-dialect query on DuckDB
+
+        Args:
+            query: SQL query string
+
+        Returns:
+            Query results as pandas DataFrame
+        """
+        return self._cursor().execute(translate_query(query)).df()
+
+    def execute_cursor(self, query: str):
+        """
+        Execute a SQLite-dialect query on DuckDB and leave the rows on the cursor
+
+        Args:
+            query: SQL query string
+
+        Returns:
+            DuckDB connection holding the pending result (DB-API fetch methods)
+        """
+        return self._cursor().execute(translate_query(query))
+
+    def execute_arrow(self, query: str):
+        """
+        Execute a SQLite-dialect query on DuckDB and keep the result columnar
+
+        Args:
+            query: SQL query string
+
+        Returns:
+            pyarrow Table
+        """
+        result = self._cursor().execute(translate_query(query))
+        # to_arrow_table() replaces fetch_arrow_table() in newer DuckDB releases
+        if hasattr(result, "to_arrow_table"):
+            return result.to_arrow_table()
+        return result.fetch_arrow_table()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get load statistics
+
+        Returns:
+            Dictionary with source, tables, load time and dataset version
+        """
+        return {
+            "source": self.source,
+            "dataset_version": self.dataset_version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            "tables": len(self.tables),
+            "rows": sum(self.row_counts.values())
+        }
+
+    def close(self):
+        """Release the DuckDB database"""
+        self._connection.close()
@@ -0,0 +1,255 @@
+"""
+Process-pool SQL executor for CPU-bound analytical queries
+"""
+import os
+import queue
+import sqlite3
+import threading
+import itertools
+import multiprocessing
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from backend.database.sql_functions import register_functions
+
+def encode_column(values: List[Any]) -> Tuple[str, Any]:
+    """
+    Encode one result column as a compact buffer
+
+    Integer columns become int64 buffers, numeric columns with nulls become
+    float64 buffers with NaN, text columns become UTF-8 bytes plus offsets.
+    Anything else (mixed types, blobs) is sent as a plain list.
+
+    Args:
+        values: Column values from the cursor
+
+    Returns:
+        Tuple of (kind, payload)
+    """
+    kinds = {type(v) for v in values}
+
+    if kinds <= {int}:
+        return "i8", array('q', values).tobytes()
+
+    if kinds <= {int, float, type(None)}:
+        return "f8", array('d', [float('nan') if v is None else v for v in values]).tobytes()
+
+    if kinds <= {str, type(None)}:
+        encoded = [b"" if v is None else v.encode("utf-8") for v in values]
+        offsets = array('q', [0])
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+        nulls = bytes(v is None for v in values)
+        return "str", (b"".join(encoded), offsets.tobytes(), nulls)
+
+    return "obj", values
+
+def decode_column(kind: str, payload: Any) -> Any:
+    """
+    Decode a column buffer produced by encode_column
+
+    Args:
+        kind: Encoding kind
+        payload: Encoded payload
+
+    Returns:
+        NumPy array or list of values
+    """
+    if kind == "i8":
+        return np.frombuffer(payload, dtype=np.int64)
+
+    if kind == "f8":
+        return np.frombuffer(payload, dtype=np.float64)
+
+    if kind == "str":
+        data, offsets, nulls = payload
+        offsets = np.frombuffer(offsets, dtype=np.int64)
+        return [
+            None if nulls[i] else data[offsets[i]:offsets[i + 1]].decode("utf-8")
+            for i in range(len(nulls))
+        ]
+
+    return payload
+
+def _worker_main(database_path: str, connection):
+    """
+    Worker process loop: execute queries on a read-only connection
+
+    Args:
+        database_path: Path to the SQLite database file
+        connection: Pipe end for receiving queries and sending results
+    """
+    db = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True, check_same_thread=False)
+    db.execute("PRAGMA query_only = ON")
+    register_functions(db)
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+
+        if message is None:
+            break
+
+        try:
+            cursor = db.execute(message)
+            columns = [description[0] for description in cursor.description or []]
+            rows = cursor.fetchall()
+            buffers = [encode_column([row[i] for row in rows]) for i in range(len(columns))]
+            connection.send(("ok", columns, len(rows), buffers))
+        except Exception as e:
+            connection.send(("error", str(e)))
+
+    db.close()
+
+class SQLWorkerPool:
+    """Pool of worker processes, each with its own read-only SQLite connection"""
+
+    def __init__(self, database_path: str, workers: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Initialize worker pool
+
+        Args:
+            database_path: Path to the SQLite database file
+            workers: Number of worker processes (defaults to CPU count)
+            timeout: Default per-query timeout in seconds
+        """
+        self.database_path = os.path.abspath(database_path)
+        self.size = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> Dict[str, Any]:
+        parent_end, child_end = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.database_path, child_end),
+            daemon=True
+        )
+        process.start()
+        child_end.close()
+        return {"process": process, "connection": parent_end, "cancelled": False}
+
+    def _replace(self, worker: Dict[str, Any]):
+        """Terminate a worker and put a fresh one in its place"""
+        worker["process"].terminate()
+        worker["process"].join(timeout=5)
+        worker["connection"].close()
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def execute(self, query: str, timeout: Optional[float] = None, query_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Execute a query on an idle worker
+
+        Args:
+            query: SQL query string
+            timeout: Seconds before the worker is terminated (defaults to pool timeout)
+            query_id: Identifier usable with cancel()
+
+        Returns:
+            Query results as pandas DataFrame
+        """
+        if self._closed:
+            raise Exception("SQL worker pool is shut down")
+
+        timeout = timeout if timeout is not None else self.timeout
+        query_id = query_id or f"q{next(self._ids)}"
+        worker = self._idle.get()
+
+        with self._lock:
+            self._running[query_id] = worker
+
+        try:
+            worker["connection"].send(query)
+            finished = worker["connection"].poll(timeout)
+            if finished:
+                message = worker["connection"].recv()
+        except (EOFError, OSError):
+            # Worker was terminated by cancel() or crashed
+            with self._lock:
+                self._running.pop(query_id, None)
+            cancelled = worker["cancelled"]
+            self._replace(worker)
+            raise Exception("Query was cancelled" if cancelled else "SQL worker exited unexpectedly")
+
+        # Once unregistered, cancel() can no longer reach the worker
+        with self._lock:
+            self._running.pop(query_id, None)
+            reusable = not worker["cancelled"] and worker["process"].is_alive()
+
+        # Raised outside the try: TimeoutError is an OSError and must not replace the worker twice
+        if not finished:
+            self._replace(worker)
+            raise TimeoutError(f"Query exceeded {timeout}s and its worker was terminated")
+
+        # A cancel that arrived after the result was read still killed the worker
+        if reusable:
+            self._idle.put(worker)
+        else:
+            self._replace(worker)
+
+        if message[0] == "error":
+            raise Exception(message[1])
+
+        _, columns, row_count, buffers = message
+        data = {
+            column: decode_column(kind, payload)
+            for column, (kind, payload) in zip(columns, buffers)
+        }
+        return pd.DataFrame(data, columns=columns, index=pd.RangeIndex(row_count))
+
+    def cancel(self, query_id: str) -> bool:
+        """
+        Cancel a running query by terminating its worker
+
+        Args:
+            query_id: Identifier passed to execute()
+
+        Returns:
+            True if a running query was cancelled
+        """
+        with self._lock:
+            worker = self._running.get(query_id)
+            if worker is None:
+                return False
+            worker["cancelled"] = True
+            worker["process"].terminate()
+        return True
+
+    def running_queries(self) -> List[str]:
+        """Get identifiers of queries currently executing"""
+        with self._lock:
+            return list(self._running)
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker["connection"].send(None)
+            except Exception:
+                pass
+            worker["process"].join(timeout=2)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+            worker["connection"].close()
+
+        with self._lock:
+            running = list(self._running.values())
+        for worker in running:
+            worker["process"].terminate()
@@ -0,0 +1,54 @@
+"""
+Denormalized fact table built from the keyed tables at ingest
+"""
+from backend.database.models import Base
+
+FACT_TABLE = "fact_order_items"
+
+# One row per order item with the columns most questions otherwise join for
+FACT_ORDER_ITEMS_SELECT = """
+    SELECT
+        oi.order_key, oi.order_item_id, o.customer_key, c.customer_unique_key,
+        oi.product_key, oi.seller_key, o.order_status,
+        DATETIME(o.order_purchase_timestamp, 'unixepoch'),
+        o.purchase_year, o.purchase_month, o.purchase_quarter, o.purchase_yyyymm,
+        c.customer_city, c.customer_state, s.seller_city, s.seller_state,
+        p.product_category_name, t.product_category_name_english,
+        oi.price, oi.freight_value, pay.order_payment_total, rev.order_review_score,
+        o.delivery_days, o.is_late, oi.shipping_distance_km, oi.shipping_distance_bucket
+    FROM order_items_data oi
+    JOIN orders_data o ON o.order_key = oi.order_key
+    LEFT JOIN customers_data c ON c.customer_key = o.customer_key
+    LEFT JOIN sellers_data s ON s.seller_key = oi.seller_key
+    LEFT JOIN products_data p ON p.product_key = oi.product_key
+    LEFT JOIN product_category_name_translation t ON t.product_category_name = p.product_category_name
+    LEFT JOIN (
+        SELECT order_key, SUM(payment_value) AS order_payment_total
+        FROM order_payments_data GROUP BY order_key
+    ) pay ON pay.order_key = oi.order_key
+    LEFT JOIN (
+        SELECT order_key, AVG(review_score) AS order_review_score
+        FROM order_reviews_data GROUP BY order_key
+    ) rev ON rev.order_key = oi.order_key
+    ORDER BY oi.order_key, oi.order_item_id
+"""
+
+def build_fact_order_items(db_manager) -> int:
+    """
+    Recreate the fact_order_items table from the loaded tables
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Number of rows in the fact table
+    """
+    table = Base.metadata.tables[FACT_TABLE]
+    table.drop(db_manager.engine, checkfirst=True)
+    table.create(db_manager.engine)
+
+    columns = ", ".join(column.name for column in table.columns)
+    db_manager.execute_raw_query(f"INSERT INTO {FACT_TABLE} ({columns}) {FACT_ORDER_ITEMS_SELECT}")
+
+    result = db_manager.execute_query(f"SELECT COUNT(*) AS count FROM {FACT_TABLE}", rewrite=False)
+    return int(result['count'].iloc[0])
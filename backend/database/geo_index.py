@@ -0,0 +1,471 @@
+"""
+Zip-prefix centroids of the geolocation table and a fixed-degree grid index
+for nearest and within-radius lookups
+"""
+import math
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from backend.database.models import Base
+
+ZIP_CENTROIDS_TABLE = "zip_centroids"
+ZIP_NEIGHBORS_TABLE = "zip_neighbors"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Grid cells are GRID_CELL_DEGREES square (about 28 km north-south)
+GRID_CELL_DEGREES = 0.25
+GRID_COLUMNS = int(360 / GRID_CELL_DEGREES)
+
+# zip_neighbors keeps up to NEIGHBOR_COUNT prefixes within NEIGHBOR_RADIUS_KM
+NEIGHBOR_COUNT = 10
+NEIGHBOR_RADIUS_KM = 50.0
+
+# Radius lookups beyond this scan every centroid instead of the grid cells
+FULL_SCAN_RADIUS_KM = 500.0
+
+# Lower bounds (km) of the shipping distance buckets stored on order items
+SHIPPING_DISTANCE_BUCKETS = [0, 50, 200, 500, 1000, 2000]
+
+# Points outside Brazil (including its islands) are geocoding errors
+BRAZIL_BOUNDS = {"lat": (-34.0, 5.5), "lng": (-74.0, -28.0)}
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Great-circle distance in kilometres, broadcasting over NumPy arrays
+
+    Args:
+        lat1: Latitudes of the first points (degrees)
+        lng1: Longitudes of the first points (degrees)
+        lat2: Latitudes of the second points (degrees)
+        lng2: Longitudes of the second points (degrees)
+
+    Returns:
+        Array of distances (NaN where a coordinate is missing)
+    """
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def grid_position(lat, lng) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid row and column of points"""
+    rows = np.floor((np.asarray(lat, dtype=np.float64) + 90) / GRID_CELL_DEGREES).astype(np.int64)
+    columns = np.floor((np.asarray(lng, dtype=np.float64) + 180) / GRID_CELL_DEGREES).astype(np.int64)
+    return rows, columns
+
+def grid_cell(lat, lng) -> np.ndarray:
+    """Grid cell number of points (row * GRID_COLUMNS + column)"""
+    rows, columns = grid_position(lat, lng)
+    return rows * GRID_COLUMNS + columns
+
+def _cells_within(lat: float, lng: float, radius_km: float) -> List[int]:
+    """Grid cells that can hold points within radius_km of a location"""
+    row, column = (int(value) for value in grid_position(lat, lng))
+    row_span = math.ceil(radius_km / (GRID_CELL_DEGREES * KM_PER_DEGREE))
+    # Longitude degrees shrink towards the poles; size the span at the most poleward row
+    extreme_lat = min(abs(lat) + row_span * GRID_CELL_DEGREES, 89.0)
+    column_span = math.ceil(radius_km / (GRID_CELL_DEGREES * KM_PER_DEGREE * math.cos(math.radians(extreme_lat))))
+    return [
+        (row + dr) * GRID_COLUMNS + (column + dc) % GRID_COLUMNS
+        for dr in range(-row_span, row_span + 1)
+        for dc in range(-column_span, column_span + 1)
+    ]
+
+def _most_frequent(group_codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Most frequent value per group, ties broken by the smallest value
+
+    Args:
+        group_codes: Dense group number of each row (0..n_groups-1)
+        values: Value of each row
+
+    Returns:
+        Array with one value per group
+    """
+    value_labels, value_codes = np.unique(values, return_inverse=True)
+    pairs, counts = np.unique(group_codes * len(value_labels) + value_codes, return_counts=True)
+    pair_groups = pairs // len(value_labels)
+    order = np.lexsort((pairs, -counts, pair_groups))
+    first = np.r_[True, pair_groups[order][1:] != pair_groups[order][:-1]]
+    return value_labels[pairs[order][first] % len(value_labels)]
+
+def compute_zip_centroids(points: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Collapse geolocation points to one centroid per zip code prefix
+
+    Args:
+        points: Geolocation rows
+
+    Returns:
+        Tuple of (centroid DataFrame, number of points dropped as out of bounds)
+    """
+    lat = points["geolocation_lat"].to_numpy(dtype=np.float64)
+    lng = points["geolocation_lng"].to_numpy(dtype=np.float64)
+    keep = (
+        (lat >= BRAZIL_BOUNDS["lat"][0]) & (lat <= BRAZIL_BOUNDS["lat"][1])
+        & (lng >= BRAZIL_BOUNDS["lng"][0]) & (lng <= BRAZIL_BOUNDS["lng"][1])
+        & points["geolocation_zip_code_prefix"].notna().to_numpy()
+    )
+
+    zips = points["geolocation_zip_code_prefix"].to_numpy(dtype=object)[keep].astype(str)
+    lat, lng = lat[keep], lng[keep]
+    prefixes, codes = np.unique(zips, return_inverse=True)
+
+    counts = np.bincount(codes, minlength=len(prefixes))
+    centroid_lat = np.bincount(codes, weights=lat, minlength=len(prefixes)) / counts
+    centroid_lng = np.bincount(codes, weights=lng, minlength=len(prefixes)) / counts
+
+    cities = points["geolocation_city"].fillna("").to_numpy(dtype=object)[keep].astype(str)
+    states = points["geolocation_state"].fillna("").to_numpy(dtype=object)[keep].astype(str)
+
+    centroids = pd.DataFrame({
+        "zip_code_prefix": prefixes,
+        "lat": centroid_lat,
+        "lng": centroid_lng,
+        "city": _most_frequent(codes, cities) if len(prefixes) else np.array([], dtype=str),
+        "state": _most_frequent(codes, states) if len(prefixes) else np.array([], dtype=str),
+        "point_count": counts,
+        "grid_cell": grid_cell(centroid_lat, centroid_lng)
+    })
+    centroids[["city", "state"]] = centroids[["city", "state"]].replace("", None)
+    return centroids, int((~keep).sum())
+
+def compute_zip_neighbors(
+    centroids: pd.DataFrame,
+    count: int = NEIGHBOR_COUNT,
+    radius_km: float = NEIGHBOR_RADIUS_KM
+) -> pd.DataFrame:
+    """
+    Nearest other prefixes of every prefix, one distance matrix per grid cell
+
+    Args:
+        centroids: Output of compute_zip_centroids()
+        count: Neighbors kept per prefix
+        radius_km: Largest neighbor distance
+
+    Returns:
+        DataFrame of (zip_code_prefix, neighbor_rank, neighbor_zip_code_prefix, distance_km)
+    """
+    prefixes = centroids["zip_code_prefix"].to_numpy()
+    lat = centroids["lat"].to_numpy()
+    lng = centroids["lng"].to_numpy()
+    cells = centroids["grid_cell"].to_numpy()
+
+    order = np.argsort(cells, kind="stable")
+    cell_ids, starts = np.unique(cells[order], return_index=True)
+    members = dict(zip(cell_ids.tolist(), np.split(order, starts[1:])))
+
+    # Any point of a cell is within half a cell diagonal of its centre
+    reach_km = radius_km + GRID_CELL_DEGREES * KM_PER_DEGREE
+
+    frames = []
+    for cell, sources in members.items():
+        row, column = divmod(cell, GRID_COLUMNS)
+        center_lat = (row + 0.5) * GRID_CELL_DEGREES - 90
+        center_lng = (column + 0.5) * GRID_CELL_DEGREES - 180
+        candidates = np.concatenate([
+            members[neighbor] for neighbor in _cells_within(center_lat, center_lng, reach_km) if neighbor in members
+        ])
+
+        distances = haversine_km(lat[sources, None], lng[sources, None], lat[None, candidates], lng[None, candidates])
+        distances[sources[:, None] == candidates[None, :]] = np.inf
+        distances[distances > radius_km] = np.inf
+
+        k = min(count, len(candidates))
+        nearest = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        found = np.isfinite(nearest_distances)
+
+        source_index, rank = np.nonzero(found)
+        frames.append(pd.DataFrame({
+            "zip_code_prefix": prefixes[sources[source_index]],
+            "neighbor_rank": rank + 1,
+            "neighbor_zip_code_prefix": prefixes[candidates[nearest[found]]],
+            "distance_km": np.round(nearest_distances[found], 3)
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=["zip_code_prefix", "neighbor_rank", "neighbor_zip_code_prefix", "distance_km"])
+    return pd.concat(frames, ignore_index=True)
+
+def build_geo_index(db_manager) -> Dict[str, int]:
+    """
+    Recreate the zip_centroids and zip_neighbors tables from geolocation
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Dictionary with point, prefix, dropped point and neighbor row counts
+    """
+    points = db_manager.execute_query(
+        "SELECT geolocation_zip_code_prefix, geolocation_lat, geolocation_lng, "
+        "geolocation_city, geolocation_state FROM geolocation",
+        rewrite=False
+    )
+    centroids, dropped = compute_zip_centroids(points)
+    neighbors = compute_zip_neighbors(centroids)
+
+    for name, frame in ((ZIP_CENTROIDS_TABLE, centroids), (ZIP_NEIGHBORS_TABLE, neighbors)):
+        table = Base.metadata.tables[name]
+        table.drop(db_manager.engine, checkfirst=True)
+        table.create(db_manager.engine)
+        frame.to_sql(name, db_manager.engine, if_exists="append", index=False, chunksize=10000)
+
+    return {
+        "points": len(points),
+        "zip_prefixes": len(centroids),
+        "dropped_points": dropped,
+        "neighbor_rows": len(neighbors)
+    }
+
+def _centroid_lookup(prefixes: np.ndarray, values: np.ndarray, lookup: np.ndarray) -> np.ndarray:
+    """Values of the centroids named in lookup (NaN for unknown prefixes), by binary search"""
+    found = np.full(len(lookup), np.nan)
+    if len(prefixes) == 0:
+        return found
+    positions = np.clip(np.searchsorted(prefixes, lookup), 0, len(prefixes) - 1)
+    matched = prefixes[positions] == lookup
+    found[matched] = values[positions[matched]]
+    return found
+
+def shipping_distance_bucket(distance_km: np.ndarray) -> np.ndarray:
+    """
+    Lower bound of the SHIPPING_DISTANCE_BUCKETS bucket of each distance
+
+    Args:
+        distance_km: Distances (NaN for unknown)
+
+    Returns:
+        Float array of bucket lower bounds (NaN for unknown distances)
+    """
+    bounds = np.asarray(SHIPPING_DISTANCE_BUCKETS, dtype=np.float64)
+    buckets = bounds[np.clip(np.searchsorted(bounds, np.nan_to_num(distance_km), side="right") - 1, 0, None)]
+    return np.where(np.isnan(distance_km), np.nan, buckets)
+
+def build_shipping_distances(db_manager) -> Dict[str, int]:
+    """
+    Store the seller-to-customer distance of every order item
+
+    Distances are the haversine distance between the zip_centroids of the
+    seller's and the customer's zip code prefixes, computed for all items at
+    once, and written with their bucket to order_items_data.
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Dictionary with item count and items without a distance
+    """
+    items = db_manager.execute_query(
+        "SELECT oi.order_key, oi.order_item_id, s.seller_zip_code_prefix, c.customer_zip_code_prefix "
+        "FROM order_items_data oi "
+        "JOIN orders_data o ON o.order_key = oi.order_key "
+        "LEFT JOIN customers_data c ON c.customer_key = o.customer_key "
+        "LEFT JOIN sellers_data s ON s.seller_key = oi.seller_key",
+        rewrite=False
+    )
+    centroids = db_manager.execute_query(
+        f"SELECT zip_code_prefix, lat, lng FROM {ZIP_CENTROIDS_TABLE} ORDER BY zip_code_prefix",
+        rewrite=False
+    )
+
+    prefixes = centroids["zip_code_prefix"].to_numpy(dtype=object).astype(str)
+    lat = centroids["lat"].to_numpy(dtype=np.float64)
+    lng = centroids["lng"].to_numpy(dtype=np.float64)
+    sellers = items["seller_zip_code_prefix"].fillna("").to_numpy(dtype=object).astype(str)
+    customers = items["customer_zip_code_prefix"].fillna("").to_numpy(dtype=object).astype(str)
+
+    distances = np.round(haversine_km(
+        _centroid_lookup(prefixes, lat, sellers), _centroid_lookup(prefixes, lng, sellers),
+        _centroid_lookup(prefixes, lat, customers), _centroid_lookup(prefixes, lng, customers)
+    ), 3)
+    buckets = shipping_distance_bucket(distances)
+
+    known = ~np.isnan(distances)
+    rows = zip(
+        np.where(known, distances, None).tolist(),
+        [int(bucket) if ok else None for bucket, ok in zip(buckets.tolist(), known.tolist())],
+        items["order_key"].tolist(),
+        items["order_item_id"].tolist()
+    )
+    with db_manager.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE order_items_data SET shipping_distance_km = ?, shipping_distance_bucket = ? "
+            "WHERE order_key = ? AND order_item_id = ?",
+            list(rows)
+        )
+
+    return {"items": len(items), "missing": int((~known).sum())}
+
+class GeoIndex:
+    """In-memory grid over the zip-prefix centroids for nearest and radius lookups"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize geo index
+
+        Args:
+            db_manager: Database manager to load from (defaults to global manager)
+        """
+        self._db_manager = db_manager
+        self.loaded = False
+        self.centroids = pd.DataFrame()
+        self.positions: Dict[str, int] = {}
+        self.cells: Dict[int, np.ndarray] = {}
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def load(self):
+        """Load the zip_centroids table and group it by grid cell"""
+        try:
+            self.centroids = self.db_manager.execute_query(
+                f"SELECT zip_code_prefix, lat, lng, city, state, point_count, grid_cell "
+                f"FROM {ZIP_CENTROIDS_TABLE} ORDER BY zip_code_prefix",
+                rewrite=False
+            )
+        except Exception:
+            self.centroids = pd.DataFrame(columns=["zip_code_prefix", "lat", "lng", "city", "state", "point_count", "grid_cell"])
+
+        self.positions = {prefix: i for i, prefix in enumerate(self.centroids["zip_code_prefix"])}
+        cells = self.centroids["grid_cell"].to_numpy(dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        cell_ids, starts = np.unique(cells[order], return_index=True)
+        self.cells = dict(zip(cell_ids.tolist(), np.split(order, starts[1:]))) if len(order) else {}
+        self.loaded = True
+
+    def refresh(self):
+        """Force a reload on next lookup"""
+        self.loaded = False
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _closest(
+        self,
+        lat: float,
+        lng: float,
+        candidates: np.ndarray,
+        radius_km: float,
+        limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """Candidates within radius_km of a location, nearest first"""
+        distances = haversine_km(
+            lat, lng, self.centroids["lat"].to_numpy()[candidates], self.centroids["lng"].to_numpy()[candidates]
+        )
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")[:limit]
+        return self._records(candidates[order], distances[order])
+
+    def _records(self, indices: np.ndarray, distances: np.ndarray) -> List[Dict[str, Any]]:
+        rows = self.centroids.iloc[indices].to_dict("records")
+        for row, distance in zip(rows, distances):
+            row["distance_km"] = round(float(distance), 3)
+        return rows
+
+    def locate(self, zip_code_prefix: str) -> Optional[Dict[str, Any]]:
+        """
+        Centroid of a zip code prefix
+
+        Args:
+            zip_code_prefix: Five-digit zip code prefix
+
+        Returns:
+            Centroid dictionary, or None for an unknown prefix
+        """
+        self._ensure_loaded()
+        position = self.positions.get(str(zip_code_prefix).zfill(5))
+        if position is None:
+            return None
+        return self.centroids.iloc[[position]].to_dict("records")[0]
+
+    def within_radius(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Zip prefixes whose centroid lies within a radius, nearest first
+
+        Args:
+            lat: Latitude (degrees)
+            lng: Longitude (degrees)
+            radius_km: Search radius
+            limit: Maximum prefixes to return
+
+        Returns:
+            List of centroid dictionaries with distance_km
+        """
+        self._ensure_loaded()
+        if radius_km >= FULL_SCAN_RADIUS_KM:
+            candidates = np.arange(len(self.centroids))
+        else:
+            groups = [self.cells[cell] for cell in _cells_within(lat, lng, radius_km) if cell in self.cells]
+            candidates = np.concatenate(groups) if groups else np.array([], dtype=np.int64)
+        return self._closest(lat, lng, candidates, radius_km, limit)
+
+    def nearest(self, lat: float, lng: float, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        The k zip prefixes nearest to a location
+
+        The search radius starts at one grid cell and doubles until k prefixes
+        are found inside it, so only nearby cells are scanned; past
+        FULL_SCAN_RADIUS_KM every centroid is ranked.
+
+        Args:
+            lat: Latitude (degrees)
+            lng: Longitude (degrees)
+            k: Number of prefixes
+
+        Returns:
+            List of centroid dictionaries with distance_km, nearest first
+        """
+        self._ensure_loaded()
+        k = min(k, len(self.centroids))
+        radius_km = GRID_CELL_DEGREES * KM_PER_DEGREE
+        while radius_km < FULL_SCAN_RADIUS_KM:
+            matches = self.within_radius(lat, lng, radius_km, limit=k)
+            if len(matches) >= k:
+                return matches
+            radius_km *= 2
+        return self._closest(lat, lng, np.arange(len(self.centroids)), math.inf, k)
+
+    def nearest_to_zip(self, zip_code_prefix: str, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        The k zip prefixes nearest to another prefix (excluding itself)
+
+        Args:
+            zip_code_prefix: Five-digit zip code prefix
+            k: Number of prefixes
+
+        Returns:
+            List of centroid dictionaries with distance_km (empty for an unknown prefix)
+        """
+        origin = self.locate(zip_code_prefix)
+        if origin is None:
+            return []
+        matches = self.nearest(origin["lat"], origin["lng"], k + 1)
+        return [match for match in matches if match["zip_code_prefix"] != origin["zip_code_prefix"]][:k]
+
+    def distance_km(self, from_zip: str, to_zip: str) -> Optional[float]:
+        """
+        Distance between the centroids of two zip prefixes
+
+        Args:
+            from_zip: First zip code prefix
+            to_zip: Second zip code prefix
+
+        Returns:
+            Distance in kilometres, or None if either prefix is unknown
+        """
+        origin, target = self.locate(from_zip), self.locate(to_zip)
+        if origin is None or target is None:
+            return None
+        return round(float(haversine_km(origin["lat"], origin["lng"], target["lat"], target["lng"])), 3)
+
+# Global geo index instance
+geo_index = GeoIndex()
@@ -0,0 +1,285 @@
+"""
+Index advisor driven by the slow-query log
+"""
+import re
+import math
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from backend.database.sql_parsing import mask_literals, table_aliases
+from backend.database.surrogate_keys import physical_table
+
+# SQLite's planner assumes each range bound keeps about a quarter of the rows
+RANGE_SELECTIVITY = 0.25
+
+# Comparison operators that can use an index on the left-hand column
+PREDICATE_PATTERN = re.compile(
+    r"(?<![\w.(])((?:[A-Za-z_]\w*\.)?[A-Za-z_]\w*)\s*"
+    r"(=|==|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bLIKE\b|\bIS\b)\s*"
+    r"((?:[A-Za-z_]\w*\.)?[A-Za-z_]\w*)?",
+    re.IGNORECASE
+)
+
+SQL_WORDS = {"and", "or", "not", "null", "select", "case", "when", "then", "else", "end"}
+
+def plan_accesses(plan: List[Dict[str, Any]]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Extract table accesses from EXPLAIN QUERY PLAN rows
+
+    Args:
+        plan: Query plan rows
+
+    Returns:
+        List of (alias, access kind, automatic index columns) where access kind is
+        'scan' (full table scan), 'automatic' (index built for this query) or 'index'
+    """
+    accesses = []
+    for row in plan:
+        detail = row.get("detail", "")
+        match = re.match(r"(SCAN|SEARCH) (\w+)(?: AS \w+)?(.*)", detail)
+        if not match:
+            continue
+        alias, rest = match.group(2), match.group(3)
+
+        automatic = re.search(r"USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \(([^)]*)\)", rest)
+        if automatic:
+            accesses.append((alias, "automatic", automatic.group(1)))
+        elif match.group(1) == "SCAN" and "INDEX" not in rest:
+            accesses.append((alias, "scan", None))
+        else:
+            accesses.append((alias, "index", None))
+    return accesses
+
+def extract_predicates(sql: str, aliases: Dict[str, str], columns: Dict[str, set]) -> List[Tuple[str, str, str]]:
+    """
+    Find indexable predicate and join columns in a query
+
+    Args:
+        sql: SQL query string
+        aliases: Alias to table mapping
+        columns: Table name to set of column names
+
+    Returns:
+        List of (table, column, kind) with kind 'equality', 'range' or 'join'
+    """
+    masked = mask_literals(sql)
+    tables = set(aliases.values())
+
+    def resolve(reference: str) -> Optional[Tuple[str, str]]:
+        if "." in reference:
+            alias, column = reference.split(".", 1)
+            table = aliases.get(alias)
+            return (table, column) if table and column in columns.get(table, set()) else None
+        owners = [table for table in tables if reference in columns.get(table, set())]
+        return (owners[0], reference) if len(owners) == 1 else None
+
+    predicates = []
+    for match in PREDICATE_PATTERN.finditer(masked):
+        left, operator, right = match.group(1), match.group(2).upper(), match.group(3)
+        if left.lower() in SQL_WORDS:
+            continue
+        resolved = resolve(left)
+        if resolved is None:
+            continue
+        # IS NOT NULL keeps almost every row
+        if operator == "IS" and right and right.lower() == "not":
+            continue
+
+        other = resolve(right) if right and operator in ("=", "==") else None
+        if other is not None and other[0] != resolved[0]:
+            predicates.append((*resolved, "join"))
+            predicates.append((*other, "join"))
+        elif operator in ("=", "==", "IN", "IS"):
+            predicates.append((*resolved, "equality"))
+        elif operator == "LIKE":
+            # Only prefix patterns can use an index
+            tail = sql[match.end():match.end() + 200].lstrip()
+            if re.match(r"'[^%_']", tail):
+                predicates.append((*resolved, "range"))
+        else:
+            predicates.append((*resolved, "range"))
+    return predicates
+
+class IndexAdvisor:
+    """Proposes CREATE INDEX statements for columns behind slow full scans"""
+
+    def __init__(self, db_manager=None, log=None):
+        """
+        Initialize index advisor
+
+        Args:
+            db_manager: Database manager to inspect (defaults to global manager)
+            log: Query log to read (defaults to the manager's log)
+        """
+        self._db_manager = db_manager
+        self._log = log
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    @property
+    def log(self):
+        if self._log is None:
+            from backend.database.query_log import query_log
+            self._log = self.db_manager.query_log or query_log
+        return self._log
+
+    def _query(self, sql: str) -> List[Dict[str, Any]]:
+        return self.db_manager.execute_query(sql, rewrite=False).to_dict('records')
+
+    def table_columns(self) -> Dict[str, set]:
+        """Column names of every table"""
+        return {
+            table: {row["name"] for row in self._query(f"PRAGMA table_info({table})")}
+            for table in self.db_manager.get_all_tables()
+        }
+
+    def indexed_columns(self, table: str) -> set:
+        """Columns that already lead an index on a table"""
+        leading = set()
+        for index in self._query(f"PRAGMA index_list({table})"):
+            columns = self._query(f"PRAGMA index_info(\"{index['name']}\")")
+            if columns:
+                leading.add(columns[0]["name"])
+        return leading
+
+    def collect(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Aggregate slow queries into per-column index candidates
+
+        Returns:
+            Dictionary keyed by (table, column) with usage counters
+        """
+        columns = self.table_columns()
+        candidates = defaultdict(lambda: {
+            "queries": 0, "slow_ms": 0.0, "kinds": defaultdict(int), "fingerprints": set()
+        })
+
+        for entry in self.log.get_slow_queries():
+            sql = entry["sql_text"]
+            # Views over keyed tables resolve to the physical table in plans
+            aliases = {alias: physical_table(table) for alias, table in table_aliases(sql).items()}
+            accesses = plan_accesses(entry["query_plan"])
+            unindexed = {
+                aliases.get(alias, alias): (kind, automatic)
+                for alias, kind, automatic in accesses if kind != "index"
+            }
+            if not unindexed:
+                continue
+
+            # Split the statement's time across the tables it reads without an index
+            share = entry["duration_ms"] / len(unindexed)
+            seen = set()
+
+            for table, column, kind in extract_predicates(sql, aliases, columns):
+                if table not in unindexed or (table, column) in seen:
+                    continue
+                access, automatic = unindexed[table]
+                # A scanned table drives the join loop; only its filters can use an index
+                if access == "scan" and kind == "join":
+                    continue
+                if access == "automatic" and column not in re.findall(r"(\w+)[=<>]", automatic):
+                    continue
+                seen.add((table, column))
+
+                candidate = candidates[(table, column)]
+                candidate["queries"] += 1
+                candidate["slow_ms"] += share
+                candidate["kinds"]["join" if access == "automatic" else kind] += 1
+                candidate["fingerprints"].add(entry["fingerprint"])
+
+        return candidates
+
+    def estimate(self, table: str, column: str, kind: str) -> Dict[str, Any]:
+        """
+        Estimate how much of a full scan an index on a column avoids
+
+        Args:
+            table: Table name
+            column: Column name
+            kind: Dominant predicate kind
+
+        Returns:
+            Dictionary with row count, distinct count, selectivity and saved fraction
+        """
+        stats = self._query(f'SELECT COUNT(*) AS row_count, COUNT(DISTINCT "{column}") AS distinct_count FROM {table}')[0]
+        row_count = int(stats["row_count"] or 0)
+        distinct_count = max(int(stats["distinct_count"] or 0), 1)
+
+        selectivity = RANGE_SELECTIVITY if kind == "range" else 1 / distinct_count
+        if row_count <= 1:
+            return {"row_count": row_count, "distinct_count": distinct_count, "selectivity": selectivity, "saved_fraction": 0.0}
+
+        # Cost of a lookup relative to reading every row
+        index_cost = selectivity * row_count * math.log2(row_count) / row_count
+        return {
+            "row_count": row_count,
+            "distinct_count": distinct_count,
+            "selectivity": round(selectivity, 6),
+            "saved_fraction": round(max(0.0, 1 - index_cost), 4)
+        }
+
+    def recommend(self, top: int = 10, min_queries: int = 1) -> List[Dict[str, Any]]:
+        """
+        Propose indexes ranked by estimated time saved
+
+        Args:
+            top: Maximum number of recommendations
+            min_queries: Minimum number of slow statements using the column
+
+        Returns:
+            List of recommendation dictionaries with a CREATE INDEX statement
+        """
+        recommendations = []
+        indexed = {}
+
+        for (table, column), candidate in self.collect().items():
+            if candidate["queries"] < min_queries:
+                continue
+            if table not in indexed:
+                indexed[table] = self.indexed_columns(table)
+            if column in indexed[table]:
+                continue
+
+            kind = max(candidate["kinds"], key=candidate["kinds"].get)
+            estimate = self.estimate(table, column, kind)
+            if estimate["saved_fraction"] <= 0:
+                continue
+
+            recommendations.append({
+                "table": table,
+                "column": column,
+                "predicate_kind": kind,
+                "queries": candidate["queries"],
+                "fingerprints": sorted(candidate["fingerprints"]),
+                "slow_ms": round(candidate["slow_ms"], 1),
+                "estimated_saving_ms": round(candidate["slow_ms"] * estimate["saved_fraction"], 1),
+                **estimate,
+                "statement": f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ("{column}")'
+            })
+
+        recommendations.sort(key=lambda r: r["estimated_saving_ms"], reverse=True)
+        return recommendations[:top]
+
+    def apply(self, recommendations: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create recommended indexes and refresh planner statistics
+
+        Args:
+            recommendations: Output of recommend()
+
+        Returns:
+            Executed statements
+        """
+        statements = [recommendation["statement"] for recommendation in recommendations]
+        for statement in statements:
+            self.db_manager.execute_raw_query(statement)
+        if statements:
+            self.db_manager.execute_raw_query("ANALYZE")
+        return statements
+
+# Global index advisor instance
+index_advisor = IndexAdvisor()
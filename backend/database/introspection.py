@@ -0,0 +1,229 @@
+"""
+Live schema introspection with cached per-column statistics
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from backend.config import settings
+
+# Low-cardinality columns get their most frequent values listed
+TOP_VALUES_MAX_DISTINCT = 50
+TOP_VALUES_LIMIT = 5
+
+class SchemaIntrospector:
+    """Reads the SQLite catalog and caches column statistics per dataset version"""
+
+    def __init__(self, db_manager=None, cache_dir: Optional[Path] = None):
+        """
+        Initialize schema introspector
+
+        Args:
+            db_manager: Database manager to introspect (defaults to global manager)
+            cache_dir: Directory for cached statistics files
+        """
+        self._db_manager = db_manager
+        self.cache_dir = Path(cache_dir or settings.DATABASE_DIR / "schema_cache")
+        self._stats: Optional[Dict[str, Any]] = None
+        self._stats_version: Optional[str] = None
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def _query(self, sql: str) -> List[Dict[str, Any]]:
+        return self.db_manager.execute_query(sql, rewrite=False).to_dict('records')
+
+    def list_relations(self) -> List[Dict[str, str]]:
+        """
+        List the tables and views users query from the SQLite catalog
+
+        Returns:
+            List of dicts with 'name' and 'type'
+        """
+        user_tables = set(self.db_manager.get_user_tables())
+        relations = self._query(
+            "SELECT name, type FROM sqlite_master "
+            "WHERE type IN ('table', 'view') ORDER BY name"
+        )
+        return [relation for relation in relations if relation['name'] in user_tables]
+
+    def column_stats(self, table: str, column: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+        """
+        Compute statistics for a single column
+
+        Args:
+            table: Table name
+            column: Column info row from PRAGMA table_info
+            row_count: Number of rows in the table
+
+        Returns:
+            Column statistics dictionary
+        """
+        name = column['name']
+        quoted = f'"{name}"'
+
+        summary = self._query(
+            f"SELECT COUNT({quoted}) AS non_null, COUNT(DISTINCT {quoted}) AS distinct_count, "
+            f"MIN({quoted}) AS min_value, MAX({quoted}) AS max_value FROM {table}"
+        )[0]
+
+        storage = self._query(
+            f"SELECT typeof({quoted}) AS storage_type, COUNT(*) AS count FROM {table} "
+            f"WHERE {quoted} IS NOT NULL GROUP BY storage_type ORDER BY count DESC"
+        )
+
+        non_null = int(summary['non_null'] or 0)
+        distinct_count = int(summary['distinct_count'] or 0)
+
+        stats = {
+            "name": name,
+            "declared_type": column.get('type') or "",
+            "storage_types": [row['storage_type'] for row in storage],
+            "primary_key": bool(column.get('pk')),
+            "null_fraction": round(1 - non_null / row_count, 4) if row_count else 0.0,
+            "distinct_count": distinct_count,
+            "unique": row_count > 0 and distinct_count == non_null == row_count,
+            "min": summary['min_value'],
+            "max": summary['max_value'],
+            "top_values": []
+        }
+
+        if 0 < distinct_count <= TOP_VALUES_MAX_DISTINCT:
+            top = self._query(
+                f"SELECT {quoted} AS value, COUNT(*) AS count FROM {table} "
+                f"WHERE {quoted} IS NOT NULL GROUP BY {quoted} "
+                f"ORDER BY count DESC LIMIT {TOP_VALUES_LIMIT}"
+            )
+            stats["top_values"] = [[row['value'], int(row['count'])] for row in top]
+
+        return stats
+
+    def introspect(self) -> Dict[str, Any]:
+        """
+        Introspect every table and view with per-column statistics
+
+        Returns:
+            Dictionary keyed by relation name
+        """
+        relations = {}
+
+        for relation in self.list_relations():
+            name = relation['name']
+            row_count = int(self._query(f"SELECT COUNT(*) AS count FROM {name}")[0]['count'])
+            columns = self._query(f"PRAGMA table_info({name})")
+
+            relations[name] = {
+                "type": relation['type'],
+                "row_count": row_count,
+                "columns": [self.column_stats(name, column, row_count) for column in columns]
+            }
+
+        return relations
+
+    def _cache_path(self, version: str) -> Path:
+        return self.cache_dir / f"schema_stats_{version}.json"
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Introspect the database and write the statistics cache for the current version
+
+        Returns:
+            Schema statistics
+        """
+        version = self.db_manager.get_dataset_metadata().get("dataset_version", "unversioned")
+        stats = {"dataset_version": version, "relations": self.introspect()}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._cache_path(version), 'w') as f:
+            json.dump(stats, f, default=str)
+
+        # Only the current version is ever read back
+        for stale in self.cache_dir.glob("schema_stats_*.json"):
+            if stale != self._cache_path(version):
+                stale.unlink()
+
+        self._stats, self._stats_version = stats, version
+        return stats
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get schema statistics from memory or the on-disk cache
+
+        Statistics are only computed here when no ingest-time cache exists for
+        the current dataset version.
+
+        Returns:
+            Schema statistics, or None if the database cannot be introspected
+        """
+        version = self.db_manager.get_dataset_metadata().get("dataset_version")
+        if not version:
+            return None
+
+        if self._stats is not None and self._stats_version == version:
+            return self._stats
+
+        cache_path = self._cache_path(version)
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'r') as f:
+                    self._stats, self._stats_version = json.load(f), version
+                return self._stats
+            except Exception as e:
+                print(f"Schema cache read error: {str(e)}")
+
+        try:
+            return self.build()
+        except Exception as e:
+            print(f"Schema introspection error: {str(e)}")
+            return None
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+def format_column_stats(column: Dict[str, Any], profile_text: str = "") -> str:
+    """
+    Format column statistics as a compact prompt line
+
+    Args:
+        column: Column statistics from SchemaIntrospector
+        profile_text: Distribution details from the data profile
+
+    Returns:
+        Formatted line
+    """
+    column_type = column['declared_type'] or "/".join(column['storage_types']) or "UNKNOWN"
+    stored = [t.upper() for t in column['storage_types']]
+    if stored and stored != [column_type.upper()]:
+        column_type += f" (stored as {'/'.join(stored)})"
+
+    details = []
+    if column['primary_key']:
+        details.append("primary key")
+    elif column['unique']:
+        details.append("unique")
+
+    if column['null_fraction'] > 0:
+        details.append(f"{column['null_fraction']:.1%} null")
+
+    if column['top_values']:
+        values = ", ".join(_format_value(value) for value, _ in column['top_values'])
+        details.append(f"{column['distinct_count']} distinct, top: {values}")
+    elif column['min'] is not None:
+        if not column['unique']:
+            details.append(f"{column['distinct_count']} distinct")
+        if 'text' not in column['storage_types'] or column['name'].endswith(('_date', '_timestamp', '_at')):
+            details.append(f"range {_format_value(column['min'])} .. {_format_value(column['max'])}")
+
+    if profile_text:
+        details.append(profile_text)
+
+    suffix = f" [{'; '.join(details)}]" if details else ""
+    return f"  - {column['name']} {column_type}{suffix}"
+
+# Global schema introspector instance
+schema_introspector = SchemaIntrospector()
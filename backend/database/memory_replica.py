@@ -0,0 +1,96 @@
+"""
+In-memory replica of the on-disk SQLite database for serving reads
+"""
+import time
+import sqlite3
+import itertools
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool, QueuePool
+from backend.database.metadata import METADATA_TABLE
+from backend.database.sql_functions import register_on_engine
+
+# Distinct names so a refreshed copy can load while the old one still serves
+_replica_ids = itertools.count(1)
+
+def read_dataset_version(connection: sqlite3.Connection) -> Optional[str]:
+    """
+    Read the dataset version stamp from a database
+
+    Args:
+        connection: SQLite connection
+
+    Returns:
+        Dataset version, or None before ingestion
+    """
+    try:
+        row = connection.execute(
+            f"SELECT value FROM {METADATA_TABLE} WHERE key = 'dataset_version'"
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+class MemoryReplica:
+    """Shared-cache in-memory copy of a SQLite database, loaded with the backup API"""
+
+    def __init__(self, database_path: str):
+        """
+        Load the database into memory
+
+        Args:
+            database_path: Path to the on-disk SQLite database
+        """
+        self.database_path = database_path
+        self.uri = f"file:ecommerce_replica_{next(_replica_ids)}?mode=memory&cache=shared"
+
+        started = time.perf_counter()
+        # The anchor connection keeps the shared in-memory database alive
+        self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            source.backup(self._anchor)
+        finally:
+            source.close()
+        self.load_seconds = time.perf_counter() - started
+
+        page_count = self._anchor.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._anchor.execute("PRAGMA page_size").fetchone()[0]
+        self.size_bytes = page_count * page_size
+        self.dataset_version = read_dataset_version(self._anchor)
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+
+        self.engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(self.uri, uri=True, check_same_thread=False),
+            poolclass=StaticPool
+        )
+        # Connections with the SQL functions, one per concurrent query
+        self.function_engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(self.uri, uri=True, check_same_thread=False),
+            poolclass=QueuePool
+        )
+        register_on_engine(self.function_engine)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get load statistics
+
+        Returns:
+            Dictionary with load time, size and dataset version
+        """
+        return {
+            "dataset_version": self.dataset_version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+            "size_bytes": self.size_bytes,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 1)
+        }
+
+    def close(self):
+        """Release the in-memory database"""
+        self.engine.dispose()
+        self.function_engine.dispose()
+        self._anchor.close()
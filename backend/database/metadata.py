@@ -0,0 +1,194 @@
+"""
+Dataset reference constants and SQL literal rewriting
+"""
+import re
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import text
+
+# Table holding key/value dataset constants computed at ingest
+METADATA_TABLE = "dataset_metadata"
+
+# Matches "(SELECT MAX(order_purchase_timestamp) FROM orders)" and the MIN variant,
+# tolerating column qualifiers, table aliases and arbitrary whitespace/casing
+REFERENCE_SUBQUERY_PATTERN = re.compile(
+    r"\(\s*SELECT\s+(?P<func>MAX|MIN)\s*\(\s*(?:\w+\.)?order_purchase_timestamp\s*\)"
+    r"\s+FROM\s+orders(?:\s+(?:AS\s+)?(?!WHERE\b)\w+)?\s*\)",
+    re.IGNORECASE
+)
+
+def compute_reference_constants(db_manager) -> Dict[str, str]:
+    """
+    Compute dataset reference constants from the orders table
+
+    Args:
+        db_manager: Database manager to query
+
+    Returns:
+        Dictionary of constant name to string value
+    """
+    result = db_manager.execute_query(
+        "SELECT MAX(order_purchase_timestamp) AS max_ts, "
+        "MIN(order_purchase_timestamp) AS min_ts FROM orders",
+        rewrite=False
+    )
+
+    max_ts = result['max_ts'].iloc[0]
+    min_ts = result['min_ts'].iloc[0]
+
+    if max_ts is None or min_ts is None:
+        return {}
+
+    max_ts = str(max_ts)
+    min_ts = str(min_ts)
+    reference = datetime.fromisoformat(max_ts)
+
+    # Last complete month is the one before the month of the latest purchase
+    month_end = reference.replace(day=1)
+    if month_end.month == 1:
+        month_start = month_end.replace(year=month_end.year - 1, month=12)
+    else:
+        month_start = month_end.replace(month=month_end.month - 1)
+
+    # Last complete quarter is the one before the quarter of the latest purchase
+    current_quarter = (reference.month - 1) // 3 + 1
+    quarter_end = reference.replace(month=(current_quarter - 1) * 3 + 1, day=1)
+    if current_quarter == 1:
+        quarter, quarter_year = 4, reference.year - 1
+    else:
+        quarter, quarter_year = current_quarter - 1, reference.year
+    quarter_start = quarter_end.replace(year=quarter_year, month=(quarter - 1) * 3 + 1)
+
+    return {
+        "max_purchase_timestamp": max_ts,
+        "min_purchase_timestamp": min_ts,
+        "reference_date": reference.strftime("%Y-%m-%d"),
+        "last_complete_month": month_start.strftime("%Y-%m"),
+        "last_complete_yyyymm": month_start.strftime("%Y%m"),
+        "last_complete_month_start": month_start.strftime("%Y-%m-%d"),
+        "last_complete_month_end": month_end.strftime("%Y-%m-%d"),
+        "last_complete_quarter": f"{quarter_year}-Q{quarter}",
+        "last_complete_quarter_year": str(quarter_year),
+        "last_complete_quarter_number": str(quarter),
+        "last_complete_quarter_start": quarter_start.strftime("%Y-%m-%d"),
+        "last_complete_quarter_end": quarter_end.strftime("%Y-%m-%d"),
+        "computed_at": datetime.now().isoformat(timespec="seconds")
+    }
+
+def compute_dataset_version(db_manager) -> str:
+    """
+    Compute a version identifier for the currently loaded dataset
+
+    The version combines the ingest time with a hash of table row counts so
+    caches derived from the data can be keyed on it.
+
+    Args:
+        db_manager: Database manager to query
+
+    Returns:
+        Dataset version string
+    """
+    digest = hashlib.sha1()
+    for table in sorted(db_manager.get_user_tables()):
+        count = db_manager.execute_query(f"SELECT COUNT(*) AS count FROM {table}", rewrite=False)
+        digest.update(f"{table}:{int(count['count'].iloc[0])};".encode())
+
+    return f"{datetime.now():%Y%m%d%H%M%S}-{digest.hexdigest()[:8]}"
+
+def write_dataset_metadata(db_manager, values: Dict[str, str]):
+    """
+    Store dataset constants, replacing any existing values
+
+    Args:
+        db_manager: Database manager to write through
+        values: Dictionary of constant name to value
+    """
+    with db_manager.engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {METADATA_TABLE} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        ))
+        for key, value in values.items():
+            connection.execute(
+                text(f"INSERT OR REPLACE INTO {METADATA_TABLE} (key, value) VALUES (:key, :value)"),
+                {"key": key, "value": str(value)}
+            )
+
+def build_dataset_metadata(db_manager) -> Dict[str, str]:
+    """
+    Compute and store dataset reference constants
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        The stored constants
+    """
+    values = compute_reference_constants(db_manager)
+    if values:
+        values["dataset_version"] = compute_dataset_version(db_manager)
+        write_dataset_metadata(db_manager, values)
+    db_manager.refresh_dataset_metadata()
+    return values
+
+def read_dataset_metadata(db_manager) -> Dict[str, str]:
+    """
+    Read dataset constants from the metadata table
+
+    Args:
+        db_manager: Database manager to query
+
+    Returns:
+        Dictionary of constants (empty if the table does not exist)
+    """
+    try:
+        result = db_manager.execute_query(
+            f"SELECT key, value FROM {METADATA_TABLE}",
+            rewrite=False
+        )
+    except Exception:
+        return {}
+
+    return dict(zip(result['key'], result['value']))
+
+def rewrite_reference_subqueries(query: str, metadata: Optional[Dict[str, str]]) -> str:
+    """
+    Replace MAX/MIN purchase timestamp subqueries with precomputed literals
+
+    Args:
+        query: SQL query string
+        metadata: Dataset constants
+
+    Returns:
+        Rewritten SQL query (unchanged if constants are unavailable)
+    """
+    if not metadata or "max_purchase_timestamp" not in metadata:
+        return query
+
+    def replace(match: re.Match) -> str:
+        key = "max_purchase_timestamp" if match.group("func").upper() == "MAX" else "min_purchase_timestamp"
+        return f"'{metadata[key]}'"
+
+    return REFERENCE_SUBQUERY_PATTERN.sub(replace, query)
+
+def format_reference_constants(metadata: Optional[Dict[str, str]]) -> str:
+    """
+    Format dataset constants for inclusion in LLM prompts
+
+    Args:
+        metadata: Dataset constants
+
+    Returns:
+        Formatted text block (empty if constants are unavailable)
+    """
+    if not metadata or "max_purchase_timestamp" not in metadata:
+        return ""
+
+    return f"""DATASET REFERENCE DATES (use these literals, never a MAX()/MIN() subquery):
+   - Latest purchase timestamp: '{metadata['max_purchase_timestamp']}' (reference date {metadata['reference_date']})
+   - Earliest purchase timestamp: '{metadata['min_purchase_timestamp']}'
+   - Last complete month: {metadata['last_complete_month']} (purchase_yyyymm = {metadata['last_complete_yyyymm']})
+   - Last complete quarter: {metadata['last_complete_quarter']} (purchase_year = {metadata['last_complete_quarter_year']} AND purchase_quarter = {metadata['last_complete_quarter_number']})
+   - Past N months: order_purchase_timestamp >= DATE('{metadata['max_purchase_timestamp']}', '-N months')
+"""
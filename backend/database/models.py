@@ -1,25 +1,94 @@
 """
 SQLAlchemy models for the e-commerce database
+
+The 32-character hex identifiers of the source data are replaced in the
+physical tables (named <table>_data) by dense integer surrogate keys. Each
+identifier has a mapping table (<entity>_ids) from key to original ID, and
+views with the original table names look them up again (see
+backend/database/surrogate_keys.py).
+
+Tables whose primary key is composite or a natural string are created
+WITHOUT ROWID so the primary key is the table's own B-tree; single integer
+keys use the rowid itself.
+
+Timestamps are stored as integer seconds since the Unix epoch (columns
+marked with info={"epoch": True}); the views present them as
+'YYYY-MM-DD HH:MM:SS' text.
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+class OrderId(Base):
+    """Order ID mapping table model"""
+    __tablename__ = "order_ids"
+    
+    order_key = Column(Integer, primary_key=True)
+    order_id = Column(String, nullable=False, unique=True)
+
+class CustomerId(Base):
+    """Customer ID mapping table model"""
+    __tablename__ = "customer_ids"
+    
+    customer_key = Column(Integer, primary_key=True)
+    customer_id = Column(String, nullable=False, unique=True)
+
+class CustomerUniqueId(Base):
+    """Customer unique ID mapping table model"""
+    __tablename__ = "customer_unique_ids"
+    
+    customer_unique_key = Column(Integer, primary_key=True)
+    customer_unique_id = Column(String, nullable=False, unique=True)
+
+class ProductId(Base):
+    """Product ID mapping table model"""
+    __tablename__ = "product_ids"
+    
+    product_key = Column(Integer, primary_key=True)
+    product_id = Column(String, nullable=False, unique=True)
+
+class SellerId(Base):
+    """Seller ID mapping table model"""
+    __tablename__ = "seller_ids"
+    
+    seller_key = Column(Integer, primary_key=True)
+    seller_id = Column(String, nullable=False, unique=True)
+
+class ReviewId(Base):
+    """Review ID mapping table model"""
+    __tablename__ = "review_ids"
+    
+    review_key = Column(Integer, primary_key=True)
+    review_id = Column(String, nullable=False, unique=True)
+
 class Order(Base):
     """Orders table model"""
-    __tablename__ = "orders"
+    __tablename__ = "orders_data"
     
-    order_id = Column(String, primary_key=True)
-    customer_id = Column(String, ForeignKey("customers.customer_id"))
+    order_key = Column(Integer, ForeignKey("order_ids.order_key"), primary_key=True)
+    customer_key = Column(Integer, ForeignKey("customers_data.customer_key"), index=True)
     order_status = Column(String)
-    order_purchase_timestamp = Column(DateTime)
-    order_approved_at = Column(DateTime)
-    order_delivered_carrier_date = Column(DateTime)
-    order_delivered_customer_date = Column(DateTime)
-    order_estimated_delivery_date = Column(DateTime)
+    order_purchase_timestamp = Column(Integer, info={"epoch": True})
+    order_approved_at = Column(Integer, info={"epoch": True})
+    order_delivered_carrier_date = Column(Integer, info={"epoch": True})
+    order_delivered_customer_date = Column(Integer, info={"epoch": True})
+    order_estimated_delivery_date = Column(Integer, info={"epoch": True})
+    
+    # Calendar parts of order_purchase_timestamp, for indexed grouping and filtering
+    purchase_year = Column(Integer, index=True)
+    purchase_month = Column(Integer, index=True)
+    purchase_quarter = Column(Integer, index=True)
+    purchase_yyyymm = Column(Integer, index=True)
+    
+    # Delivery metrics computed at ingest; NULL while the end timestamp is missing
+    delivery_days = Column(Float, index=True)
+    approval_hours = Column(Float, index=True)
+    carrier_handoff_days = Column(Float, index=True)
+    days_vs_estimate = Column(Float, index=True)
+    is_late = Column(Integer, index=True)
     
     # Relationships
     customer = relationship("Customer", back_populates="orders")
@@ -29,15 +98,19 @@ class Order(Base):
 
 class OrderItem(Base):
     """Order items table model"""
-    __tablename__ = "order_items"
+    __tablename__ = "order_items_data"
+    __table_args__ = {"sqlite_with_rowid": False}
     
-    order_id = Column(String, ForeignKey("orders.order_id"), primary_key=True)
+    order_key = Column(Integer, ForeignKey("orders_data.order_key"), primary_key=True)
     order_item_id = Column(Integer, primary_key=True)
-    product_id = Column(String, ForeignKey("products.product_id"))
-    seller_id = Column(String, ForeignKey("sellers.seller_id"))
-    shipping_limit_date = Column(DateTime)
+    product_key = Column(Integer, ForeignKey("products_data.product_key"), index=True)
+    seller_key = Column(Integer, ForeignKey("sellers_data.seller_key"), index=True)
+    shipping_limit_date = Column(Integer, info={"epoch": True})
     price = Column(Float)
     freight_value = Column(Float)
+    # Seller-to-customer zip centroid distance, filled in after geolocation loads
+    shipping_distance_km = Column(Float, index=True)
+    shipping_distance_bucket = Column(Integer, index=True)
     
     # Relationships
     order = relationship("Order", back_populates="items")
@@ -46,9 +119,10 @@ class OrderItem(Base):
 
 class OrderPayment(Base):
     """Order payments table model"""
-    __tablename__ = "order_payments"
+    __tablename__ = "order_payments_data"
+    __table_args__ = {"sqlite_with_rowid": False}
     
-    order_id = Column(String, ForeignKey("orders.order_id"), primary_key=True)
+    order_key = Column(Integer, ForeignKey("orders_data.order_key"), primary_key=True)
     payment_sequential = Column(Integer, primary_key=True)
     payment_type = Column(String)
     payment_installments = Column(Integer)
@@ -59,25 +133,27 @@ class OrderPayment(Base):
 
 class OrderReview(Base):
     """Order reviews table model"""
-    __tablename__ = "order_reviews"
+    __tablename__ = "order_reviews_data"
+    __table_args__ = {"sqlite_with_rowid": False}
     
-    review_id = Column(String, primary_key=True)
-    order_id = Column(String, ForeignKey("orders.order_id"))
+    # review_id repeats across orders in the source data
+    review_key = Column(Integer, ForeignKey("review_ids.review_key"), primary_key=True)
+    order_key = Column(Integer, ForeignKey("orders_data.order_key"), primary_key=True, index=True)
     review_score = Column(Integer)
     review_comment_title = Column(Text)
     review_comment_message = Column(Text)
-    review_creation_date = Column(DateTime)
-    review_answer_timestamp = Column(DateTime)
+    review_creation_date = Column(Integer, info={"epoch": True})
+    review_answer_timestamp = Column(Integer, info={"epoch": True})
     
     # Relationships
     order = relationship("Order", back_populates="reviews")
 
 class Customer(Base):
     """Customers table model"""
-    __tablename__ = "customers"
+    __tablename__ = "customers_data"
     
-    customer_id = Column(String, primary_key=True)
-    customer_unique_id = Column(String)
+    customer_key = Column(Integer, ForeignKey("customer_ids.customer_key"), primary_key=True)
+    customer_unique_key = Column(Integer, ForeignKey("customer_unique_ids.customer_unique_key"), index=True)
     customer_zip_code_prefix = Column(String)
     customer_city = Column(String)
     customer_state = Column(String)
@@ -87,9 +163,9 @@ class Customer(Base):
 
 class Seller(Base):
     """Sellers table model"""
-    __tablename__ = "sellers"
+    __tablename__ = "sellers_data"
     
-    seller_id = Column(String, primary_key=True)
+    seller_key = Column(Integer, ForeignKey("seller_ids.seller_key"), primary_key=True)
     seller_zip_code_prefix = Column(String)
     seller_city = Column(String)
     seller_state = Column(String)
@@ -99,10 +175,10 @@ class Seller(Base):
 
 class Product(Base):
     """Products table model"""
-    __tablename__ = "products"
+    __tablename__ = "products_data"
     
-    product_id = Column(String, primary_key=True)
-    product_category_name = Column(String, ForeignKey("product_category_name_translation.product_category_name"))
+    product_key = Column(Integer, ForeignKey("product_ids.product_key"), primary_key=True)
+    product_category_name = Column(String, ForeignKey("product_category_name_translation.product_category_name"), index=True)
     product_name_length = Column(Integer)
     product_description_length = Column(Integer)
     product_photos_qty = Column(Integer)
@@ -118,6 +194,7 @@ class Product(Base):
 class ProductCategoryTranslation(Base):
     """Product category translations table model"""
     __tablename__ = "product_category_name_translation"
+    __table_args__ = {"sqlite_with_rowid": False}
     
     product_category_name = Column(String, primary_key=True)
     product_category_name_english = Column(String)
@@ -125,13 +202,72 @@ class ProductCategoryTranslation(Base):
     # Relationships
     products = relationship("Product", back_populates="category_translation")
 
+class FactOrderItem(Base):
+    """Denormalized order items table model (one row per order item, built at ingest)"""
+    __tablename__ = "fact_order_items"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    order_key = Column(Integer, primary_key=True)
+    order_item_id = Column(Integer, primary_key=True)
+    customer_key = Column(Integer, index=True)
+    customer_unique_key = Column(Integer)
+    product_key = Column(Integer, index=True)
+    seller_key = Column(Integer, index=True)
+    order_status = Column(String, index=True)
+    # Kept as text so relative date filters work without a view
+    order_purchase_timestamp = Column(String)
+    purchase_year = Column(Integer, index=True)
+    purchase_month = Column(Integer)
+    purchase_quarter = Column(Integer)
+    purchase_yyyymm = Column(Integer, index=True)
+    customer_city = Column(String)
+    customer_state = Column(String, index=True)
+    seller_city = Column(String)
+    seller_state = Column(String, index=True)
+    product_category_name = Column(String, index=True)
+    product_category_name_english = Column(String, index=True)
+    price = Column(Float)
+    freight_value = Column(Float)
+    # Order-level values repeated on each item of the order
+    order_payment_total = Column(Float)
+    order_review_score = Column(Float)
+    delivery_days = Column(Float)
+    is_late = Column(Integer)
+    shipping_distance_km = Column(Float)
+    shipping_distance_bucket = Column(Integer, index=True)
+
 class Geolocation(Base):
     """Geolocation table model"""
     __tablename__ = "geolocation"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    geolocation_zip_code_prefix = Column(String)
+    geolocation_zip_code_prefix = Column(String, index=True)
     geolocation_lat = Column(Float)
     geolocation_lng = Column(Float)
     geolocation_city = Column(String)
     geolocation_state = Column(String)
+
+class ZipCentroid(Base):
+    """Geolocation collapsed to one centroid per zip code prefix (built at ingest)"""
+    __tablename__ = "zip_centroids"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    zip_code_prefix = Column(String, primary_key=True)
+    lat = Column(Float)
+    lng = Column(Float)
+    # Most frequent city and state among the prefix's points
+    city = Column(String)
+    state = Column(String, index=True)
+    point_count = Column(Integer)
+    # Cell of the fixed-degree spatial grid (see backend/database/geo_index.py)
+    grid_cell = Column(Integer, index=True)
+
+class ZipNeighbor(Base):
+    """Nearest zip code prefixes of each prefix within a radius (built at ingest)"""
+    __tablename__ = "zip_neighbors"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    zip_code_prefix = Column(String, primary_key=True)
+    neighbor_rank = Column(Integer, primary_key=True)
+    neighbor_zip_code_prefix = Column(String, index=True)
+    distance_km = Column(Float)
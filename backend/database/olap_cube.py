@@ -0,0 +1,680 @@
+"""
+In-memory OLAP cube over the order items for common group-by questions
+"""
+import re
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from backend.database.fact_tables import FACT_TABLE
+from backend.database.sql_parsing import mask_literals, find_top_level_keyword, split_top_level, select_items
+
+# Cube axes, in array order
+DIMENSIONS = ["customer_state", "product_category_name", "purchase_yyyymm", "payment_type", "review_score"]
+
+# An order has one value on every axis except the category, so distinct order
+# counts are kept once without the category axis and once per category
+ORDER_DIMENSIONS = [dimension for dimension in DIMENSIONS if dimension != "product_category_name"]
+
+# Item-level sums stored per cell
+ITEM_MEASURES = ["revenue", "freight", "item_count"]
+
+# Every measure the cube answers
+MEASURES = ITEM_MEASURES + ["order_count", "avg_price", "avg_freight"]
+
+# Columns computed from the labels of a cube axis
+DERIVED_DIMENSIONS = {
+    "product_category_name_english": "product_category_name",
+    "category": "product_category_name",
+    "purchase_year": "purchase_yyyymm",
+    "purchase_quarter": "purchase_yyyymm",
+    "purchase_month": "purchase_yyyymm"
+}
+
+# Normalized SQL expressions over fact_order_items the cube can answer
+SQL_MEASURES = {
+    "sum(price)": "revenue",
+    "sum(freight_value)": "freight",
+    "count(*)": "item_count",
+    "count(1)": "item_count",
+    "count(distinct order_key)": "order_count",
+    "avg(price)": "avg_price",
+    "avg(freight_value)": "avg_freight"
+}
+SQL_DIMENSIONS = {
+    "customer_state": "customer_state",
+    "product_category_name": "product_category_name",
+    "product_category_name_english": "product_category_name_english",
+    "coalesce(product_category_name_english,product_category_name)": "category",
+    "purchase_yyyymm": "purchase_yyyymm",
+    "purchase_year": "purchase_year",
+    "purchase_quarter": "purchase_quarter",
+    "purchase_month": "purchase_month"
+}
+
+NUMERIC_DIMENSIONS = {"purchase_yyyymm", "purchase_year", "purchase_quarter", "purchase_month", "review_score"}
+
+# One WHERE condition: column op literal, column IN (...), column BETWEEN a AND b
+LITERAL = r"'(?:[^']|'')*'|-?\d+(?:\.\d+)?"
+CONDITION_PATTERN = re.compile(
+    rf"\s*(?:(?P<alias>\w+)\.)?(?P<column>\w+)\s*(?:"
+    rf"(?P<op>==|=|!=|<>|<=|>=|<|>)\s*(?P<value>{LITERAL})"
+    rf"|IN\s*\((?P<values>\s*(?:{LITERAL})(?:\s*,\s*(?:{LITERAL}))*\s*)\)"
+    rf"|BETWEEN\s+(?P<low>{LITERAL})\s+AND\s+(?P<high>{LITERAL}))\s*",
+    re.IGNORECASE
+)
+
+CLAUSE_KEYWORDS = ["WHERE", "GROUP", "HAVING", "ORDER", "LIMIT"]
+
+# Parsed queries kept before the plan cache is cleared
+PLAN_CACHE_SIZE = 256
+
+def _literal_value(text: str) -> Any:
+    if text.startswith("'"):
+        return text[1:-1].replace("''", "'")
+    return float(text) if "." in text else int(text)
+
+def _normalize_expression(expression: str, aliases: set) -> str:
+    """Lowercase an expression and drop table qualifiers and optional whitespace"""
+    normalized = expression.strip()
+    for alias in aliases:
+        normalized = re.sub(rf"\b{re.escape(alias)}\.", "", normalized, flags=re.IGNORECASE)
+    normalized = re.sub(r"\s+", " ", normalized.lower())
+    return re.sub(r"\s*([(),])\s*", r"\1", normalized)
+
+class OLAPCube:
+    """Dense NumPy arrays of revenue, freight and item/order counts by the common dimensions"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize OLAP cube
+
+        Args:
+            db_manager: Database manager to build from (defaults to global manager)
+        """
+        self._db_manager = db_manager
+        self._lock = threading.Lock()
+        self._cube: Optional[Dict[str, Any]] = None
+        self._failed_version: Optional[str] = None
+        # Parsed query plans by SQL text (None when the cube cannot answer)
+        self._plans: Dict[str, Optional[tuple]] = {}
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def _dataset_version(self) -> str:
+        return self.db_manager.get_dataset_metadata().get("dataset_version", "unversioned")
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Load the order items and aggregate them into the cube arrays
+
+        Returns:
+            Cube statistics
+        """
+        started = time.perf_counter()
+        version = self._dataset_version()
+
+        rows = self.db_manager.execute_query(
+            f"SELECT f.customer_state, f.product_category_name, f.product_category_name_english, "
+            f"f.purchase_yyyymm, pay.payment_type, CAST(ROUND(f.order_review_score) AS INTEGER) AS review_score, "
+            f"f.price, f.freight_value, f.order_key "
+            f"FROM {FACT_TABLE} f "
+            f"LEFT JOIN (SELECT order_key, payment_type, ROW_NUMBER() OVER ("
+            f"PARTITION BY order_key ORDER BY payment_value DESC, payment_sequential) AS payment_rank "
+            f"FROM order_payments) pay ON pay.order_key = f.order_key AND pay.payment_rank = 1",
+            rewrite=False
+        )
+
+        labels, codes = {}, {}
+        for dimension in DIMENSIONS:
+            dimension_codes, uniques = pd.factorize(rows[dimension], sort=True, use_na_sentinel=False)
+            values = [None if pd.isna(value) else value for value in uniques]
+            if dimension in NUMERIC_DIMENSIONS:
+                values = [None if value is None else int(value) for value in values]
+            labels[dimension] = np.array(values, dtype=object)
+            codes[dimension] = dimension_codes
+
+        shape = tuple(len(labels[dimension]) for dimension in DIMENSIONS)
+        cells = int(np.prod(shape))
+        flat = np.ravel_multi_index([codes[dimension] for dimension in DIMENSIONS], shape)
+
+        items = np.stack([
+            np.bincount(flat, weights=rows["price"].fillna(0).to_numpy(), minlength=cells),
+            np.bincount(flat, weights=rows["freight_value"].fillna(0).to_numpy(), minlength=cells),
+            np.bincount(flat, minlength=cells).astype(np.float64)
+        ], axis=-1).reshape(shape + (len(ITEM_MEASURES),))
+
+        # Distinct orders: one (cell, order) pair per order in each cell
+        order_keys = rows["order_key"].to_numpy()
+        pairs = pd.DataFrame({"cell": flat, "order_key": order_keys}).drop_duplicates()
+        category_orders = np.bincount(pairs["cell"].to_numpy(), minlength=cells).astype(np.int32).reshape(shape)
+
+        order_shape = tuple(len(labels[dimension]) for dimension in ORDER_DIMENSIONS)
+        order_flat = np.ravel_multi_index([codes[dimension] for dimension in ORDER_DIMENSIONS], order_shape)
+        first_rows = ~pd.Series(order_keys).duplicated().to_numpy()
+        orders = np.bincount(
+            order_flat[first_rows], minlength=int(np.prod(order_shape))
+        ).astype(np.int32).reshape(order_shape)
+
+        english = (
+            rows.dropna(subset=["product_category_name", "product_category_name_english"])
+            .drop_duplicates("product_category_name")
+            .set_index("product_category_name")["product_category_name_english"]
+            .to_dict()
+        )
+
+        cube = {
+            "dataset_version": version,
+            "labels": labels,
+            "english": english,
+            "items": items,
+            "category_orders": category_orders,
+            "orders": orders,
+            "projections": {},
+            "rows": len(rows),
+            "shape": dict(zip(DIMENSIONS, shape)),
+            "size_bytes": items.nbytes + category_orders.nbytes + orders.nbytes,
+            "build_seconds": time.perf_counter() - started
+        }
+        self._cube = cube
+        return self.stats()
+
+    def _current(self) -> Optional[Dict[str, Any]]:
+        """Cube for the loaded dataset, built on first use"""
+        version = self._dataset_version()
+        cube = self._cube
+        if cube is not None and cube["dataset_version"] == version:
+            return cube
+        if self._failed_version == version:
+            return None
+
+        with self._lock:
+            if self._cube is None or self._cube["dataset_version"] != version:
+                try:
+                    self.build()
+                except Exception as e:
+                    print(f"OLAP cube build failed: {str(e)}")
+                    self._failed_version = version
+                    return None
+            return self._cube
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get cube statistics
+
+        Returns:
+            Dictionary with dimensions, size and build time, or None before the first build
+        """
+        cube = self._cube
+        if cube is None:
+            return None
+        return {
+            "dataset_version": cube["dataset_version"],
+            "rows": cube["rows"],
+            "dimensions": cube["shape"],
+            "cells": int(np.prod(list(cube["shape"].values()))),
+            "size_mb": round(cube["size_bytes"] / (1024 * 1024), 1),
+            "build_seconds": round(cube["build_seconds"], 3)
+        }
+
+    def _derive(self, cube: Dict[str, Any], name: str, values: np.ndarray) -> np.ndarray:
+        """Labels of a (possibly derived) dimension from the labels of its cube axis"""
+        if name in DIMENSIONS:
+            return values
+        if name == "product_category_name_english":
+            derived = [cube["english"].get(value) for value in values]
+        elif name == "category":
+            derived = [cube["english"].get(value) or value for value in values]
+        elif name == "purchase_year":
+            derived = [None if value is None else value // 100 for value in values]
+        elif name == "purchase_month":
+            derived = [None if value is None else value % 100 for value in values]
+        elif name == "purchase_quarter":
+            derived = [None if value is None else (value % 100 - 1) // 3 + 1 for value in values]
+        else:
+            raise Exception(f"Unknown cube dimension: {name}")
+        return np.array(derived, dtype=object)
+
+    def _masks(self, cube: Dict[str, Any], filters: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Boolean masks over the cube axes from filters on (derived) dimensions"""
+        masks = {}
+        for name, condition in filters.items():
+            axis = DERIVED_DIMENSIONS.get(name, name)
+            if axis not in DIMENSIONS:
+                raise Exception(f"Unknown cube dimension: {name}")
+            values = self._derive(cube, name, cube["labels"][axis])
+
+            if callable(condition):
+                keep = [value is not None and bool(condition(value)) for value in values]
+            elif isinstance(condition, (list, tuple, set)):
+                allowed = set(condition)
+                keep = [value in allowed for value in values]
+            else:
+                keep = [value == condition for value in values]
+
+            mask = np.array(keep, dtype=bool)
+            masks[axis] = masks[axis] & mask if axis in masks else mask
+        return masks
+
+    def _projection(self, cube: Dict[str, Any], axis: str, names: Tuple[str, ...]) -> Tuple[Optional[np.ndarray], List[tuple]]:
+        """
+        One-hot matrix mapping an axis's labels to the combined labels of the dimensions grouped on it
+
+        Returns:
+            (matrix of shape (axis labels, groups) or None for the axis itself, group label tuples)
+        """
+        cache = cube["projections"]
+        if (axis, names) not in cache:
+            labels = cube["labels"][axis]
+            if names == (axis,):
+                cache[(axis, names)] = (None, [(label,) for label in labels])
+            else:
+                keys = list(zip(*(self._derive(cube, name, labels) for name in names)))
+                groups = list(dict.fromkeys(keys))
+                matrix = np.zeros((len(labels), len(groups)))
+                matrix[np.arange(len(labels)), [groups.index(key) for key in keys]] = 1.0
+                cache[(axis, names)] = (matrix, groups)
+        return cache[(axis, names)]
+
+    def _rollup(
+        self,
+        cube: Dict[str, Any],
+        array: np.ndarray,
+        axes: List[str],
+        groups: Dict[str, Tuple[str, ...]],
+        masks: Dict[str, np.ndarray]
+    ) -> Tuple[np.ndarray, List[List[tuple]]]:
+        """
+        Filter an array, sum it over ungrouped axes and project grouped axes onto their labels
+
+        The trailing axis of the array holds the measures and is left alone.
+
+        Returns:
+            (reduced array, group label tuples for each remaining axis)
+        """
+        keys = {}
+        for axis in reversed(range(len(axes))):
+            name = axes[axis]
+            if name in masks:
+                array = np.compress(masks[name], array, axis=axis)
+            if name not in groups:
+                array = array.sum(axis=axis)
+                continue
+
+            matrix, labels = self._projection(cube, name, groups[name])
+            if matrix is None:
+                keys[name] = [labels[i] for i in np.flatnonzero(masks[name])] if name in masks else labels
+            else:
+                if name in masks:
+                    matrix = matrix[masks[name]]
+                array = np.moveaxis(np.tensordot(array, matrix, axes=([axis], [0])), -1, axis)
+                keys[name] = labels
+        return array, [keys[name] for name in axes if name in groups]
+
+    def aggregate(
+        self,
+        group_by: Optional[List[str]] = None,
+        measures: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Roll up the cube to a set of dimensions
+
+        Args:
+            group_by: Dimensions to keep (cube axes or DERIVED_DIMENSIONS)
+            measures: Measures to return (defaults to all of MEASURES)
+            filters: Dimension to allowed value, list of values or predicate
+
+        Returns:
+            One row per non-empty group (one total row without group_by), or
+            None when the cube cannot answer exactly
+        """
+        group_by = list(group_by or [])
+        measures = list(measures or MEASURES)
+        columns = self._aggregate(group_by, measures, filters or {})
+        if columns is None:
+            return None
+        return pd.DataFrame(columns, columns=group_by + measures)
+
+    def _aggregate(self, group_by: List[str], measures: List[str], filters: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+        """Column arrays of aggregate(), or None when the cube cannot answer exactly"""
+        cube = self._current()
+        if cube is None:
+            return None
+
+        for name in group_by:
+            if name not in DIMENSIONS and name not in DERIVED_DIMENSIONS:
+                raise Exception(f"Unknown cube dimension: {name}")
+        for measure in measures:
+            if measure not in MEASURES:
+                raise Exception(f"Unknown cube measure: {measure}")
+
+        masks = self._masks(cube, filters)
+        groups: Dict[str, Tuple[str, ...]] = {}
+        for name in group_by:
+            axis = DERIVED_DIMENSIONS.get(name, name)
+            groups[axis] = groups.get(axis, ()) + (name,)
+
+        items, keys = self._rollup(cube, cube["items"], DIMENSIONS, groups, masks)
+        cell_shape = items.shape[:-1]
+        items = items.reshape(-1, len(ITEM_MEASURES))
+
+        orders = None
+        if "order_count" in measures:
+            category = "product_category_name"
+            if category in groups or category in masks:
+                # Count orders per category first: each output group must cover
+                # one category, or orders spanning categories would count twice
+                per_category = dict(groups)
+                per_category[category] = (category,)
+                counts, _ = self._rollup(cube, cube["category_orders"][..., np.newaxis], DIMENSIONS, per_category, masks)
+                position = [axis for axis in DIMENSIONS if axis in per_category].index(category)
+
+                if category in groups:
+                    matrix, _ = self._projection(cube, category, groups[category])
+                    if matrix is not None and category in masks:
+                        matrix = matrix[masks[category]]
+                else:
+                    matrix = np.ones((counts.shape[position], 1))
+
+                if matrix is not None:
+                    spans = np.moveaxis(np.tensordot(counts > 0, matrix, axes=([position], [0])), -1, position)
+                    if (spans > 1).any():
+                        return None
+                    counts = np.moveaxis(np.tensordot(counts, matrix, axes=([position], [0])), -1, position)
+                    if category not in groups:
+                        counts = counts.squeeze(position)
+                orders = counts.reshape(-1)
+            else:
+                counts, _ = self._rollup(cube, cube["orders"][..., np.newaxis], ORDER_DIMENSIONS, groups, masks)
+                orders = counts.reshape(-1)
+
+        cells = np.flatnonzero(items[:, 2] > 0) if group_by else np.arange(1)
+        coordinates = np.unravel_index(cells, cell_shape) if group_by else ()
+
+        columns: Dict[str, Any] = {}
+        for axis_keys, coordinate, axis in zip(keys, coordinates, [axis for axis in DIMENSIONS if axis in groups]):
+            for i, name in enumerate(groups[axis]):
+                labels = np.empty(len(axis_keys), dtype=object)
+                labels[:] = [key[i] for key in axis_keys]
+                columns[name] = labels[coordinate]
+
+        item_count = items[cells, 2]
+        empty = item_count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = {
+                "revenue": np.where(empty, np.nan, items[cells, 0]),
+                "freight": np.where(empty, np.nan, items[cells, 1]),
+                "item_count": item_count.astype(np.int64),
+                "order_count": orders[cells].astype(np.int64) if orders is not None else None,
+                "avg_price": np.where(empty, np.nan, items[cells, 0] / item_count),
+                "avg_freight": np.where(empty, np.nan, items[cells, 1] / item_count)
+            }
+
+        result = {name: columns[name] for name in group_by}
+        result.update({measure: values[measure] for measure in measures})
+        return result
+
+    def top_n(self, dimension: str, measure: str = "revenue", n: int = 10, filters: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """
+        Largest groups of one dimension by a measure
+
+        Args:
+            dimension: Dimension to rank
+            measure: Measure to rank by
+            n: Number of groups
+            filters: Dimension filters (see aggregate)
+
+        Returns:
+            Top groups with all measures, or None when the cube cannot answer
+        """
+        result = self.aggregate([dimension], filters=filters)
+        if result is None:
+            return None
+        return result.sort_values(measure, ascending=False, kind="mergesort").head(n).reset_index(drop=True)
+
+    def _parse_conditions(self, where: str, aliases: set) -> Optional[Dict[str, Callable]]:
+        """Translate an AND-only WHERE clause on cube dimensions into filters"""
+        masked = mask_literals(where)
+        filters: Dict[str, List[Callable]] = {}
+        position = 0
+
+        while position < len(where):
+            match = CONDITION_PATTERN.match(masked, position)
+            if not match:
+                return None
+            alias, column = match.group("alias"), match.group("column").lower()
+            if alias and alias not in aliases:
+                return None
+            name = SQL_DIMENSIONS.get(column)
+            if name is None or name == "category":
+                return None
+
+            def value_of(group: str) -> Any:
+                return _literal_value(where[match.start(group):match.end(group)].strip())
+
+            if match.group("op"):
+                operator, value = match.group("op"), value_of("value")
+                compare = {
+                    "=": lambda a, b: a == b, "==": lambda a, b: a == b,
+                    "!=": lambda a, b: a != b, "<>": lambda a, b: a != b,
+                    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+                    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b
+                }[operator]
+                values = [value]
+                condition = lambda label, compare=compare, value=value: compare(label, value)
+            elif match.group("values") is not None:
+                start = match.start("values")
+                values = [
+                    _literal_value(part.strip())
+                    for part in split_top_level(where[start:match.end("values")])
+                ]
+                condition = lambda label, values=tuple(values): label in values
+            else:
+                low, high = value_of("low"), value_of("high")
+                values = [low, high]
+                condition = lambda label, low=low, high=high: low <= label <= high
+
+            # Mixed text/number comparisons follow SQLite affinity rules; leave them to SQLite
+            numeric = name in NUMERIC_DIMENSIONS
+            if any(isinstance(value, str) == numeric for value in values):
+                return None
+
+            filters.setdefault(name, []).append(condition)
+            position = match.end()
+            connector = re.match(r"AND\b", masked[position:], re.IGNORECASE)
+            if connector:
+                position += connector.end()
+            elif position < len(where):
+                return None
+
+        return {
+            name: (lambda label, conditions=tuple(conditions): all(condition(label) for condition in conditions))
+            for name, conditions in filters.items()
+        }
+
+    def answer_sql(self, sql: str) -> Optional[pd.DataFrame]:
+        """
+        Answer a single-table aggregate over fact_order_items from the cube
+
+        Handles SELECT lists of cube dimensions and SUM/COUNT/AVG measures
+        (optionally wrapped in ROUND), AND-ed equality, IN, range and BETWEEN
+        filters on dimensions, GROUP BY, ORDER BY and LIMIT. Anything else
+        returns None so the caller falls back to SQLite.
+
+        Args:
+            sql: SQL query string
+
+        Returns:
+            Result matching what SQLite would return, or None
+        """
+        if sql not in self._plans:
+            if len(self._plans) >= PLAN_CACHE_SIZE:
+                self._plans.clear()
+            self._plans[sql] = self._plan(sql)
+        plan = self._plans[sql]
+        if plan is None:
+            return None
+        outputs, group_by, measures, filters, sort_terms, limit = plan
+
+        result = self._aggregate(group_by, measures, filters)
+        if result is None:
+            return None
+
+        def column(source: str, digits: Optional[int]) -> np.ndarray:
+            values = result[source]
+            if digits is None:
+                return values
+            # SQLite rounds halves away from zero
+            scale = 10.0 ** digits
+            return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+        # Without ORDER BY, SQLite returns groups in GROUP BY order
+        if not sort_terms:
+            sort_terms = [(("dimension", name, None), False) for name in group_by]
+
+        order = np.arange(len(next(iter(result.values()))))
+        if sort_terms:
+            keys = []
+            for (_, source, digits), descending in sort_terms:
+                values = column(source, digits)
+                nulls = pd.isna(values)
+                ranks = np.zeros(len(values), dtype=np.int64)
+                if (~nulls).any():
+                    ranks[~nulls] = np.unique(values[~nulls], return_inverse=True)[1]
+                # SQLite sorts NULLs first ascending and last descending
+                keys.append(np.where(nulls, 1, -ranks) if descending else np.where(nulls, -1, ranks))
+            order = np.lexsort(keys[::-1])
+        if limit is not None:
+            order = order[:limit]
+
+        return pd.DataFrame({name: column(source, digits)[order] for name, _, source, digits in outputs})
+
+    def _plan(self, sql: str) -> Optional[tuple]:
+        """Parse a query into (outputs, group_by, measures, filters, sort_terms, limit)"""
+        sql = sql.strip().rstrip(";")
+        masked = mask_literals(sql)
+        if re.search(r"\b(WITH|UNION|EXCEPT|INTERSECT|HAVING|JOIN|OVER)\b|\(\s*SELECT\b|\bSELECT\s+DISTINCT\b", masked, re.IGNORECASE):
+            return None
+        if not re.match(r"\s*SELECT\b", masked, re.IGNORECASE):
+            return None
+
+        # Clause boundaries
+        from_at = find_top_level_keyword(sql, "FROM")
+        if from_at is None:
+            return None
+        bounds = {}
+        for keyword in CLAUSE_KEYWORDS:
+            position = find_top_level_keyword(sql, keyword, from_at)
+            if position is not None:
+                bounds[keyword] = position
+        ordered = sorted(bounds.items(), key=lambda item: item[1])
+        if [keyword for keyword, _ in ordered] != [keyword for keyword in CLAUSE_KEYWORDS if keyword in bounds]:
+            return None
+
+        def clause(keyword: str) -> Optional[str]:
+            if keyword not in bounds:
+                return None
+            following = [position for _, position in ordered if position > bounds[keyword]]
+            return sql[bounds[keyword] + len(keyword):following[0] if following else len(sql)]
+
+        table_end = ordered[0][1] if ordered else len(sql)
+        source = re.fullmatch(r"\s*FROM\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?\s*", sql[from_at:table_end], re.IGNORECASE)
+        if not source or source.group(1).lower() != FACT_TABLE:
+            return None
+        aliases = {source.group(1)} | ({source.group(2)} if source.group(2) else set())
+
+        # Select list: dimensions and measures
+        items = select_items(sql)
+        if not items:
+            return None
+        outputs = []
+        for expression, name in items:
+            parsed = self._parse_output(expression, aliases)
+            if parsed is None:
+                return None
+            outputs.append((name, *parsed))
+
+        group_by = []
+        group_clause = clause("GROUP")
+        if group_clause is not None:
+            by = re.match(r"\s*BY\b", group_clause, re.IGNORECASE)
+            if not by:
+                return None
+            for part in split_top_level(group_clause[by.end():]):
+                dimension = self._resolve_term(part.strip(), outputs, aliases)
+                if dimension is None or dimension[0] != "dimension":
+                    return None
+                if dimension[1] not in group_by:
+                    group_by.append(dimension[1])
+
+        # Every selected dimension must be grouped, as SQLite would otherwise pick an arbitrary row
+        if any(kind == "dimension" and source not in group_by for _, kind, source, _ in outputs):
+            return None
+
+        filters = {}
+        where = clause("WHERE")
+        if where is not None:
+            filters = self._parse_conditions(where.strip(), aliases)
+            if filters is None:
+                return None
+
+        sort_terms = []
+        order_clause = clause("ORDER")
+        if order_clause is not None:
+            by = re.match(r"\s*BY\b", order_clause, re.IGNORECASE)
+            if not by:
+                return None
+            for part in split_top_level(order_clause[by.end():]):
+                direction = re.match(r"(?is)(.*?)\s+(ASC|DESC)$", part.strip())
+                term = direction.group(1) if direction else part.strip()
+                descending = bool(direction) and direction.group(2).upper() == "DESC"
+                resolved = self._resolve_term(term, outputs, aliases)
+                if resolved is None or (resolved[0] == "dimension" and resolved[1] not in group_by):
+                    return None
+                sort_terms.append((resolved, descending))
+
+        limit = None
+        limit_clause = clause("LIMIT")
+        if limit_clause is not None:
+            limit_match = re.fullmatch(r"\s*(\d+)\s*", limit_clause)
+            if not limit_match:
+                return None
+            limit = int(limit_match.group(1))
+
+        measures = sorted({source for _, kind, source, _ in outputs if kind == "measure"} |
+                          {term[1] for term, _ in sort_terms if term[0] == "measure"})
+        return outputs, group_by, measures, filters, sort_terms, limit
+
+    def _parse_output(self, expression: str, aliases: set) -> Optional[Tuple[str, str, Optional[int]]]:
+        """Classify a select expression as (kind, dimension or measure name, ROUND digits)"""
+        normalized = _normalize_expression(expression, aliases)
+        digits = None
+        rounded = re.fullmatch(r"round\((.+?)(?:,(\d+))?\)", normalized)
+        if rounded:
+            normalized, digits = rounded.group(1), int(rounded.group(2) or 0)
+
+        if normalized in SQL_MEASURES:
+            return "measure", SQL_MEASURES[normalized], digits
+        if normalized in SQL_DIMENSIONS and digits is None:
+            return "dimension", SQL_DIMENSIONS[normalized], None
+        return None
+
+    def _resolve_term(self, term: str, outputs: List[Tuple[str, str, str, Optional[int]]], aliases: set) -> Optional[Tuple[str, str, Optional[int]]]:
+        """Resolve a GROUP BY/ORDER BY term given as ordinal, output name or expression"""
+        if term.isdigit():
+            index = int(term) - 1
+            return outputs[index][1:] if 0 <= index < len(outputs) else None
+        for name, kind, source, digits in outputs:
+            if name.lower() == term.strip('"').lower():
+                return kind, source, digits
+        return self._parse_output(term, aliases)
+
+# Global OLAP cube instance
+olap_cube = OLAPCube()
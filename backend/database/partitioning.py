@@ -0,0 +1,462 @@
+"""
+Time-partitioned storage for orders and order items: one table per purchase
+period behind UNION ALL views, and partition pruning for date-filtered queries
+"""
+import re
+import json
+import sqlite3
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import text
+from backend.database.models import Base
+from backend.database.metadata import METADATA_TABLE, write_dataset_metadata
+from backend.database.sql_parsing import mask_literals, paren_depths, replace_table_references, table_aliases
+from backend.database.surrogate_keys import KEYED_TABLES, view_definition
+
+# Tables split by the purchase period of their order (order keys increase with
+# purchase time, so every period is a contiguous order_key range)
+PARTITIONED_TABLES = ("orders", "order_items")
+
+PARTITION_GRAINS = ("year", "quarter")
+
+# dataset_metadata key holding the partition catalog as JSON
+PARTITIONS_METADATA_KEY = "time_partitions"
+
+# Orders without a purchase timestamp and items of orders missing from orders
+OTHER_PARTITION = "other"
+
+# Physical partition tables (orders_data_2017) and their views (orders_2017q3)
+PARTITION_NAME_PATTERN = re.compile(r"^(?:orders|order_items)(?:_data)?_(?:\d{4}(?:q[1-4])?|other)$")
+
+# Columns of orders a pruning predicate can filter on
+TIME_COLUMNS = ("purchase_year", "purchase_yyyymm", "order_purchase_timestamp")
+
+# Literal operand: number, string, or DATE()/DATETIME() of string literals
+_VALUE = r"(?:\d+|'[^']*'|(?:DATE|DATETIME)\s*\(\s*'[^']*'(?:\s*,\s*'[^']*')*\s*\))"
+
+PREDICATE_PATTERN = re.compile(
+    r"(?P<subject>STRFTIME\s*\(\s*'[^']*'\s*,\s*(?:[A-Za-z_]\w*\.)?order_purchase_timestamp\s*\)"
+    r"|(?:[A-Za-z_]\w*\.)?(?:purchase_year|purchase_yyyymm|order_purchase_timestamp)\b)\s*"
+    rf"(?:(?P<op>==|=|>=|<=|>|<)\s*(?P<value>{_VALUE})"
+    rf"|IN\s*\((?P<values>\s*{_VALUE}(?:\s*,\s*{_VALUE})*\s*)\)"
+    rf"|BETWEEN\s+(?P<low>{_VALUE})\s+AND\s+(?P<high>{_VALUE}))"
+    r"(?=\s*(?:\bAND\b|$))",
+    re.IGNORECASE
+)
+
+# Keywords ending a WHERE clause
+CLAUSE_END_PATTERN = re.compile(r"\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|WINDOW)\b", re.IGNORECASE)
+
+# (lower bound, upper bound, upper bound inclusive) on purchase timestamps;
+# None means unbounded
+Interval = Tuple[Optional[str], Optional[str], bool]
+
+def is_partition_relation(name: str) -> bool:
+    """
+    Whether a table or view holds a single time partition
+
+    Args:
+        name: Table or view name
+
+    Returns:
+        True for partition tables and their views, which are not queried directly
+    """
+    return bool(PARTITION_NAME_PATTERN.match(name))
+
+def _period(grain: str, year: int, quarter: int) -> Tuple[str, str, str]:
+    """Name, first timestamp and end timestamp (exclusive) of a purchase period"""
+    if grain == "year":
+        return str(year), f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00"
+
+    first_month = 3 * (quarter - 1) + 1
+    end_year, end_month = (year + 1, 1) if quarter == 4 else (year, first_month + 3)
+    return (
+        f"{year}q{quarter}",
+        f"{year}-{first_month:02d}-01 00:00:00",
+        f"{end_year}-{end_month:02d}-01 00:00:00"
+    )
+
+def _table_statements(connection, table: str) -> List[str]:
+    """CREATE TABLE and CREATE INDEX statements of a table, table first"""
+    rows = connection.execute(
+        text("SELECT type, sql FROM sqlite_master WHERE tbl_name = :table AND sql IS NOT NULL"),
+        {"table": table}
+    ).fetchall()
+    return [sql for kind, sql in sorted(rows, key=lambda row: row[0] != "table")]
+
+def partition_tables(db_manager, grain: str) -> Dict[str, Any]:
+    """
+    Split orders and order items into one table per purchase period
+
+    Each keyed table becomes <table>_<period> tables with the original
+    indexes, plus an 'other' partition for orders without a purchase
+    timestamp. The original physical name turns into a UNION ALL view over the
+    partitions, so the views with the original table names keep working, and
+    every partition gets its own view (orders_2017, order_items_2017) for
+    pruned queries. The catalog is stored in dataset_metadata.
+
+    Args:
+        db_manager: Database manager to use
+        grain: 'year' or 'quarter'
+
+    Returns:
+        Partition catalog
+    """
+    if grain not in PARTITION_GRAINS:
+        raise Exception(f"Unknown partition grain '{grain}' (expected {' or '.join(PARTITION_GRAINS)})")
+
+    quarter = "purchase_quarter" if grain == "quarter" else "1"
+    ranges = db_manager.execute_query(f"""
+        SELECT purchase_year AS year, {quarter} AS quarter,
+               MIN(order_key) AS min_key, MAX(order_key) AS max_key, COUNT(*) AS orders
+        FROM orders_data
+        WHERE purchase_year IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY min_key
+    """, rewrite=False)
+
+    partitions = []
+    for row in ranges.to_dict('records'):
+        name, start, end = _period(grain, int(row['year']), int(row['quarter']))
+        partitions.append({
+            "name": name, "start": start, "end": end,
+            "min_key": int(row['min_key']), "max_key": int(row['max_key']),
+            "condition": f"order_key BETWEEN {int(row['min_key'])} AND {int(row['max_key'])}",
+            "orders": int(row['orders'])
+        })
+
+    # A key range holding orders of another period would make pruning drop rows
+    for partition in partitions:
+        in_range = db_manager.execute_query(
+            f"SELECT COUNT(*) AS count FROM orders_data WHERE {partition['condition']}", rewrite=False
+        )
+        if int(in_range['count'].iloc[0]) != partition['orders']:
+            raise Exception("Order keys are not ordered by purchase time; reload the data with --force to partition it")
+
+    if partitions:
+        other = f"order_key < {partitions[0]['min_key']} OR order_key > {partitions[-1]['max_key']}"
+    else:
+        other = "1 = 1"
+    partitions.append({"name": OTHER_PARTITION, "start": None, "end": None, "condition": other})
+
+    with db_manager.engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            physical = KEYED_TABLES[table]
+            statements = _table_statements(connection, physical)
+            for partition in partitions:
+                target = f"{physical}_{partition['name']}"
+                for statement in statements:
+                    connection.exec_driver_sql(statement.replace(physical, target))
+                connection.exec_driver_sql(
+                    f"INSERT INTO {target} SELECT * FROM {physical} WHERE {partition['condition']}"
+                )
+                partition[table] = connection.exec_driver_sql(f"SELECT COUNT(*) FROM {target}").scalar()
+
+            connection.exec_driver_sql(f"DROP TABLE {physical}")
+            connection.exec_driver_sql(
+                f"CREATE VIEW {physical} AS "
+                + " UNION ALL ".join(f"SELECT * FROM {physical}_{partition['name']}" for partition in partitions)
+            )
+            for partition in partitions:
+                connection.exec_driver_sql(view_definition(table, partition['name']))
+
+    catalog = {
+        "grain": grain,
+        "partitions": [
+            {key: partition[key] for key in ("name", "start", "end") + PARTITIONED_TABLES}
+            for partition in partitions
+        ]
+    }
+    write_dataset_metadata(db_manager, {PARTITIONS_METADATA_KEY: json.dumps(catalog)})
+    db_manager.refresh_dataset_metadata()
+    return catalog
+
+def merge_partitions(db_manager) -> int:
+    """
+    Restore the unpartitioned layout, moving partition rows back into the keyed tables
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Number of partition tables merged (0 when the tables are not partitioned)
+    """
+    relations = db_manager.execute_query(
+        "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')", rewrite=False
+    )
+    relations = dict(zip(relations['name'], relations['type']))
+    merged = 0
+
+    with db_manager.engine.begin() as connection:
+        for name, kind in relations.items():
+            if kind == "view" and is_partition_relation(name):
+                connection.exec_driver_sql(f"DROP VIEW {name}")
+
+        for table in PARTITIONED_TABLES:
+            physical = KEYED_TABLES[table]
+            parts = sorted(
+                name for name, kind in relations.items()
+                if kind == "table" and is_partition_relation(name) and name.startswith(f"{physical}_")
+            )
+            if relations.get(physical) == "view":
+                connection.exec_driver_sql(f"DROP VIEW {physical}")
+                Base.metadata.tables[physical].create(bind=connection)
+
+            columns = ", ".join(column.name for column in Base.metadata.tables[physical].columns)
+            for part in parts:
+                connection.exec_driver_sql(f"INSERT INTO {physical} ({columns}) SELECT {columns} FROM {part}")
+                connection.exec_driver_sql(f"DROP TABLE {part}")
+            merged += len(parts)
+
+        if METADATA_TABLE in relations:
+            connection.execute(
+                text(f"DELETE FROM {METADATA_TABLE} WHERE key = :key"), {"key": PARTITIONS_METADATA_KEY}
+            )
+
+    db_manager.refresh_dataset_metadata()
+    return merged
+
+def load_partition_catalog(metadata: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    """
+    Read the partition catalog from the dataset constants
+
+    Args:
+        metadata: Dataset constants
+
+    Returns:
+        Partition catalog, or None when the tables are not partitioned
+    """
+    if not metadata or PARTITIONS_METADATA_KEY not in metadata:
+        return None
+    try:
+        return json.loads(metadata[PARTITIONS_METADATA_KEY])
+    except ValueError:
+        return None
+
+def _evaluate(value: str):
+    """Python value of a literal operand (DATE() calls are evaluated by SQLite)"""
+    if value.isdigit():
+        return int(value)
+    if value.startswith("'"):
+        return value[1:-1]
+    connection = sqlite3.connect(":memory:")
+    try:
+        return connection.execute(f"SELECT {value}").fetchone()[0]
+    finally:
+        connection.close()
+
+def _unit_bounds(unit: str, value) -> Optional[Tuple[str, str]]:
+    """First and end timestamp of a purchase year or month given as 2017 / 201703 / '2017-03'"""
+    digits = str(value).replace("-", "")
+    if not digits.isdigit():
+        return None
+    if unit == "year" and len(digits) == 4:
+        year = int(digits)
+        return f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00"
+    if unit == "month" and len(digits) == 6:
+        year, month = int(digits[:4]), int(digits[4:])
+        if not 1 <= month <= 12:
+            return None
+        end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year}-{month:02d}-01 00:00:00", f"{end_year}-{end_month:02d}-01 00:00:00"
+    return None
+
+def _predicate_intervals(unit: str, match: re.Match, original: str) -> Optional[List[Interval]]:
+    """
+    Purchase-time intervals a predicate can be true in
+
+    Args:
+        unit: 'year', 'month' or 'timestamp'
+        match: PREDICATE_PATTERN match on the masked clause
+        original: Unmasked clause text (same offsets)
+
+    Returns:
+        List of intervals (the predicate holds only inside their union), or
+        None when the operands cannot be interpreted
+    """
+    def operand(group: str):
+        return _evaluate(original[match.start(group):match.end(group)].strip())
+
+    try:
+        if match.group("op"):
+            op, values = match.group("op"), [operand("value")]
+        elif match.group("values") is not None:
+            raw = original[match.start("values"):match.end("values")]
+            op, values = "in", [_evaluate(part.strip()) for part in re.findall(_VALUE, raw, re.IGNORECASE)]
+        else:
+            op, values = "between", [operand("low"), operand("high")]
+    except sqlite3.Error:
+        return None
+    if any(value is None for value in values):
+        return None
+
+    if unit == "timestamp":
+        if not all(isinstance(value, str) for value in values):
+            return None
+        if op in ("=", "==", "in"):
+            return [(value, value, True) for value in values]
+        if op in (">=", ">"):
+            return [(values[0], None, False)]
+        if op == "<=":
+            return [(None, values[0], True)]
+        if op == "<":
+            return [(None, values[0], False)]
+        return [(values[0], values[1], True)]
+
+    bounds = [_unit_bounds(unit, value) for value in values]
+    if any(bound is None for bound in bounds):
+        return None
+    if op in ("=", "==", "in"):
+        return [(first, end, False) for first, end in bounds]
+    if op == ">=":
+        return [(bounds[0][0], None, False)]
+    if op == ">":
+        return [(bounds[0][1], None, False)]
+    if op == "<=":
+        return [(None, bounds[0][1], False)]
+    if op == "<":
+        return [(None, bounds[0][0], False)]
+    return [(bounds[0][0], bounds[1][1], False)]
+
+def _overlaps(partition: Dict[str, Any], intervals: List[Interval]) -> bool:
+    """Whether any interval can hold a purchase timestamp of the partition"""
+    for low, high, inclusive in intervals:
+        if low is not None and partition["end"] <= low:
+            continue
+        if high is not None and (partition["start"] > high if inclusive else partition["start"] >= high):
+            continue
+        return True
+    return False
+
+def _single_reference(masked: str, depths: List[int], table: str) -> Optional[str]:
+    """
+    Alias of a table referenced exactly once, in the outermost FROM/JOIN clause
+
+    Returns:
+        Alias (or the table name when unaliased), or None
+    """
+    if len(re.findall(rf"(?<![\w.]){table}(?!\w|\s*\.)", masked, re.IGNORECASE)) != 1:
+        return None
+    match = re.search(rf"\b(?:FROM|JOIN)\s+{table}\b(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", masked, re.IGNORECASE)
+    if match is None or depths[match.start()] != 0:
+        return None
+    alias = match.group(1)
+    keywords = {"on", "using", "where", "join", "left", "right", "inner", "outer", "cross",
+                "natural", "full", "group", "order", "limit", "having", "window"}
+    return alias if alias and alias.lower() not in keywords else table
+
+def _where_clause(masked: str, depths: List[int]) -> Optional[Tuple[int, int]]:
+    """Offsets of the outermost WHERE clause body"""
+    where = next(
+        (m for m in re.finditer(r"\bWHERE\b", masked, re.IGNORECASE) if depths[m.start()] == 0), None
+    )
+    if where is None:
+        return None
+    end = next(
+        (m.start() for m in CLAUSE_END_PATTERN.finditer(masked, where.end()) if depths[m.start()] == 0),
+        len(masked)
+    )
+    while end > where.end() and masked[end - 1] in " \t\r\n;":
+        end -= 1
+    return where.end(), end
+
+def rewrite_partition_pruning(query: str, catalog: Optional[Dict[str, Any]]) -> str:
+    """
+    Read only the time partitions a query's purchase-date filters can match
+
+    Top-level AND conditions of the outermost WHERE clause on orders'
+    purchase_year, purchase_yyyymm, order_purchase_timestamp or
+    STRFTIME('%Y' / '%Y-%m', order_purchase_timestamp) against literals or
+    DATE() expressions select the partitions to keep. The orders reference is
+    pointed at those partitions, and order_items too when it is joined on
+    order_key. Queries with OR at the top level, compound selects or several
+    references to the same table are left unchanged.
+
+    Args:
+        query: SQL query string
+        catalog: Partition catalog
+
+    Returns:
+        Rewritten SQL query
+    """
+    if not catalog or not catalog.get("partitions"):
+        return query
+
+    masked = mask_literals(query)
+    depths = paren_depths(masked)
+    if any(depths[m.start()] == 0 for m in re.finditer(r"\b(?:UNION|EXCEPT|INTERSECT)\b", masked, re.IGNORECASE)):
+        return query
+
+    orders_alias = _single_reference(masked, depths, "orders")
+    clause = _where_clause(masked, depths)
+    if orders_alias is None or clause is None:
+        return query
+
+    body, original = masked[clause[0]:clause[1]], query[clause[0]:clause[1]]
+    body_depths = [depth - depths[clause[0]] for depth in depths[clause[0]:clause[1]]]
+    if any(body_depths[m.start()] == 0 for m in re.finditer(r"\b(?:OR|CASE)\b", body, re.IGNORECASE)):
+        return query
+
+    # Unqualified columns only count when no other relation has them
+    aliases = table_aliases(query)
+    others = {table for table in aliases.values() if table != "orders"}
+    unqualified_ok = all(
+        KEYED_TABLES.get(table, table) in Base.metadata.tables
+        and not set(TIME_COLUMNS) & set(Base.metadata.tables[KEYED_TABLES.get(table, table)].c.keys())
+        for table in others
+    )
+
+    conditions: List[List[Interval]] = []
+    for match in PREDICATE_PATTERN.finditer(body):
+        if body_depths[match.start()] != 0 or not re.search(r"(?:^|\bAND)\s*$", body[:match.start()], re.IGNORECASE):
+            continue
+
+        subject = original[match.start("subject"):match.end("subject")]
+        qualifier = re.search(r"(?:([A-Za-z_]\w*)\.)?(\w+)\s*\)?$", subject)
+        alias, column = qualifier.group(1), qualifier.group(2).lower()
+        if alias is None and not unqualified_ok:
+            continue
+        if alias is not None and alias != orders_alias and aliases.get(alias) != "orders":
+            continue
+
+        if subject.upper().startswith("STRFTIME"):
+            form = re.match(r"STRFTIME\s*\(\s*'([^']*)'", subject, re.IGNORECASE).group(1)
+            unit = {"%Y": "year", "%Y-%m": "month"}.get(form)
+        else:
+            unit = {"purchase_year": "year", "purchase_yyyymm": "month"}.get(column, "timestamp")
+        if unit is None:
+            continue
+
+        intervals = _predicate_intervals(unit, match, original)
+        if intervals is not None:
+            conditions.append(intervals)
+
+    if not conditions:
+        return query
+
+    # The 'other' partition has no purchase timestamp, so any filter excludes it
+    partitions = catalog["partitions"]
+    kept = [
+        partition for partition in partitions
+        if partition["start"] is not None and all(_overlaps(partition, intervals) for intervals in conditions)
+    ]
+    if all(partition in kept or not partition.get("orders") for partition in partitions):
+        return query
+
+    def relation(table: str) -> str:
+        if not kept:
+            return f"(SELECT * FROM {table}_{partitions[0]['name']} WHERE 0)"
+        if len(kept) == 1:
+            return f"{table}_{kept[0]['name']}"
+        return "(" + " UNION ALL ".join(f"SELECT * FROM {table}_{partition['name']}" for partition in kept) + ")"
+
+    replacements = {"orders": relation("orders")}
+    items_alias = _single_reference(masked, depths, "order_items")
+    if items_alias is not None:
+        join = (
+            rf"\b{items_alias}\.order_key\s*=\s*{orders_alias}\.order_key\b"
+            rf"|\b{orders_alias}\.order_key\s*=\s*{items_alias}\.order_key\b"
+        )
+        if any(depths[m.start()] == 0 for m in re.finditer(join, masked, re.IGNORECASE)):
+            replacements["order_items"] = relation("order_items")
+
+    return replace_table_references(query, replacements)
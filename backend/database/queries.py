@@ -3,6 +3,11 @@ Predefined SQL query templates and helpers
 """
 from typing import Dict, Any
 from backend.config import DATABASE_SCHEMA
+from backend.database.connection import db_manager
+from backend.database.metadata import format_reference_constants, rewrite_reference_subqueries
+from backend.database.introspection import schema_introspector, format_column_stats
+from backend.database.sql_functions import format_function_docs
+from backend.database.data_profile import data_profile
 
 def get_schema_description() -> str:
     """
@@ -11,33 +16,68 @@ def get_schema_description() -> str:
     Returns:
         Formatted schema string
     """
+    metadata = db_manager.get_dataset_metadata()
+    
     schema_text = """Database Schema:
 
 IMPORTANT NOTES:
-1. Product categories are stored in PORTUGUESE in the 'products' table
-2. ALWAYS use the 'product_category_name_translation' table to handle English category names
-3. When filtering by category in English (e.g., 'electronics', 'furniture'), use:
+1. PREFER fact_order_items: it already joins order items with orders, customers, sellers,
+   categories (both languages), payment totals and review scores. Use it whenever it has the
+   columns needed; order_payment_total and order_review_score repeat on each item of an order
+2. Product categories are stored in PORTUGUESE in the 'products' table
+3. Outside fact_order_items, ALWAYS use the 'product_category_name_translation' table to handle English category names
+4. When filtering by category in English (e.g., 'electronics', 'furniture'), use:
    - JOIN with product_category_name_translation table
    - Use LIKE '%keyword%' for flexible matching
    - Check both English translation AND Portuguese names
-4. Common category mappings:
+5. Common category mappings:
    - electronics → eletronicos, informatica_acessorios
    - furniture → moveis_decoracao
    - toys → brinquedos
    - books → livros_tecnicos, livros_interesse_geral
-5. DATE/TIME queries:
+6. DATE/TIME queries:
    - Primary date column: order_purchase_timestamp in orders table
-   - For relative dates (past N months/quarters), use: DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-N months')
-   - For quarters: Calculate as CAST((CAST(STRFTIME('%m', date) AS INTEGER) + 2) / 3 AS INTEGER)
-   - For year/month: Use STRFTIME('%Y-%m', date)
+   - For relative dates (past N months/quarters), use: DATE('<latest purchase timestamp>', '-N months')
+   - Purchase periods are indexed integer columns of orders: purchase_year, purchase_month,
+     purchase_quarter and purchase_yyyymm (e.g. 201809); group and filter on them instead of STRFTIME
+   - For other dates: quarter(date) and yyyymm(date) instead of STRFTIME arithmetic
+   - Delivery times are precomputed on orders: delivery_days, approval_hours, carrier_handoff_days,
+     days_vs_estimate (positive when late) and is_late; use them instead of JULIANDAY differences
    - The dataset spans from 2016 to 2018
-
+7. JOINS: Every *_id column has an integer *_key twin (order_key, customer_key, product_key, ...)
+   - Join and count on the keys: JOIN order_items oi ON o.order_key = oi.order_key
+   - COUNT(DISTINCT o.order_key) instead of COUNT(DISTINCT o.order_id)
+   - Select *_id columns only when the IDs themselves are shown
+8. LOCATIONS: join customer_zip_code_prefix / seller_zip_code_prefix to zip_centroids.zip_code_prefix
+   (one row per prefix) for coordinates, never to geolocation (many rows per prefix);
+   zip_neighbors lists the nearest prefixes of each prefix with distance_km
+9. FUNCTIONS: use these built-in functions instead of spelling the calculation out:
 """
+    schema_text += format_function_docs() + "\n\n"
+    
+    reference_text = format_reference_constants(metadata)
+    if reference_text:
+        schema_text += reference_text + "\n"
+    
+    # Live column types and statistics, cached per dataset version
+    stats = schema_introspector.get_stats()
+    relations = stats["relations"] if stats else {}
     
     for table_name, table_info in DATABASE_SCHEMA.items():
         schema_text += f"Table: {table_name}\n"
         schema_text += f"Description: {table_info['description']}\n"
-        schema_text += f"Columns: {', '.join(table_info['columns'])}\n\n"
+        
+        relation = relations.get(table_name)
+        if relation:
+            schema_text += f"Rows: {relation['row_count']:,}\n"
+            schema_text += "Columns:\n"
+            schema_text += "\n".join(
+                format_column_stats(column, data_profile.format_for_schema(table_name, column['name']))
+                for column in relation['columns']
+            )
+            schema_text += "\n\n"
+        else:
+            schema_text += f"Columns: {', '.join(table_info['columns'])}\n\n"
     
     return schema_text
 
@@ -50,12 +90,15 @@ def get_example_queries() -> str:
     """
     from backend.config import SQL_EXAMPLES
     
+    metadata = db_manager.get_dataset_metadata()
     examples_text = "Example Queries:\n\n"
     
     for i, example in enumerate(SQL_EXAMPLES, 1):
+        # Show examples with the reference date already inlined as a literal
+        example_sql = rewrite_reference_subqueries(example['sql'], metadata)
         examples_text += f"Example {i}:\n"
         examples_text += f"Question: {example['question']}\n"
-        examples_text += f"SQL: {example['sql']}\n\n"
+        examples_text += f"SQL: {example_sql}\n\n"
     
     return examples_text
 
@@ -64,8 +107,8 @@ QUERY_PATTERNS = {
     "top_products": """
         SELECT p.product_id, p.product_category_name, COUNT(*) as order_count
         FROM order_items oi
-        JOIN products p ON oi.product_id = p.product_id
-        GROUP BY p.product_id, p.product_category_name
+        JOIN products p ON oi.product_key = p.product_key
+        GROUP BY p.product_key, p.product_category_name
         ORDER BY order_count DESC
         LIMIT {limit}
     """,
@@ -73,11 +116,11 @@ QUERY_PATTERNS = {
     "revenue_by_category": """
         SELECT 
             pct.product_category_name_english as category,
-            COUNT(DISTINCT oi.order_id) as order_count,
+            COUNT(DISTINCT oi.order_key) as order_count,
             SUM(oi.price) as total_revenue,
             AVG(oi.price) as avg_price
         FROM order_items oi
-        JOIN products p ON oi.product_id = p.product_id
+        JOIN products p ON oi.product_key = p.product_key
         LEFT JOIN product_category_name_translation pct 
             ON p.product_category_name = pct.product_category_name
         GROUP BY pct.product_category_name_english
@@ -87,12 +130,12 @@ QUERY_PATTERNS = {
     "customer_orders": """
         SELECT 
             c.customer_state,
-            COUNT(DISTINCT o.order_id) as total_orders,
-            COUNT(DISTINCT c.customer_id) as total_customers,
+            COUNT(DISTINCT o.order_key) as total_orders,
+            COUNT(DISTINCT c.customer_key) as total_customers,
             AVG(op.payment_value) as avg_order_value
         FROM customers c
-        JOIN orders o ON c.customer_id = o.customer_id
-        JOIN order_payments op ON o.order_id = op.order_id
+        JOIN orders o ON c.customer_key = o.customer_key
+        JOIN order_payments op ON o.order_key = op.order_key
         GROUP BY c.customer_state
         ORDER BY total_orders DESC
     """,
@@ -102,13 +145,13 @@ QUERY_PATTERNS = {
             s.seller_id,
             s.seller_city,
             s.seller_state,
-            COUNT(DISTINCT oi.order_id) as total_orders,
+            COUNT(DISTINCT oi.order_key) as total_orders,
             SUM(oi.price) as total_revenue,
             AVG(or2.review_score) as avg_rating
         FROM sellers s
-        JOIN order_items oi ON s.seller_id = oi.seller_id
-        LEFT JOIN order_reviews or2 ON oi.order_id = or2.order_id
-        GROUP BY s.seller_id, s.seller_city, s.seller_state
+        JOIN order_items oi ON s.seller_key = oi.seller_key
+        LEFT JOIN order_reviews or2 ON oi.order_key = or2.order_key
+        GROUP BY s.seller_key, s.seller_city, s.seller_state
         ORDER BY total_revenue DESC
         LIMIT {limit}
     """,
@@ -116,12 +159,12 @@ QUERY_PATTERNS = {
     "delivery_performance": """
         SELECT 
             c.customer_state,
-            AVG(JULIANDAY(o.order_delivered_customer_date) - 
-                JULIANDAY(o.order_purchase_timestamp)) as avg_delivery_days,
+            AVG(o.delivery_days) as avg_delivery_days,
+            AVG(o.is_late) as late_rate,
             COUNT(*) as total_deliveries
         FROM orders o
-        JOIN customers c ON o.customer_id = c.customer_id
-        WHERE o.order_delivered_customer_date IS NOT NULL
+        JOIN customers c ON o.customer_key = c.customer_key
+        WHERE o.delivery_days IS NOT NULL
         GROUP BY c.customer_state
         ORDER BY avg_delivery_days
     """
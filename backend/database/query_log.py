@@ -0,0 +1,312 @@
+"""
+Query fingerprinting and slow-query log
+"""
+import re
+import json
+import atexit
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+from backend.config import settings
+
+# Buffered records that wake the writer before its interval is up
+FLUSH_BATCH_SIZE = 500
+
+def normalize_query(sql: str) -> str:
+    """
+    Normalize a query so statements differing only in literals compare equal
+
+    String and numeric literals become '?', IN lists collapse to a single
+    placeholder and whitespace and case are normalized.
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        Normalized query text
+    """
+    normalized = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    normalized = re.sub(r"(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b", "?", normalized)
+    normalized = re.sub(r"\s+", " ", normalized).strip().rstrip(";").strip()
+    normalized = re.sub(r"(?i)\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", "IN (?)", normalized)
+    return normalized.lower()
+
+def fingerprint_query(sql: str) -> str:
+    """
+    Stable identifier of a normalized query
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        Hex fingerprint
+    """
+    return hashlib.sha1(normalize_query(sql).encode("utf-8")).hexdigest()[:16]
+
+class QueryLog:
+    """
+    Per-fingerprint execution counters plus plans of slow statements, kept in a side database
+
+    Records are buffered in memory and written by a background thread in one
+    transaction per batch, so executing a query never waits on a log write.
+    EXPLAIN runs once per fingerprint (on its first slow execution); later slow
+    executions share that plan instead of re-planning against the serving database.
+    """
+
+    def __init__(self, path: Optional[Path] = None, threshold_ms: Optional[float] = None,
+                 flush_seconds: Optional[float] = None):
+        """
+        Initialize query log
+
+        Args:
+            path: SQLite file for the log (defaults to DATABASE_DIR/query_log.db)
+            threshold_ms: Statements slower than this get their plan recorded
+            flush_seconds: Interval between batch writes (defaults to settings)
+        """
+        self.path = Path(path or settings.DATABASE_DIR / "query_log.db")
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS if threshold_ms is None else threshold_ms
+        self.flush_seconds = settings.QUERY_LOG_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self._explained: Optional[set] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS query_fingerprints (
+                    fingerprint TEXT PRIMARY KEY,
+                    normalized_sql TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    slow_calls INTEGER NOT NULL DEFAULT 0,
+                    total_ms REAL NOT NULL DEFAULT 0,
+                    max_ms REAL NOT NULL DEFAULT 0,
+                    total_rows INTEGER NOT NULL DEFAULT 0,
+                    first_seen TEXT,
+                    last_seen TEXT
+                );
+                CREATE TABLE IF NOT EXISTS slow_queries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    fingerprint TEXT NOT NULL,
+                    sql_text TEXT NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    query_plan TEXT,
+                    executed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_slow_queries_fingerprint ON slow_queries (fingerprint);
+            """)
+        return self._connection
+
+    def record(
+        self,
+        sql: str,
+        duration_ms: float,
+        row_count: int,
+        explain: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+    ) -> str:
+        """
+        Record one executed statement
+
+        The record is buffered; counters and slow-query plans reach the log
+        database on the next flush.
+
+        Args:
+            sql: Executed SQL query
+            duration_ms: Execution time in milliseconds
+            row_count: Number of rows returned
+            explain: Callable returning EXPLAIN QUERY PLAN rows, used for the first slow
+                statement of each fingerprint
+
+        Returns:
+            Query fingerprint
+        """
+        normalized = normalize_query(sql)
+        fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+        slow = duration_ms >= self.threshold_ms
+        now = datetime.now().isoformat(timespec="seconds")
+
+        with self._pending_lock:
+            self._pending.append((fingerprint, normalized, sql, duration_ms, row_count, slow, now, explain))
+            pending = len(self._pending)
+            if self._writer is None and not self._closed:
+                self._start_writer()
+
+        if pending >= FLUSH_BATCH_SIZE:
+            self._wake.set()
+        return fingerprint
+
+    def _start_writer(self):
+        """Start the background thread that writes buffered records"""
+        self._writer = threading.Thread(target=self._write_loop, name="query-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Query log error: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        Write buffered records to the log database
+
+        Records are aggregated per fingerprint and written in one transaction.
+
+        Returns:
+            Number of records written
+        """
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        if self._explained is None:
+            with self._lock:
+                self._explained = {
+                    row[0] for row in self._connect().execute(
+                        "SELECT DISTINCT fingerprint FROM slow_queries WHERE query_plan IS NOT NULL"
+                    )
+                }
+
+        counters: Dict[str, Dict[str, Any]] = {}
+        slow_rows = []
+        for fingerprint, normalized, sql, duration_ms, row_count, slow, now, explain in batch:
+            counter = counters.setdefault(fingerprint, {
+                "normalized": normalized, "calls": 0, "slow_calls": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "total_rows": 0, "first_seen": now, "last_seen": now
+            })
+            counter["calls"] += 1
+            counter["slow_calls"] += int(slow)
+            counter["total_ms"] += duration_ms
+            counter["max_ms"] = max(counter["max_ms"], duration_ms)
+            counter["total_rows"] += row_count
+            counter["last_seen"] = now
+
+            if slow:
+                plan = None
+                if explain is not None and fingerprint not in self._explained:
+                    self._explained.add(fingerprint)
+                    try:
+                        plan = json.dumps(explain(sql))
+                    except Exception as e:
+                        plan = json.dumps([{"detail": f"EXPLAIN failed: {str(e)}"}])
+                slow_rows.append((fingerprint, sql, duration_ms, row_count, plan, now))
+
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT INTO query_fingerprints "
+                "(fingerprint, normalized_sql, calls, slow_calls, total_ms, max_ms, total_rows, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET calls = calls + excluded.calls, "
+                "slow_calls = slow_calls + excluded.slow_calls, total_ms = total_ms + excluded.total_ms, "
+                "max_ms = MAX(max_ms, excluded.max_ms), total_rows = total_rows + excluded.total_rows, "
+                "last_seen = excluded.last_seen",
+                [
+                    (fingerprint, c["normalized"], c["calls"], c["slow_calls"], c["total_ms"],
+                     c["max_ms"], c["total_rows"], c["first_seen"], c["last_seen"])
+                    for fingerprint, c in counters.items()
+                ]
+            )
+            connection.executemany(
+                "INSERT INTO slow_queries (fingerprint, sql_text, duration_ms, row_count, query_plan, executed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                slow_rows
+            )
+            connection.commit()
+
+        return len(batch)
+
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        self.flush()
+        with self._lock:
+            cursor = self._connect().execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_fingerprints(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """
+        Get per-fingerprint counters, most expensive first
+
+        Args:
+            limit: Maximum number of fingerprints
+            order_by: Column to sort by ('total_ms', 'max_ms', 'calls' or 'slow_calls')
+
+        Returns:
+            List of fingerprint summaries
+        """
+        if order_by not in ("total_ms", "max_ms", "calls", "slow_calls"):
+            raise Exception(f"Cannot order fingerprints by {order_by}")
+        return self._rows(
+            f"SELECT *, total_ms / calls AS avg_ms FROM query_fingerprints "
+            f"ORDER BY {order_by} DESC LIMIT ?",
+            (limit,)
+        )
+
+    def get_slow_queries(self, fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get recorded slow statements with their query plans
+
+        Statements logged after their fingerprint was explained carry the
+        fingerprint's sampled plan.
+
+        Args:
+            fingerprint: Only return statements with this fingerprint
+
+        Returns:
+            List of slow query records
+        """
+        if fingerprint:
+            rows = self._rows("SELECT * FROM slow_queries WHERE fingerprint = ? ORDER BY id", (fingerprint,))
+        else:
+            rows = self._rows("SELECT * FROM slow_queries ORDER BY id")
+
+        plans = {}
+        for row in rows:
+            if row["query_plan"] and row["fingerprint"] not in plans:
+                plans[row["fingerprint"]] = row["query_plan"]
+        for row in rows:
+            plan = row["query_plan"] or plans.get(row["fingerprint"])
+            row["query_plan"] = json.loads(plan) if plan else []
+        return rows
+
+    def clear(self):
+        """Delete all recorded statements"""
+        with self._pending_lock:
+            self._pending = []
+        with self._lock:
+            self._explained = set()
+            connection = self._connect()
+            connection.execute("DELETE FROM query_fingerprints")
+            connection.execute("DELETE FROM slow_queries")
+            connection.commit()
+
+    def close(self):
+        """Write buffered records, stop the writer thread and close the log database"""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+        self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+# Global query log instance
+query_log = QueryLog()
@@ -0,0 +1,116 @@
+"""
+Lightweight query result for small row counts, read straight from a DB-API cursor
+"""
+from typing import Any, Dict, List, Optional, Union
+import pandas as pd
+
+class QueryResult:
+    """Column names plus a list of row tuples, converted to pandas only on demand"""
+
+    def __init__(self, columns: List[str], rows: List[tuple]):
+        """
+        Initialize result
+
+        Args:
+            columns: Column names
+            rows: Row tuples
+        """
+        self.columns = columns
+        self.rows = rows
+        self._types: Optional[List[str]] = None
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._dataframe: Optional[pd.DataFrame] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        """True without rows or columns, like DataFrame.empty"""
+        return not self.rows or not self.columns
+
+    @property
+    def types(self) -> List[str]:
+        """
+        Column types named as pandas would infer them from the same rows
+
+        Integer columns with NULLs become float64, as in read_sql_query.
+        """
+        if self._types is None:
+            self._types = []
+            for i in range(len(self.columns)):
+                kinds = {type(row[i]) for row in self.rows}
+                has_null = type(None) in kinds
+                kinds.discard(type(None))
+                if kinds and kinds <= {int} and not has_null:
+                    self._types.append("int64")
+                elif kinds and kinds <= {int, float}:
+                    self._types.append("float64")
+                else:
+                    self._types.append("object")
+        return self._types
+
+    def column(self, index: int) -> List[Any]:
+        """Values of one column"""
+        return [row[index] for row in self.rows]
+
+    def is_numeric(self, index: int) -> bool:
+        """Whether a column holds numbers only"""
+        return self.types[index] != "object"
+
+    def records(self, max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Rows as dictionaries, shared between the display and chart formats
+
+        Args:
+            max_rows: Maximum rows to return
+
+        Returns:
+            List of row dictionaries
+        """
+        if self._records is None:
+            self._records = [dict(zip(self.columns, row)) for row in self.rows]
+        return self._records if max_rows is None else self._records[:max_rows]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Convert to a DataFrame for nodes that need pandas operations
+
+        Returns:
+            DataFrame built like pandas.read_sql_query builds it
+        """
+        if self._dataframe is None:
+            self._dataframe = pd.DataFrame.from_records(self.rows, columns=self.columns, coerce_float=True)
+        return self._dataframe
+
+def read_result(cursor, small_rows: int) -> Union[QueryResult, pd.DataFrame]:
+    """
+    Read an executed cursor, keeping small results out of pandas
+
+    Args:
+        cursor: DB-API cursor with a pending result
+        small_rows: Largest row count returned as a QueryResult
+
+    Returns:
+        QueryResult for up to small_rows rows, DataFrame otherwise
+    """
+    columns = [description[0] for description in cursor.description or []]
+    rows = cursor.fetchmany(small_rows + 1)
+    if len(rows) <= small_rows:
+        return QueryResult(columns, [tuple(row) for row in rows])
+    rows.extend(cursor.fetchall())
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+def to_dataframe(result: Union[QueryResult, pd.DataFrame, None]) -> Optional[pd.DataFrame]:
+    """
+    Get a DataFrame from either result type
+
+    Args:
+        result: Query result
+
+    Returns:
+        DataFrame, or None for no result
+    """
+    if isinstance(result, QueryResult):
+        return result.to_dataframe()
+    return result
@@ -0,0 +1,629 @@
+"""
+Stratified samples of the large tables for approximate query answers
+"""
+import re
+import math
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from backend.config import settings
+from backend.database.sql_parsing import (
+    paren_depths, mask_literals, find_top_level_keyword, select_items,
+    select_list_span, replace_table_references, referenced_tables,
+    split_top_level, TABLE_FOLLOW_KEYWORDS
+)
+
+# Table recording population and sample sizes
+SAMPLE_METADATA_TABLE = "sample_metadata"
+
+# Table recording population and sample sizes of every stratum
+SAMPLE_STRATA_TABLE = "sample_strata"
+
+# Sampled tables grouped by sampling unit: tables in one family share the
+# unit weights, tables from different families cannot be mixed in one query
+SAMPLE_FAMILIES = {
+    "orders": ["orders", "order_items", "fact_order_items"],
+    "geolocation": ["geolocation"]
+}
+
+SAMPLE_TABLE_SUFFIX = "_sample"
+
+# Normal quantile for 95% confidence bounds
+CONFIDENCE_LEVEL = 0.95
+CONFIDENCE_Z = 1.96
+
+# Estimates less precise than this are not worth showing before the exact result
+MAX_RELATIVE_ERROR = 0.5
+
+# COUNT(DISTINCT ...) of these columns grows with the number of sampled orders
+SCALABLE_DISTINCT_COLUMNS = (
+    "order_id", "customer_id", "customer_unique_id",
+    "order_key", "customer_key", "customer_unique_key"
+)
+
+# Question wording that signals a rough answer is acceptable
+APPROXIMATE_KEYWORDS = [
+    "roughly", "approximately", "approximate", "approx", "estimate", "ballpark",
+    "about how", "around how", "rough idea", "quick look"
+]
+
+def _stratified_sample(df: pd.DataFrame, strata: List[str], fraction: float,
+                       seed: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Proportional stratified sample with at least one row per stratum
+
+    Rounding and the one-row minimum sample small strata at a higher rate than
+    large ones, so every sampled row carries its stratum's weight
+    (stratum rows / sampled rows).
+
+    Args:
+        df: Rows to sample from
+        strata: Columns defining the strata
+        fraction: Sampling fraction
+        seed: Random seed
+
+    Returns:
+        Tuple of (sampled rows with sample_stratum and sample_weight columns,
+        population and sample size of every stratum)
+    """
+    rng = np.random.default_rng(seed)
+    picked, sizes = [], []
+    for stratum, (_, group) in enumerate(df.groupby(strata, dropna=False, sort=False)):
+        size = max(1, int(round(len(group) * fraction)))
+        picked.append(group.index.values[rng.permutation(len(group))[:size]])
+        sizes.append({"stratum": stratum, "population_units": len(group), "sample_units": size})
+
+    sizes = pd.DataFrame(sizes, columns=["stratum", "population_units", "sample_units"])
+    sampled = df.loc[np.concatenate(picked)].copy() if picked else df.iloc[0:0].copy()
+    counts = sizes["sample_units"].to_numpy()
+    sampled["sample_stratum"] = np.repeat(sizes["stratum"].to_numpy(), counts)
+    sampled["sample_weight"] = np.repeat((sizes["population_units"] / sizes["sample_units"]).to_numpy(), counts)
+    return sampled, sizes
+
+def build_samples(db_manager, fraction: Optional[float] = None, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """
+    Build stratified sample tables for approximate execution
+
+    Orders are stratified by customer state and purchase month; order items
+    and fact rows follow their sampled orders so joins stay consistent.
+    Geolocation rows are stratified by state. Every sample row gets its
+    sampling unit (sample_unit), stratum (sample_stratum) and weight
+    (sample_weight).
+
+    Args:
+        db_manager: Database manager to use
+        fraction: Sampling fraction (defaults to settings)
+        seed: Random seed for reproducible samples
+
+    Returns:
+        Dictionary of table name to population/sample sizes
+    """
+    fraction = fraction or settings.APPROXIMATE_SAMPLE_FRACTION
+    summary, strata = {}, []
+
+    orders = db_manager.execute_query(
+        "SELECT o.order_key, c.customer_state, "
+        "o.purchase_yyyymm AS purchase_month "
+        "FROM orders o LEFT JOIN customers c ON o.customer_key = c.customer_key",
+        rewrite=False
+    )
+    sampled, sizes = _stratified_sample(orders, ["customer_state", "purchase_month"], fraction, seed)
+    sampled.rename(columns={"order_key": "sample_unit"})[["sample_unit", "sample_stratum", "sample_weight"]].to_sql(
+        "sample_order_ids", db_manager.engine, if_exists="replace", index=False
+    )
+    strata.append(sizes.assign(family="orders"))
+
+    statements = []
+    for table in SAMPLE_FAMILIES["orders"]:
+        statements += [
+            f"DROP TABLE IF EXISTS {table}{SAMPLE_TABLE_SUFFIX}",
+            f"CREATE TABLE {table}{SAMPLE_TABLE_SUFFIX} AS "
+            f"SELECT t.*, s.sample_unit, s.sample_stratum, s.sample_weight "
+            f"FROM {table} t JOIN sample_order_ids s ON s.sample_unit = t.order_key"
+        ]
+    statements += [
+        "DROP TABLE sample_order_ids",
+        "CREATE INDEX idx_orders_sample_order_id ON orders_sample (order_id)",
+        "CREATE INDEX idx_orders_sample_customer_id ON orders_sample (customer_id)",
+        "CREATE INDEX idx_order_items_sample_order_id ON order_items_sample (order_id)",
+        "CREATE INDEX idx_order_items_sample_product_id ON order_items_sample (product_id)",
+        "CREATE INDEX idx_orders_sample_order_key ON orders_sample (order_key)",
+        "CREATE INDEX idx_orders_sample_customer_key ON orders_sample (customer_key)",
+        "CREATE INDEX idx_order_items_sample_order_key ON order_items_sample (order_key)",
+        "CREATE INDEX idx_order_items_sample_product_key ON order_items_sample (product_key)",
+        "CREATE INDEX idx_fact_order_items_sample_order_key ON fact_order_items_sample (order_key)"
+    ]
+    for statement in statements:
+        db_manager.execute_raw_query(statement)
+
+    summary["orders"] = {"population_rows": len(orders), "sample_rows": len(sampled)}
+
+    geolocation = db_manager.execute_query(
+        "SELECT rowid AS source_rowid, geolocation_state FROM geolocation", rewrite=False
+    )
+    geo_sampled, geo_sizes = _stratified_sample(geolocation, ["geolocation_state"], fraction, seed)
+    geo_sampled.rename(columns={"source_rowid": "sample_unit"})[["sample_unit", "sample_stratum", "sample_weight"]].to_sql(
+        "sample_geolocation_rowids", db_manager.engine, if_exists="replace", index=False
+    )
+    strata.append(geo_sizes.assign(family="geolocation"))
+
+    for statement in [
+        "DROP TABLE IF EXISTS geolocation_sample",
+        "CREATE TABLE geolocation_sample AS "
+        "SELECT g.*, s.sample_unit, s.sample_stratum, s.sample_weight "
+        "FROM geolocation g JOIN sample_geolocation_rowids s ON s.sample_unit = g.rowid",
+        "DROP TABLE sample_geolocation_rowids",
+        "CREATE INDEX idx_geolocation_sample_zip ON geolocation_sample (geolocation_zip_code_prefix)"
+    ]:
+        db_manager.execute_raw_query(statement)
+
+    summary["geolocation"] = {"population_rows": len(geolocation), "sample_rows": len(geo_sampled)}
+
+    pd.DataFrame([
+        {
+            "family": family,
+            "population_rows": sizes["population_rows"],
+            "sample_rows": sizes["sample_rows"],
+            "fraction": sizes["sample_rows"] / sizes["population_rows"] if sizes["population_rows"] else 0.0
+        }
+        for family, sizes in summary.items()
+    ]).to_sql(SAMPLE_METADATA_TABLE, db_manager.engine, if_exists="replace", index=False)
+    pd.concat(strata, ignore_index=True).to_sql(SAMPLE_STRATA_TABLE, db_manager.engine, if_exists="replace", index=False)
+
+    approximate_executor.refresh()
+    return summary
+
+def is_exploratory_question(question: str) -> bool:
+    """
+    Check whether a question asks for a rough answer
+
+    Args:
+        question: User question
+
+    Returns:
+        True if approximate execution is acceptable
+    """
+    question = question.lower()
+    return any(re.search(rf"\b{re.escape(keyword)}\b", question) for keyword in APPROXIMATE_KEYWORDS)
+
+def _unwrap_call(expression: str, functions: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """
+    Match an expression that is exactly one call to one of the given functions
+
+    Args:
+        expression: SQL expression
+        functions: Upper-case function names
+
+    Returns:
+        (function name, argument text) or None
+    """
+    match = re.match(r"(?is)\s*([A-Z_]+)\s*\(", expression)
+    if not match or match.group(1).upper() not in functions:
+        return None
+
+    body = expression.rstrip()
+    open_at = match.end() - 1
+    depths = paren_depths(mask_literals(body))
+    # The call's closing parenthesis must be the last character
+    if not body.endswith(")") or any(
+        depths[i] == depths[open_at] and body[i] == ")" for i in range(open_at + 1, len(body) - 1)
+    ):
+        return None
+    return match.group(1).upper(), body[open_at + 1:-1]
+
+def classify_aggregate(expression: str) -> str:
+    """
+    Classify a select-list expression for sample scaling
+
+    Args:
+        expression: SQL expression
+
+    Returns:
+        'count', 'sum', 'avg', 'distinct_count', 'other_aggregate' or 'group'
+    """
+    inner = expression
+    rounded = _unwrap_call(inner, ("ROUND",))
+    if rounded:
+        inner = re.sub(r"(?s),\s*\d+\s*$", "", rounded[1])
+
+    call = _unwrap_call(inner, ("COUNT", "SUM", "TOTAL", "AVG"))
+    if call:
+        function, argument = call
+        if re.match(r"(?i)\s*DISTINCT\b", argument):
+            if function == "COUNT" and argument.strip().lower().endswith(SCALABLE_DISTINCT_COLUMNS):
+                return "distinct_count"
+            return "other_aggregate"
+        if function == "COUNT":
+            return "count"
+        return "avg" if function == "AVG" else "sum"
+
+    if re.search(r"(?i)\b(COUNT|SUM|TOTAL|AVG|MIN|MAX|GROUP_CONCAT)\s*\(", expression):
+        return "other_aggregate"
+    return "group"
+
+def _aggregate_call(expression: str) -> Optional[Tuple[str, str]]:
+    """(function, argument) of the COUNT/SUM/TOTAL/AVG call inside an expression"""
+    rounded = _unwrap_call(expression, ("ROUND",))
+    if rounded:
+        expression = re.sub(r"(?s),\s*\d+\s*$", "", rounded[1])
+    return _unwrap_call(expression, ("COUNT", "SUM", "TOTAL", "AVG"))
+
+def _weighted_call(function: str, argument: str, weight: str) -> str:
+    """Weighted estimate replacing one aggregate call over the sample"""
+    if re.match(r"(?i)\s*DISTINCT\b", argument):
+        if function == "COUNT" and argument.strip().lower().endswith(SCALABLE_DISTINCT_COLUMNS):
+            # Distinct ids scaled by the mean weight of the rows they came from
+            return f"(COUNT({argument}) * SUM({weight}) / COUNT(*))"
+        return f"{function}({argument})"
+    if function == "COUNT":
+        if argument.strip() == "*":
+            return f"COALESCE(SUM({weight}), 0)"
+        return f"COALESCE(SUM(CASE WHEN ({argument}) IS NOT NULL THEN {weight} END), 0)"
+    if function == "AVG":
+        return f"(SUM({weight} * ({argument})) / SUM(CASE WHEN ({argument}) IS NOT NULL THEN {weight} END))"
+    return f"{function}({weight} * ({argument}))"
+
+def weight_aggregates(expression: str, weight: str) -> str:
+    """
+    Rewrite the COUNT/SUM/TOTAL/AVG calls of an expression into weighted estimates
+
+    Window calls (followed by OVER) combine already estimated values, so only
+    their arguments are rewritten.
+
+    Args:
+        expression: SQL expression or clause
+        weight: Qualified weight column of the sampled rows
+
+    Returns:
+        Rewritten expression
+    """
+    masked = mask_literals(expression)
+    depths = paren_depths(masked)
+
+    pieces, last = [], 0
+    for match in re.finditer(r"\b(COUNT|SUM|TOTAL|AVG)\s*\(", masked, re.IGNORECASE):
+        if match.start() < last:
+            continue
+        open_at = match.end() - 1
+        close_at = next(
+            (i for i in range(open_at + 1, len(masked)) if masked[i] == ")" and depths[i] == depths[open_at]),
+            None
+        )
+        if close_at is None:
+            break
+
+        argument = expression[open_at + 1:close_at]
+        if re.match(r"\s*OVER\b", masked[close_at + 1:], re.IGNORECASE):
+            replacement = expression[match.start():open_at + 1] + weight_aggregates(argument, weight) + ")"
+        else:
+            replacement = _weighted_call(match.group(1).upper(), argument, weight)
+
+        pieces.append(expression[last:match.start()])
+        pieces.append(replacement)
+        last = close_at + 1
+    pieces.append(expression[last:])
+    return "".join(pieces)
+
+def _sample_qualifier(sql: str, tables: List[str]) -> Optional[str]:
+    """Alias (or name) of the first outermost FROM/JOIN reference to one of the tables"""
+    masked = mask_literals(sql)
+    depths = paren_depths(masked)
+    names = "|".join(re.escape(name) for name in sorted(tables, key=len, reverse=True))
+    pattern = rf"\b(?:FROM|JOIN)\s+({names})\b(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?"
+    for match in re.finditer(pattern, masked, re.IGNORECASE):
+        if depths[match.start()] != 0:
+            continue
+        alias = match.group(2)
+        return alias if alias and alias.lower() not in TABLE_FOLLOW_KEYWORDS else match.group(1)
+    return None
+
+def _stratified_variance(units: pd.DataFrame, strata: pd.DataFrame, values: pd.Series) -> pd.Series:
+    """
+    Variance of the estimated total of a per-unit value in every result group
+
+    Units are drawn without replacement within strata, so stratum h adds
+    N_h^2 (1 - n_h/N_h) s_h^2 / n_h, where s_h^2 is the spread of the value over
+    all n_h sampled units of the stratum (units outside the group count as 0).
+    Strata with a single sampled unit have no spread of their own and are
+    collapsed: their expanded totals N_h * y_h are compared with each other.
+
+    Args:
+        units: Per-unit rows with __group and __stratum columns
+        strata: Population and sample sizes indexed by stratum
+        values: Per-unit values aligned with units
+
+    Returns:
+        Variance indexed by __group
+    """
+    frame = pd.DataFrame({
+        "group": units["__group"].to_numpy(),
+        "stratum": units["__stratum"].to_numpy(),
+        "total": values.to_numpy(),
+        "squares": values.to_numpy() ** 2
+    })
+    per_stratum = frame.groupby(["group", "stratum"], sort=False)[["total", "squares"]].sum().reset_index()
+
+    population = per_stratum["stratum"].map(strata["population_units"]).astype(float).to_numpy()
+    sampled = per_stratum["stratum"].map(strata["sample_units"]).astype(float).to_numpy()
+    total, squares = per_stratum["total"].to_numpy(), per_stratum["squares"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = (squares - total ** 2 / sampled) / (sampled - 1)
+        per_stratum["variance"] = np.where(
+            sampled > 1, population ** 2 * (1 - sampled / population) * np.maximum(spread, 0) / sampled, 0.0
+        )
+    variance = per_stratum.groupby("group")["variance"].sum()
+
+    collapsed = (strata["sample_units"] == 1) & (strata["population_units"] > 1)
+    pooled = int(collapsed.sum())
+    singles = (sampled == 1) & (population > 1)
+    if singles.any():
+        expanded = pd.DataFrame({"group": per_stratum["group"][singles], "total": (population * total)[singles]})
+        expanded["squares"] = expanded["total"] ** 2
+        sums = expanded.groupby("group")[["total", "squares"]].sum()
+        if pooled > 1:
+            pooled_variance = pooled / (pooled - 1) * (sums["squares"] - sums["total"] ** 2 / pooled)
+        else:
+            pooled_variance = sums["squares"]
+        variance = variance.add(pooled_variance.clip(lower=0), fill_value=0)
+    return variance
+
+class ApproximateExecutor:
+    """Runs aggregate queries against the stratified samples with per-stratum weights"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize approximate executor
+
+        Args:
+            db_manager: Database manager to execute through (defaults to global manager)
+        """
+        self._db_manager = db_manager
+        self._sample_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+        self._strata: Optional[Dict[str, pd.DataFrame]] = None
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def refresh(self):
+        """Drop cached sample sizes so they are re-read on next use"""
+        self._sample_metadata = None
+        self._strata = None
+
+    def get_sample_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get population and sample sizes per sample family
+
+        Returns:
+            Dictionary keyed by family (empty if samples were not built)
+        """
+        if self._sample_metadata is None:
+            try:
+                df = self.db_manager.execute_query(f"SELECT * FROM {SAMPLE_METADATA_TABLE}", rewrite=False)
+                self._sample_metadata = {row["family"]: row for row in df.to_dict("records")}
+            except Exception:
+                self._sample_metadata = {}
+        return self._sample_metadata
+
+    def get_strata(self, family: str) -> Optional[pd.DataFrame]:
+        """
+        Get population and sample sizes of a family's strata
+
+        Args:
+            family: Sample family
+
+        Returns:
+            DataFrame indexed by stratum, or None if samples were not built
+        """
+        if self._strata is None:
+            try:
+                df = self.db_manager.execute_query(f"SELECT * FROM {SAMPLE_STRATA_TABLE}", rewrite=False)
+                self._strata = {
+                    name: group.set_index("stratum")[["population_units", "sample_units"]]
+                    for name, group in df.groupby("family")
+                }
+            except Exception:
+                self._strata = {}
+        return self._strata.get(family)
+
+    def rewrite(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Plan the sample version of a query
+
+        Aggregates become weighted sums over the sample rows. A second query
+        returns per-unit values of every estimated column, one row per result
+        group, stratum and sampling unit, for the variance.
+
+        Args:
+            query: Prepared SQL query
+
+        Returns:
+            Plan with the weighted query, the per-unit query and the select
+            items, or None if the query cannot be answered approximately
+        """
+        families = [
+            family for family, tables in SAMPLE_FAMILIES.items()
+            if referenced_tables(query, tables)
+        ]
+        samples = self.get_sample_metadata()
+        if len(families) != 1 or families[0] not in samples:
+            return None
+
+        # HAVING filters on per-group estimates the sample query does not produce
+        if find_top_level_keyword(query, "HAVING") is not None:
+            return None
+
+        items = select_items(query)
+        kinds = [classify_aggregate(expression) for expression, _ in items]
+        if not any(kind != "group" for kind in kinds):
+            return None
+
+        # Subqueries in the select list would be weighted with the outer rows
+        if any(re.search(r"(?i)\bSELECT\b", mask_literals(expression)) for expression, _ in items):
+            return None
+
+        groups = [name for (_, name), kind in zip(items, kinds) if kind == "group"]
+        if len(set(groups)) != len(groups):
+            return None
+
+        family = families[0]
+        meta = samples[family]
+        if not meta["sample_rows"]:
+            return None
+
+        qualifier = _sample_qualifier(query, SAMPLE_FAMILIES[family])
+        if qualifier is None:
+            return None
+        weight = f"{qualifier}.sample_weight"
+
+        span = select_list_span(query)
+        order_at = find_top_level_keyword(query, "ORDER", span[1])
+        limit_at = find_top_level_keyword(query, "LIMIT", span[1])
+        tail_at = order_at if order_at is not None else len(query)
+        body_end = min(p for p in (order_at, limit_at, len(query)) if p is not None)
+
+        # Weighted items keep the output name the original query gives them
+        parts = []
+        for part, (expression, name) in zip(split_top_level(query[span[0]:span[1]]), items):
+            estimate = weight_aggregates(expression, weight)
+            if estimate == expression:
+                parts.append(part.strip())
+            else:
+                quoted = name.replace('"', '""')
+                parts.append(f'{estimate} AS "{quoted}"')
+        weighted = (
+            query[:span[0]] + " " + ", ".join(parts) + " "
+            + query[span[1]:tail_at] + weight_aggregates(query[tail_at:], weight)
+        )
+
+        # Same positions as the select list so GROUP BY ordinals keep working
+        columns, extras = [], []
+        for i, ((expression, name), kind) in enumerate(zip(items, kinds)):
+            call = _aggregate_call(expression) if kind not in ("group", "other_aggregate") else None
+            if kind == "group":
+                columns.append(f'{expression} AS "{name}"')
+            elif call is None:
+                columns.append(f"NULL AS __other_{i}")
+            elif kind in ("count", "distinct_count"):
+                columns.append(f"COUNT({call[1]}) AS __value_{i}")
+            else:
+                columns.append(f"SUM({call[1]}) AS __value_{i}")
+                if kind == "avg":
+                    extras.append(f"COUNT({call[1]}) AS __count_{i}")
+
+        units = f"{qualifier}.sample_stratum, {qualifier}.sample_unit"
+        body = query[span[1]:body_end].rstrip().rstrip(";").rstrip()
+        has_group_by = find_top_level_keyword(query, "GROUP", span[1]) is not None
+        unit_query = (
+            f"SELECT {', '.join(columns + extras)}, {qualifier}.sample_stratum AS __stratum "
+            f"{body} " + (f", {units}" if has_group_by else f"GROUP BY {units}")
+        )
+
+        replacements = {table: table + SAMPLE_TABLE_SUFFIX for table in SAMPLE_FAMILIES[family]}
+        return {
+            "query": replace_table_references(weighted, replacements),
+            "unit_query": replace_table_references(unit_query, replacements),
+            "family": family,
+            "items": items,
+            "kinds": kinds,
+            "groups": groups,
+            "fraction": meta["sample_rows"] / meta["population_rows"]
+        }
+
+    def execute(self, query: str, max_relative_error: Optional[float] = None) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        Execute a query approximately against the samples
+
+        Every sampled row is weighted by its stratum's population/sample size,
+        so SUM and COUNT columns are unbiased totals and AVG columns weighted
+        means. Error bounds are 95% half-widths from the stratified variance of
+        the per-unit values (linearized for AVG).
+
+        Args:
+            query: SQL query string
+            max_relative_error: Largest acceptable bound/estimate ratio (defaults to MAX_RELATIVE_ERROR)
+
+        Returns:
+            Tuple of (estimated results, approximation info), or None if the query
+            cannot be answered approximately or the estimate is too imprecise
+        """
+        start = time.perf_counter()
+        plan = self.rewrite(self.db_manager.prepare_query(query))
+        if plan is None:
+            return None
+        strata = self.get_strata(plan["family"])
+        if strata is None:
+            return None
+
+        result = self.db_manager.execute_query(plan["query"], rewrite=False)
+        units = self.db_manager.execute_query(plan["unit_query"], rewrite=False)
+
+        # Number every result group so per-unit rows can be matched to result rows
+        groups = plan["groups"]
+        if groups:
+            units["__group"] = units.groupby(groups, dropna=False, sort=False).ngroup()
+            keys = units[groups + ["__group"]].drop_duplicates("__group")
+            result_groups = result[groups].merge(keys, on=groups, how="left")["__group"].to_numpy()
+        else:
+            units["__group"] = 0
+            result_groups = np.zeros(len(result), dtype=int)
+
+        weights = (units["__stratum"].map(strata["population_units"]) / units["__stratum"].map(strata["sample_units"])).astype(float)
+
+        error_bounds, relative_errors = {}, []
+        for i, ((_, name), kind) in enumerate(zip(plan["items"], plan["kinds"])):
+            if kind in ("group", "other_aggregate"):
+                continue
+
+            estimate = pd.to_numeric(result.iloc[:, i], errors="coerce").astype(float).to_numpy()
+            values = pd.to_numeric(units[f"__value_{i}"], errors="coerce").astype(float).fillna(0)
+
+            if kind == "avg":
+                # Linearized ratio: residuals around the group mean, scaled by the estimated count
+                counts = units[f"__count_{i}"].astype(float).fillna(0)
+                weighted_values = (weights * values).groupby(units["__group"]).sum()
+                weighted_counts = (weights * counts).groupby(units["__group"]).sum()
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    ratio = weighted_values / weighted_counts
+                    residuals = values - units["__group"].map(ratio).fillna(0) * counts
+                    variance = _stratified_variance(units, strata, residuals) / weighted_counts ** 2
+            else:
+                variance = _stratified_variance(units, strata, values)
+
+            variance = pd.Series(result_groups).map(variance).astype(float).to_numpy()
+            if kind in ("count", "distinct_count"):
+                result.isetitem(i, estimate.round(0))
+            elif kind == "sum":
+                result.isetitem(i, estimate.round(2))
+
+            half_width = CONFIDENCE_Z * np.sqrt(np.nan_to_num(variance))
+            error_bounds[name] = [None if math.isnan(v) else round(float(v), 4) for v in half_width]
+            relative_errors.extend(
+                abs(bound / value) for bound, value in zip(half_width, estimate)
+                if value and not math.isnan(bound) and not math.isnan(value)
+            )
+
+        limit = MAX_RELATIVE_ERROR if max_relative_error is None else max_relative_error
+        max_relative_error = max(relative_errors) if relative_errors else None
+        if max_relative_error is not None and max_relative_error > limit:
+            return None
+
+        info = {
+            "approximate": True,
+            "sample_family": plan["family"],
+            "sample_fraction": round(plan["fraction"], 4),
+            "confidence": CONFIDENCE_LEVEL,
+            "error_bounds": error_bounds,
+            "max_relative_error": round(float(max_relative_error), 4) if max_relative_error is not None else None,
+            "sample_query": plan["query"],
+            "execution_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+        return result, info
+
+# Global approximate executor instance
+approximate_executor = ApproximateExecutor()
@@ -0,0 +1,151 @@
+"""
+SQL functions for common e-commerce calculations, registered on the SQLite
+connections that run queries calling them
+"""
+import re
+from bisect import bisect_right
+from datetime import datetime, date, timezone
+from functools import lru_cache
+from typing import Optional, Tuple
+from sqlalchemy import event
+
+# Upper bounds (BRL) of the price_bucket labels; prices from the last bound up are '1000+'
+PRICE_BUCKETS = [50, 100, 200, 500, 1000]
+
+PRICE_BUCKET_LABELS = [
+    f"{low}-{high}" for low, high in zip([0] + PRICE_BUCKETS[:-1], PRICE_BUCKETS)
+] + [f"{PRICE_BUCKETS[-1]}+"]
+
+def _year_month(value) -> Optional[Tuple[int, int]]:
+    """Year and month of a 'YYYY-MM-DD ...' text or epoch-second timestamp"""
+    if isinstance(value, str):
+        # Slicing the text is several times faster than parsing it
+        if len(value) >= 7 and value[4] == "-":
+            try:
+                return int(value[:4]), int(value[5:7])
+            except ValueError:
+                return None
+        return None
+    if isinstance(value, (int, float)):
+        moment = datetime.fromtimestamp(value, timezone.utc)
+        return moment.year, moment.month
+    return None
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp(value) -> Optional[datetime]:
+    """datetime of a text or epoch-second timestamp (timestamps repeat across rows, so parses are cached)"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    return None
+
+def _weekdays_between(start: date, end: date) -> int:
+    """Monday-to-Friday days in [start, end), negative when end is before start"""
+    if end < start:
+        return -_weekdays_between(end, start)
+    weeks, rest = divmod((end - start).days, 7)
+    first = start.weekday()
+    return weeks * 5 + sum(1 for offset in range(rest) if (first + offset) % 7 < 5)
+
+def quarter(value) -> Optional[int]:
+    """Calendar quarter (1-4) of a timestamp"""
+    parts = _year_month(value)
+    return (parts[1] + 2) // 3 if parts else None
+
+def yyyymm(value) -> Optional[int]:
+    """Year and month of a timestamp as an integer (201803)"""
+    parts = _year_month(value)
+    return parts[0] * 100 + parts[1] if parts else None
+
+def delivery_days(start, end) -> Optional[float]:
+    """Days between two timestamps, with the fraction (JULIANDAY(end) - JULIANDAY(start))"""
+    if start is None or end is None:
+        return None
+    first, last = _parse_timestamp(start), _parse_timestamp(end)
+    if first is None or last is None:
+        return None
+    return (last - first).total_seconds() / 86400
+
+def business_days(start, end) -> Optional[int]:
+    """Weekdays from the start date up to (not including) the end date"""
+    if start is None or end is None:
+        return None
+    first, last = _parse_timestamp(start), _parse_timestamp(end)
+    if first is None or last is None:
+        return None
+    return _weekdays_between(first.date(), last.date())
+
+def price_bucket(price) -> Optional[str]:
+    """Price band label ('0-50', '50-100', ..., '1000+')"""
+    if price is None:
+        return None
+    try:
+        return PRICE_BUCKET_LABELS[bisect_right(PRICE_BUCKETS, float(price))]
+    except (TypeError, ValueError):
+        return None
+
+def pct_of_total(part, total) -> Optional[float]:
+    """Percentage of a total rounded to 2 decimals; NULL when the total is NULL or 0"""
+    if part is None or not total:
+        return None
+    return round(100.0 * part / total, 2)
+
+# Function name -> (implementation, argument count, usage shown in the schema prompt)
+SQL_FUNCTIONS = {
+    "quarter": (quarter, 1, "quarter(date) -> 1-4"),
+    "yyyymm": (yyyymm, 1, "yyyymm(date) -> 201803"),
+    "delivery_days": (delivery_days, 2, "delivery_days(start, end) -> days as REAL"),
+    "business_days": (business_days, 2, "business_days(start, end) -> weekdays from start up to end"),
+    "price_bucket": (price_bucket, 1, f"price_bucket(price) -> {', '.join(repr(label) for label in PRICE_BUCKET_LABELS)}"),
+    "pct_of_total": (
+        pct_of_total, 2,
+        "pct_of_total(part, total) -> percent, e.g. pct_of_total(SUM(price), SUM(SUM(price)) OVER ())"
+    )
+}
+
+FUNCTION_CALL_PATTERN = re.compile(rf"\b(?:{'|'.join(SQL_FUNCTIONS)})\s*\(", re.IGNORECASE)
+
+def register_functions(connection):
+    """
+    Register the SQL functions on a sqlite3 connection
+
+    Args:
+        connection: sqlite3 connection
+    """
+    for name, (function, arguments, _) in SQL_FUNCTIONS.items():
+        # Deterministic functions can be used in indexes and factored out of loops
+        connection.create_function(name, arguments, function, deterministic=True)
+
+def register_on_engine(engine):
+    """
+    Register the SQL functions on every connection a SQLAlchemy engine opens
+
+    Args:
+        engine: SQLite engine
+    """
+    event.listen(engine, "connect", lambda dbapi_connection, _: register_functions(dbapi_connection))
+
+def uses_sql_functions(query: str) -> bool:
+    """
+    Whether a query calls one of the registered functions
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        True if the query needs a connection with the functions registered
+    """
+    return bool(FUNCTION_CALL_PATTERN.search(query))
+
+def format_function_docs() -> str:
+    """
+    Describe the functions for LLM prompts
+
+    Returns:
+        One line per function
+    """
+    return "\n".join(f"   - {usage}" for _, _, usage in SQL_FUNCTIONS.values())
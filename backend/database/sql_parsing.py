@@ -0,0 +1,230 @@
+"""
+Lightweight SQL text helpers used by query rewriters
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Keywords that can follow a table name instead of an alias
+TABLE_FOLLOW_KEYWORDS = {
+    "on", "using", "where", "join", "left", "right", "inner", "outer", "cross",
+    "natural", "full", "group", "order", "limit", "having", "union", "except",
+    "intersect", "window", "as"
+}
+
+def mask_literals(sql: str) -> str:
+    """
+    Replace the contents of string literals and quoted identifiers with spaces
+
+    Keeps character offsets stable so positions found in the masked text can be
+    used on the original query.
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        Masked SQL string of the same length
+    """
+    return re.sub(
+        r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"",
+        lambda m: m.group(0)[0] + " " * (len(m.group(0)) - 2) + m.group(0)[-1],
+        sql
+    )
+
+def paren_depths(sql: str) -> List[int]:
+    """
+    Parenthesis nesting depth at every character of a (masked) query
+
+    Args:
+        sql: SQL query string with literals masked
+
+    Returns:
+        List of depths, one per character
+    """
+    depths, depth = [], 0
+    for ch in sql:
+        if ch == ")":
+            depth -= 1
+        depths.append(depth)
+        if ch == "(":
+            depth += 1
+    return depths
+
+def find_top_level_keyword(sql: str, keyword: str, start: int = 0) -> Optional[int]:
+    """
+    Find the first occurrence of a keyword outside parentheses and literals
+
+    Args:
+        sql: SQL query string
+        keyword: Keyword to find (case-insensitive, whole word)
+        start: Offset to start searching from
+
+    Returns:
+        Character offset, or None if not found
+    """
+    masked = mask_literals(sql)
+    depths = paren_depths(masked)
+    for match in re.finditer(rf"\b{keyword}\b", masked[start:], re.IGNORECASE):
+        position = start + match.start()
+        if depths[position] == 0:
+            return position
+    return None
+
+def split_top_level(text: str, separator: str = ",") -> List[str]:
+    """
+    Split text on a separator that is outside parentheses and literals
+
+    Args:
+        text: Text to split
+        separator: Single-character separator
+
+    Returns:
+        List of parts
+    """
+    masked = mask_literals(text)
+    depths = paren_depths(masked)
+    parts, last = [], 0
+    for i, ch in enumerate(masked):
+        if ch == separator and depths[i] == 0:
+            parts.append(text[last:i])
+            last = i + 1
+    parts.append(text[last:])
+    return parts
+
+def select_list_span(sql: str) -> Optional[Tuple[int, int]]:
+    """
+    Locate the select list of the outermost SELECT
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        (start, end) offsets of the text between SELECT and FROM, or None for
+        queries this helper does not handle (CTEs, compound selects)
+    """
+    if re.match(r"\s*WITH\b", sql, re.IGNORECASE):
+        return None
+    if any(find_top_level_keyword(sql, kw) is not None for kw in ("UNION", "EXCEPT", "INTERSECT")):
+        return None
+
+    select_at = find_top_level_keyword(sql, "SELECT")
+    if select_at is None:
+        return None
+    start = select_at + len("SELECT")
+
+    distinct = re.match(r"\s+(DISTINCT|ALL)\b", sql[start:], re.IGNORECASE)
+    if distinct:
+        start += distinct.end()
+
+    from_at = find_top_level_keyword(sql, "FROM", start)
+    if from_at is None:
+        return None
+    return start, from_at
+
+def select_items(sql: str) -> List[Tuple[str, str]]:
+    """
+    Parse the outermost select list into (expression, output column name) pairs
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        List of (expression, column name) tuples (empty if not parseable)
+    """
+    span = select_list_span(sql)
+    if span is None:
+        return []
+
+    items = []
+    for part in split_top_level(sql[span[0]:span[1]]):
+        part = part.strip()
+        explicit = re.match(r"(?s)(.*\S)\s+AS\s+([A-Za-z_]\w*|\"[^\"]+\")$", part, re.IGNORECASE)
+        implicit = re.match(r"(?s)(.*[\w\)\"'])\s+([A-Za-z_]\w*)$", part)
+
+        if explicit:
+            expression, name = explicit.group(1), explicit.group(2).strip('"')
+        elif implicit and implicit.group(2).lower() not in ("end", "distinct"):
+            expression, name = implicit.group(1), implicit.group(2)
+        elif re.fullmatch(r"[\w\.]+", part):
+            # SQLite names qualified columns by the bare column name
+            expression, name = part, part.split(".")[-1]
+        else:
+            expression, name = part, part
+        items.append((expression, name))
+    return items
+
+def replace_table_references(sql: str, replacements: dict) -> str:
+    """
+    Point FROM/JOIN references of tables at other relations, keeping aliases valid
+
+    A reference without an alias gets the original table name as its alias so
+    qualified column references keep working.
+
+    Args:
+        sql: SQL query string
+        replacements: Mapping of table name to replacement relation (name or
+            parenthesized subquery)
+
+    Returns:
+        Rewritten SQL query
+    """
+    if not replacements:
+        return sql
+
+    masked = mask_literals(sql)
+    names = "|".join(re.escape(name) for name in sorted(replacements, key=len, reverse=True))
+    pattern = re.compile(rf"\b(FROM|JOIN)(\s+)({names})\b(\s+(?:AS\s+)?([A-Za-z_]\w*))?", re.IGNORECASE)
+
+    pieces, last = [], 0
+    for match in pattern.finditer(masked):
+        table = match.group(3)
+        replacement = replacements.get(table) or replacements.get(table.lower())
+        alias = match.group(5)
+        has_alias = alias is not None and alias.lower() not in TABLE_FOLLOW_KEYWORDS
+
+        pieces.append(sql[last:match.start()])
+        pieces.append(f"{match.group(1)}{match.group(2)}{replacement}")
+        if has_alias:
+            pieces.append(sql[match.start(4):match.end(4)])
+            last = match.end()
+        else:
+            pieces.append(f" AS {table}")
+            last = match.end(3)
+    pieces.append(sql[last:])
+    return "".join(pieces)
+
+def referenced_tables(sql: str, candidates) -> set:
+    """
+    Find which of the candidate tables appear in FROM/JOIN clauses
+
+    Args:
+        sql: SQL query string
+        candidates: Iterable of table names
+
+    Returns:
+        Set of referenced candidate names
+    """
+    masked = mask_literals(sql)
+    found = set()
+    for name in candidates:
+        if re.search(rf"\b(?:FROM|JOIN)\s+{re.escape(name)}\b", masked, re.IGNORECASE):
+            found.add(name)
+    return found
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """
+    Map aliases (and bare names) to tables from FROM/JOIN clauses
+
+    Args:
+        sql: SQL query string
+
+    Returns:
+        Dictionary of alias to table name
+    """
+    aliases = {}
+    masked = mask_literals(sql)
+    for match in re.finditer(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", masked, re.IGNORECASE):
+        table, alias = match.group(1), match.group(2)
+        aliases[table] = table
+        if alias and alias.lower() not in TABLE_FOLLOW_KEYWORDS:
+            aliases[alias] = table
+    return aliases
@@ -0,0 +1,228 @@
+"""
+Integer surrogate keys for the hex identifiers and views exposing the original IDs
+and timestamps
+"""
+import re
+from typing import Dict, List, Optional
+import pandas as pd
+from backend.database.models import Base
+from backend.database.sql_parsing import mask_literals, table_aliases
+
+# Source identifier column -> (mapping table, surrogate key column)
+SURROGATE_KEYS = {
+    "order_id": ("order_ids", "order_key"),
+    "customer_id": ("customer_ids", "customer_key"),
+    "customer_unique_id": ("customer_unique_ids", "customer_unique_key"),
+    "product_id": ("product_ids", "product_key"),
+    "seller_id": ("seller_ids", "seller_key"),
+    "review_id": ("review_ids", "review_key")
+}
+
+# Table name seen by queries -> physical table keyed by surrogate keys
+KEYED_TABLES = {
+    "orders": "orders_data",
+    "order_items": "order_items_data",
+    "order_payments": "order_payments_data",
+    "order_reviews": "order_reviews_data",
+    "customers": "customers_data",
+    "sellers": "sellers_data",
+    "products": "products_data"
+}
+
+# Surrogate key column -> (mapping table, identifier column)
+KEY_COLUMNS = {key: (table, id_column) for id_column, (table, key) in SURROGATE_KEYS.items()}
+
+# alias.<entity>_id = alias.<entity>_id
+IDENTIFIER_JOIN_PATTERN = re.compile(
+    r"(?<![\w.])([A-Za-z_]\w*)\.(\w+_id)\s*==?\s*([A-Za-z_]\w*)\.(\w+_id)\b"
+)
+
+# alias.<entity>_id = 'literal'
+IDENTIFIER_LITERAL_PATTERN = re.compile(
+    r"(?<![\w.])([A-Za-z_]\w*)\.(\w+_id)\s*==?\s*('\s*')"
+)
+
+def physical_table(table_name: str) -> str:
+    """
+    Physical table behind a table name used in queries
+
+    Args:
+        table_name: Table or view name
+
+    Returns:
+        Physical table name
+    """
+    return KEYED_TABLES.get(table_name, table_name)
+
+class SurrogateKeyAssigner:
+    """Assigns dense integer keys to source identifiers during ingestion"""
+
+    def __init__(self, db_manager):
+        """
+        Initialize key assigner
+
+        Args:
+            db_manager: Database manager holding the mapping tables
+        """
+        self.db_manager = db_manager
+        self._maps: Dict[str, Dict[str, int]] = {}
+
+    def reset(self):
+        """Recreate empty mapping tables so keys are assigned from 1"""
+        for mapping_table, _ in SURROGATE_KEYS.values():
+            table = Base.metadata.tables[mapping_table]
+            table.drop(self.db_manager.engine, checkfirst=True)
+            table.create(self.db_manager.engine)
+        self._maps = {}
+
+    def _assign(self, id_column: str, values: pd.Series) -> Dict[str, int]:
+        """Assign keys to identifiers not seen yet, in order of first appearance"""
+        mapping = self._maps.setdefault(id_column, {})
+        new_ids = [value for value in pd.unique(values.dropna()) if value not in mapping]
+        if not new_ids:
+            return mapping
+
+        start = len(mapping) + 1
+        rows = [(start + i, value) for i, value in enumerate(new_ids)]
+        mapping.update({value: key for key, value in rows})
+
+        mapping_table, key_column = SURROGATE_KEYS[id_column]
+        with self.db_manager.engine.begin() as connection:
+            connection.exec_driver_sql(
+                f"INSERT INTO {mapping_table} ({key_column}, {id_column}) VALUES (?, ?)", rows
+            )
+        return mapping
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace identifier columns with their surrogate keys
+
+        Args:
+            df: Source rows
+
+        Returns:
+            Rows with *_key columns in place of the *_id columns
+        """
+        df = df.copy()
+        for id_column, (_, key_column) in SURROGATE_KEYS.items():
+            if id_column not in df.columns:
+                continue
+            mapping = self._assign(id_column, df[id_column])
+            df.insert(df.columns.get_loc(id_column), key_column, df[id_column].map(mapping))
+            df = df.drop(columns=[id_column])
+        return df
+
+def view_definition(view_name: str, partition: Optional[str] = None) -> str:
+    """
+    Build the view exposing a keyed table under its original name and columns
+
+    Identifiers are joined back from the mapping tables. SQLite flattens the
+    view into the outer query, so predicates on an identifier use the unique
+    index of its mapping table, and LEFT JOINs to mapping tables a query does
+    not read are dropped. The surrogate keys are exposed as extra columns, and
+    epoch-second timestamps are formatted back to text.
+
+    Args:
+        view_name: Original table name
+        partition: Partition suffix; builds <view_name>_<partition> over
+            <physical table>_<partition> instead
+
+    Returns:
+        CREATE VIEW statement
+    """
+    table = Base.metadata.tables[KEYED_TABLES[view_name]]
+    source = f"{table.name}_{partition}" if partition else table.name
+    name = f"{view_name}_{partition}" if partition else view_name
+    select_list: List[str] = []
+    key_columns: List[str] = []
+    joins: List[str] = []
+
+    for column in table.columns:
+        if column.name in KEY_COLUMNS:
+            mapping_table, id_column = KEY_COLUMNS[column.name]
+            alias = f"m_{column.name}"
+            select_list.append(f"{alias}.{id_column} AS {id_column}")
+            joins.append(
+                f"LEFT JOIN {mapping_table} {alias} ON {alias}.{column.name} = {source}.{column.name}"
+            )
+            key_columns.append(f"{source}.{column.name}")
+        elif column.info.get("epoch"):
+            select_list.append(f"DATETIME({source}.{column.name}, 'unixepoch') AS {column.name}")
+        else:
+            select_list.append(f"{source}.{column.name}")
+
+    # Unaliased so query plans name the physical table
+    return (
+        f"CREATE VIEW {name} AS SELECT {', '.join(select_list + key_columns)} FROM {source} "
+        + " ".join(joins)
+    )
+
+def rewrite_identifier_predicates(query: str) -> str:
+    """
+    Compare surrogate keys instead of identifiers read through the views
+
+    An optimisation only: the views answer identifier predicates through the
+    mapping tables' indexes, but comparing keys skips those lookups. Joins
+    between two identifiers of the same kind are rewritten to compare the
+    keys, and comparisons with a literal look the key up once. Only qualified
+    references to the keyed views are rewritten; the result is the same
+    because keys and identifiers map one to one.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        Rewritten SQL query
+    """
+    aliases = table_aliases(query)
+    masked = mask_literals(query)
+
+    def keyed(alias: str) -> bool:
+        return aliases.get(alias) in KEYED_TABLES
+
+    edits = []
+    for match in IDENTIFIER_JOIN_PATTERN.finditer(masked):
+        left_alias, left_column, right_alias, right_column = match.groups()
+        if left_column != right_column or left_column not in SURROGATE_KEYS:
+            continue
+        if not (keyed(left_alias) and keyed(right_alias)):
+            continue
+        key_column = SURROGATE_KEYS[left_column][1]
+        edits.append((match.start(), match.end(), f"{left_alias}.{key_column} = {right_alias}.{key_column}"))
+
+    for match in IDENTIFIER_LITERAL_PATTERN.finditer(masked):
+        alias, column = match.group(1), match.group(2)
+        if column not in SURROGATE_KEYS or not keyed(alias):
+            continue
+        mapping_table, key_column = SURROGATE_KEYS[column]
+        literal = query[match.start(3):match.end(3)]
+        edits.append((
+            match.start(), match.end(),
+            f"{alias}.{key_column} = (SELECT {key_column} FROM {mapping_table} WHERE {column} = {literal})"
+        ))
+
+    for start, end, replacement in sorted(edits, reverse=True):
+        query = query[:start] + replacement + query[end:]
+    return query
+
+def create_views(db_manager) -> List[str]:
+    """
+    Create the views with the original table names, replacing legacy tables
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Names of the created views
+    """
+    existing = db_manager.execute_query(
+        "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')", rewrite=False
+    )
+    existing = dict(zip(existing["name"], existing["type"]))
+
+    for view_name in KEYED_TABLES:
+        if view_name in existing:
+            db_manager.execute_raw_query(f"DROP {existing[view_name].upper()} {view_name}")
+        db_manager.execute_raw_query(view_definition(view_name))
+
+    return list(KEYED_TABLES)
@@ -0,0 +1,195 @@
+"""
+SQLite FTS5 full-text indexes over category names and review text
+"""
+from typing import Dict, Any, List
+from backend.database.value_index import normalize_value
+
+CATEGORY_SEARCH_TABLE = "category_search"
+REVIEW_SEARCH_TABLE = "review_search"
+
+# unicode61 splits on '_' and other punctuation; remove_diacritics folds
+# "eletrônicos" and "eletronicos" to the same token at index and query time
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Suffixes of the shadow tables FTS5 creates next to each virtual table
+FTS_SHADOW_SUFFIXES = ("data", "idx", "content", "docsize", "config")
+
+# Tokens shorter than this are not searched
+MIN_TOKEN_LENGTH = 2
+
+# Storage tables behind the virtual tables, never queried directly
+SEARCH_SHADOW_TABLES = {
+    f"{table}_{suffix}"
+    for table in (CATEGORY_SEARCH_TABLE, REVIEW_SEARCH_TABLE) for suffix in FTS_SHADOW_SUFFIXES
+}
+
+def is_search_table(name: str) -> bool:
+    """
+    Whether a table is a full-text index or one of its shadow tables
+
+    Args:
+        name: Table name
+
+    Returns:
+        True for FTS5 tables, which other engines cannot read
+    """
+    return name in (CATEGORY_SEARCH_TABLE, REVIEW_SEARCH_TABLE) or name in SEARCH_SHADOW_TABLES
+
+def build_search_indexes(db_manager) -> Dict[str, int]:
+    """
+    Recreate the category and review full-text indexes
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Dictionary of index table to number of indexed rows
+    """
+    db_manager.execute_raw_query(f"DROP TABLE IF EXISTS {CATEGORY_SEARCH_TABLE}")
+    db_manager.execute_raw_query(
+        f"CREATE VIRTUAL TABLE {CATEGORY_SEARCH_TABLE} USING fts5("
+        f"product_category_name, product_category_name_english, "
+        f"tokenize = '{FTS_TOKENIZER}', prefix = '2 3')"
+    )
+    # Categories of products without a translation are indexed by their Portuguese name
+    db_manager.execute_raw_query(f"""
+        INSERT INTO {CATEGORY_SEARCH_TABLE} (product_category_name, product_category_name_english)
+        SELECT product_category_name, product_category_name_english
+        FROM product_category_name_translation
+        WHERE product_category_name IS NOT NULL
+        UNION
+        SELECT DISTINCT p.product_category_name, NULL
+        FROM products_data p
+        WHERE p.product_category_name IS NOT NULL
+          AND p.product_category_name NOT IN (
+              SELECT product_category_name FROM product_category_name_translation
+              WHERE product_category_name IS NOT NULL
+          )
+    """)
+
+    db_manager.execute_raw_query(f"DROP TABLE IF EXISTS {REVIEW_SEARCH_TABLE}")
+    db_manager.execute_raw_query(
+        f"CREATE VIRTUAL TABLE {REVIEW_SEARCH_TABLE} USING fts5("
+        f"review_key UNINDEXED, order_key UNINDEXED, review_score UNINDEXED, "
+        f"review_comment_title, review_comment_message, "
+        f"tokenize = '{FTS_TOKENIZER}')"
+    )
+    db_manager.execute_raw_query(f"""
+        INSERT INTO {REVIEW_SEARCH_TABLE}
+            (review_key, order_key, review_score, review_comment_title, review_comment_message)
+        SELECT review_key, order_key, review_score, review_comment_title, review_comment_message
+        FROM order_reviews_data
+        WHERE review_comment_title IS NOT NULL OR review_comment_message IS NOT NULL
+    """)
+
+    counts = {}
+    for table in (CATEGORY_SEARCH_TABLE, REVIEW_SEARCH_TABLE):
+        db_manager.execute_raw_query(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        result = db_manager.execute_query(f"SELECT COUNT(*) AS count FROM {table}", rewrite=False)
+        counts[table] = int(result['count'].iloc[0])
+    return counts
+
+def match_expression(text: str, match_all: bool = False) -> str:
+    """
+    Build an FTS5 MATCH expression of prefix terms from free text
+
+    Tokens are normalized to [a-z0-9] and quoted, so user input never reaches
+    the FTS5 query syntax or the SQL string.
+
+    Args:
+        text: Search text
+        match_all: Require every token instead of any
+
+    Returns:
+        MATCH expression, or empty string when the text has no searchable tokens
+    """
+    tokens = [token for token in normalize_value(text).split() if len(token) >= MIN_TOKEN_LENGTH]
+    tokens = list(dict.fromkeys(tokens))
+    return (" AND " if match_all else " OR ").join(f'"{token}"*' for token in tokens)
+
+class TextSearch:
+    """Ranked lookups over the full-text indexes built at ingest"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize text search
+
+        Args:
+            db_manager: Database manager to query (defaults to global manager)
+        """
+        self._db_manager = db_manager
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def search_categories(self, text: str, limit: int = 5, match_all: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find categories by Portuguese or English name
+
+        Args:
+            text: Search text (accents and case are ignored)
+            limit: Maximum matches to return
+            match_all: Require every search term
+
+        Returns:
+            List of dicts with both category names and a rank (lower is better)
+        """
+        expression = match_expression(text, match_all)
+        if not expression:
+            return []
+
+        sql = (
+            f"SELECT product_category_name, product_category_name_english, bm25({CATEGORY_SEARCH_TABLE}) AS rank "
+            f"FROM {CATEGORY_SEARCH_TABLE} WHERE {CATEGORY_SEARCH_TABLE} MATCH '{expression}' "
+            f"ORDER BY rank LIMIT {int(limit)}"
+        )
+        return self.db_manager.execute_query(sql, rewrite=False).to_dict('records')
+
+    def search_reviews(self, text: str, limit: int = 10, match_all: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find reviews whose title or message mention the search terms
+
+        Args:
+            text: Search text (accents and case are ignored)
+            limit: Maximum matches to return
+            match_all: Require every search term
+
+        Returns:
+            List of dicts with review and order IDs, score, text, a highlighted
+            snippet and a rank (lower is better)
+        """
+        expression = match_expression(text, match_all)
+        if not expression:
+            return []
+
+        sql = (
+            f"SELECT r.review_id, o.order_id, s.review_score, s.review_comment_title, s.review_comment_message, "
+            f"snippet({REVIEW_SEARCH_TABLE}, -1, '[', ']', '...', 12) AS snippet, "
+            f"bm25({REVIEW_SEARCH_TABLE}) AS rank "
+            f"FROM {REVIEW_SEARCH_TABLE} s "
+            f"JOIN review_ids r ON r.review_key = s.review_key "
+            f"JOIN order_ids o ON o.order_key = s.order_key "
+            f"WHERE {REVIEW_SEARCH_TABLE} MATCH '{expression}' "
+            f"ORDER BY rank LIMIT {int(limit)}"
+        )
+        return self.db_manager.execute_query(sql, rewrite=False).to_dict('records')
+
+    def category_names(self, text: str, limit: int = 5) -> List[str]:
+        """
+        Portuguese names of the best-matching categories, for IN filters
+
+        Args:
+            text: Search text
+            limit: Maximum names to return
+
+        Returns:
+            List of product_category_name values
+        """
+        return [match['product_category_name'] for match in self.search_categories(text, limit=limit)]
+
+# Global text search instance
+text_search = TextSearch()
@@ -0,0 +1,356 @@
+"""
+Value-linking index mapping user terms to canonical database values
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Any, List
+import pandas as pd
+
+# Table holding distinct column values computed at ingest
+VALUE_INDEX_TABLE = "value_index"
+
+# Columns whose distinct values are indexed: name -> (table, column)
+VALUE_INDEX_COLUMNS = {
+    "customer_state": ("customers", "customer_state"),
+    "customer_city": ("customers", "customer_city"),
+    "seller_city": ("sellers", "seller_city"),
+    "payment_type": ("order_payments", "payment_type"),
+    "order_status": ("orders", "order_status"),
+    "product_category_name": ("product_category_name_translation", "product_category_name"),
+    "product_category_name_english": ("product_category_name_translation", "product_category_name_english")
+}
+
+# Full state names indexed as aliases of the two-letter customer_state codes
+BRAZIL_STATE_NAMES = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia",
+    "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás",
+    "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul", "MG": "Minas Gerais",
+    "PA": "Pará", "PB": "Paraíba", "PR": "Paraná", "PE": "Pernambuco", "PI": "Piauí",
+    "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul",
+    "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo",
+    "SE": "Sergipe", "TO": "Tocantins"
+}
+
+# Words that never start or end a value span on their own
+RESOLVER_STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
+    'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be', 'do', 'does',
+    'what', 'which', 'who', 'when', 'where', 'why', 'how', 'show', 'me', 'get',
+    'find', 'list', 'give', 'top', 'most', 'best', 'all', 'each', 'per', 'my',
+    'orders', 'order', 'sales', 'sale', 'revenue', 'products', 'product', 'items',
+    'customers', 'customer', 'sellers', 'seller', 'state', 'states', 'city',
+    'cities', 'category', 'categories', 'payment', 'payments', 'status', 'average',
+    'total', 'number', 'count', 'many', 'much', 'last', 'past', 'year', 'month',
+    'months', 'quarter', 'quarters', 'than', 'more', 'less', 'compare', 'between'
+}
+
+# Connector words dropped inside spans ("bed and bath" -> "bed bath")
+SPAN_CONNECTORS = {'and', 'e', 'de', 'do', 'da', 'of', 'the', '&'}
+
+FUZZY_THRESHOLD = 0.85
+MAX_SPAN_TOKENS = 4
+
+def normalize_value(value: str) -> str:
+    """
+    Normalize a value for matching: fold accents, lowercase, split on separators
+
+    Args:
+        value: Raw value or question text
+
+    Returns:
+        Normalized string of space-separated tokens
+    """
+    folded = unicodedata.normalize("NFKD", str(value))
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"[a-z0-9]+", folded.lower()))
+
+def _trigrams(text: str) -> set:
+    """Character trigrams of a padded string"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_value_index(db_manager) -> int:
+    """
+    Build the value index table from distinct column values
+
+    Args:
+        db_manager: Database manager to use
+
+    Returns:
+        Number of indexed values
+    """
+    frames = []
+
+    for name, (table, column) in VALUE_INDEX_COLUMNS.items():
+        df = db_manager.execute_query(
+            f"SELECT {column} AS value, COUNT(*) AS frequency FROM {table} "
+            f"WHERE {column} IS NOT NULL GROUP BY {column}"
+        )
+        df["table_name"] = table
+        df["column_name"] = column
+        df["alias"] = df["value"]
+        frames.append(df)
+
+        # State names resolve to the two-letter code
+        if name == "customer_state":
+            codes = set(df["value"])
+            frames.append(pd.DataFrame([
+                {
+                    "value": code,
+                    "frequency": int(df.loc[df["value"] == code, "frequency"].iloc[0]),
+                    "table_name": table,
+                    "column_name": column,
+                    "alias": state_name
+                }
+                for code, state_name in BRAZIL_STATE_NAMES.items()
+                if code in codes
+            ]))
+
+    index_df = pd.concat(frames, ignore_index=True)
+    index_df["normalized"] = index_df["alias"].map(normalize_value)
+    index_df = index_df[index_df["normalized"] != ""]
+    index_df = index_df[["table_name", "column_name", "value", "alias", "normalized", "frequency"]]
+
+    index_df.to_sql(VALUE_INDEX_TABLE, db_manager.engine, if_exists="replace", index=False)
+    db_manager.execute_raw_query(
+        f"CREATE INDEX IF NOT EXISTS idx_{VALUE_INDEX_TABLE}_normalized "
+        f"ON {VALUE_INDEX_TABLE} (normalized)"
+    )
+
+    return len(index_df)
+
+class ValueIndex:
+    """In-memory exact, prefix and fuzzy lookup over indexed column values"""
+
+    def __init__(self, db_manager=None):
+        """
+        Initialize value index
+
+        Args:
+            db_manager: Database manager to load from (defaults to global manager)
+        """
+        self._db_manager = db_manager
+        self.loaded = False
+        self.entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.sorted_keys: List[str] = []
+        self.trigram_index: Dict[str, set] = defaultdict(set)
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from backend.database.connection import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def load(self):
+        """Load the value index table into memory"""
+        self.entries = defaultdict(list)
+        self.trigram_index = defaultdict(set)
+
+        try:
+            df = self.db_manager.execute_query(
+                f"SELECT table_name, column_name, value, alias, normalized, frequency "
+                f"FROM {VALUE_INDEX_TABLE}"
+            )
+        except Exception:
+            df = pd.DataFrame()
+
+        for record in df.to_dict("records"):
+            self.entries[record["normalized"]].append(record)
+
+        self.sorted_keys = sorted(self.entries)
+        for key in self.sorted_keys:
+            for gram in _trigrams(key):
+                self.trigram_index[gram].add(key)
+
+        self.loaded = True
+
+    def refresh(self):
+        """Force a reload on next lookup"""
+        self.loaded = False
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _matches(self, key: str, match_type: str, score: float, span: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "span": span,
+                "table": entry["table_name"],
+                "column": entry["column_name"],
+                "value": entry["value"],
+                "match_type": match_type,
+                "score": round(score, 3),
+                "frequency": int(entry["frequency"])
+            }
+            for entry in self.entries.get(key, [])
+        ]
+
+    def exact(self, term: str) -> List[Dict[str, Any]]:
+        """
+        Exact lookup of a normalized term
+
+        Args:
+            term: User term
+
+        Returns:
+            List of matches
+        """
+        self._ensure_loaded()
+        key = normalize_value(term)
+        return self._matches(key, "exact", 1.0, term)
+
+    def prefix(self, term: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Whole-word prefix lookup ("bed bath" -> "bed bath table")
+
+        Args:
+            term: User term
+            limit: Maximum number of values returned
+
+        Returns:
+            List of matches, most frequent first
+        """
+        self._ensure_loaded()
+        key = normalize_value(term)
+        if not key:
+            return []
+
+        matches = []
+        position = bisect_left(self.sorted_keys, key + " ")
+        while position < len(self.sorted_keys) and self.sorted_keys[position].startswith(key + " "):
+            candidate = self.sorted_keys[position]
+            matches.extend(self._matches(candidate, "prefix", len(key) / len(candidate), term))
+            position += 1
+
+        matches.sort(key=lambda m: m["frequency"], reverse=True)
+        return matches[:limit]
+
+    def fuzzy(self, term: str, limit: int = 3, threshold: float = FUZZY_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Fuzzy lookup using trigram candidates and sequence similarity
+
+        Args:
+            term: User term
+            limit: Maximum number of values returned
+            threshold: Minimum similarity ratio
+
+        Returns:
+            List of matches, most similar first
+        """
+        self._ensure_loaded()
+        key = normalize_value(term)
+        if len(key) < 4:
+            return []
+
+        grams = _trigrams(key)
+        candidate_counts: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                candidate_counts[candidate] += 1
+
+        scored = []
+        for candidate, shared in candidate_counts.items():
+            if shared < len(grams) / 2:
+                continue
+            ratio = SequenceMatcher(None, key, candidate).ratio()
+            if ratio >= threshold:
+                scored.append((ratio, candidate))
+
+        scored.sort(reverse=True)
+        matches = []
+        for ratio, candidate in scored[:limit]:
+            matches.extend(self._matches(candidate, "fuzzy", ratio, term))
+        return matches
+
+    def resolve(self, question: str) -> List[Dict[str, Any]]:
+        """
+        Resolve question spans to canonical database values
+
+        Longest spans are tried first; exact matches win over prefix matches,
+        which win over fuzzy matches. Two-letter state codes only match when
+        written in upper case to avoid linking words like "to" or "am".
+
+        Args:
+            question: Natural language question
+
+        Returns:
+            List of non-overlapping matches
+        """
+        self._ensure_loaded()
+        if not self.entries:
+            return []
+
+        raw_tokens = re.findall(r"[^\W_]+", question)
+        tokens = [normalize_value(token) for token in raw_tokens]
+        used = [False] * len(tokens)
+        resolved: List[Dict[str, Any]] = []
+
+        def spans(max_tokens: int):
+            for size in range(max_tokens, 0, -1):
+                for start in range(len(tokens) - size + 1):
+                    end = start + size
+                    if any(used[start:end]):
+                        continue
+                    if tokens[start] in RESOLVER_STOP_WORDS or tokens[end - 1] in RESOLVER_STOP_WORDS:
+                        continue
+                    words = [t for t in tokens[start:end] if t not in SPAN_CONNECTORS]
+                    if words:
+                        yield start, end, " ".join(raw_tokens[start:end]), " ".join(words)
+                        if len(words) < size:
+                            # Also try the span with its connectors ("rio de janeiro")
+                            yield start, end, " ".join(raw_tokens[start:end]), " ".join(tokens[start:end])
+
+        def accept(start: int, end: int, span: str, matches: List[Dict[str, Any]]) -> bool:
+            if end - start == 1 and len(tokens[start]) <= 2:
+                if not raw_tokens[start].isupper():
+                    return False
+                matches = [m for m in matches if m["column"] == "customer_state"]
+            if not matches:
+                return False
+            for match in matches:
+                match["span"] = span
+            resolved.extend(matches)
+            for position in range(start, end):
+                used[position] = True
+            return True
+
+        for match_type, lookup in (("exact", self.exact), ("prefix", self.prefix), ("fuzzy", self.fuzzy)):
+            for start, end, span, words in spans(MAX_SPAN_TOKENS):
+                if any(used[start:end]):
+                    continue
+                if match_type != "exact" and len(words) < 4:
+                    continue
+                accept(start, end, span, lookup(words))
+
+        return resolved
+
+    @staticmethod
+    def format_for_prompt(matches: List[Dict[str, Any]]) -> str:
+        """
+        Format resolved values for the SQL generation prompt
+
+        Args:
+            matches: Matches from resolve()
+
+        Returns:
+            Formatted text (empty if there are no matches)
+        """
+        if not matches:
+            return ""
+
+        lines = []
+        for match in matches:
+            value = str(match["value"]).replace("'", "''")
+            lines.append(
+                f"- \"{match['span']}\" -> {match['table']}.{match['column']} = '{value}' "
+                f"({match['match_type']}, score {match['score']})"
+            )
+        return "\n".join(lines)
+
+# Global value index instance
+value_index = ValueIndex()
@@ -1,7 +1,7 @@
 """
 Enhanced LangGraph workflow with better conversational abilities
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langgraph.graph import StateGraph, END
 from backend.graph.state import AgentState, create_initial_state
 from backend.agents.router_agent import router_agent
@@ -104,6 +104,14 @@ def generate_enhanced_data_response(state: AgentState) -> Dict[str, Any]:
     # Get conversation context for continuity
     context = enhanced_memory.get_personalized_context(session_id)
     
+    approximation = state.get("approximation")
+    estimate_note = ""
+    if approximation:
+        estimate_note = (
+            f"\nNote: These figures are estimates from a {approximation['sample_fraction']:.0%} sample "
+            f"of the data; describe them as approximate.\n"
+        )
+    
     prompt = f"""Generate a comprehensive, conversational response to the user's query.
 
 User Query: {user_query}
@@ -111,7 +119,7 @@ SQL Query: {sql_query}
 Number of Results: {row_count}
 Columns: {', '.join(columns)}
 Sample Data: {sample_data}
-
+{estimate_note}
 User Context: {context}
 
 Guidelines:
@@ -141,7 +149,8 @@ Generate a similar natural, insightful response:"""
             "type": "data",
             "has_results": True,
             "row_count": row_count,
-            "insights_generated": True
+            "insights_generated": True,
+            "approximate": approximation is not None
         }
     }
 
@@ -233,7 +242,9 @@ enhanced_agent_workflow = create_enhanced_workflow()
 
 async def process_enhanced_query(
     query: str,
-    session_id: str = "default"
+    session_id: str = "default",
+    approximate: bool = False,
+    query_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Process query through enhanced workflow
@@ -241,6 +252,8 @@ async def process_enhanced_query(
     Args:
         query: User query
         session_id: Session identifier
+        approximate: Whether an approximate answer from samples is acceptable
+        query_id: Identifier for cancelling the SQL query while it runs
         
     Returns:
         Response dictionary
@@ -254,7 +267,7 @@ async def process_enhanced_query(
     )
     
     # Create initial state
-    initial_state = create_initial_state(query, session_id)
+    initial_state = create_initial_state(query, session_id, approximate, query_id)
     
     # Run workflow
     try:
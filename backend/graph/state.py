@@ -21,6 +21,10 @@ class AgentState(TypedDict):
     
     # SQL generation and execution
     sql_query: Optional[str]
+    query_id: Optional[str]  # id under which the SQL can be cancelled
+    approximate: bool  # caller accepts estimates from sample tables
+    approximation: Optional[Dict[str, Any]]
+    resolved_values: Optional[List[Dict[str, Any]]]
     query_result: Optional[Any]
     result_dataframe: Optional[Dict[str, Any]]
     
@@ -50,13 +54,20 @@ class AgentState(TypedDict):
     conversation_context: Optional[str]
     previous_results: Optional[List[Dict[str, Any]]]
 
-def create_initial_state(user_query: str, session_id: str) -> AgentState:
+def create_initial_state(
+    user_query: str,
+    session_id: str,
+    approximate: bool = False,
+    query_id: Optional[str] = None
+) -> AgentState:
     """
     Create initial state for workflow
     
     Args:
         user_query: User's query
         session_id: Session identifier
+        approximate: Whether an approximate answer from samples is acceptable
+        query_id: Identifier for cancelling the SQL query while it runs
         
     Returns:
         Initial agent state
@@ -68,6 +79,10 @@ def create_initial_state(user_query: str, session_id: str) -> AgentState:
         query_type=None,
         intent=None,
         sql_query=None,
+        query_id=query_id,
+        approximate=approximate,
+        approximation=None,
+        resolved_values=None,
         query_result=None,
         result_dataframe=None,
         search_query=None,
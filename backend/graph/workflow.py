@@ -1,7 +1,7 @@
 """
 LangGraph workflow for orchestrating multi-agent system
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langgraph.graph import StateGraph, END
 from backend.graph.state import AgentState, create_initial_state
 from backend.agents.router_agent import router_agent
@@ -60,12 +60,20 @@ def generate_data_response(state: AgentState) -> Dict[str, Any]:
     # Generate natural language response
     row_count = result_df_dict.get("row_count", 0)
     
+    approximation = state.get("approximation")
+    estimate_note = ""
+    if approximation:
+        estimate_note = (
+            f"\nNote: These figures are estimates from a {approximation['sample_fraction']:.0%} sample "
+            f"of the data; describe them as approximate.\n"
+        )
+    
     prompt = f"""Generate a friendly, conversational response to the user's question based on the query results.
 
 User's Question: {state['user_query']}
 Number of Results: {row_count}
 Sample Data: {str(result_df_dict['data'][:3])}
-
+{estimate_note}
 Guidelines:
 - Start with "Based on your question..." or "According to the data..." or similar natural phrases
 - DO NOT say "I found X results for your query"
@@ -90,7 +98,8 @@ Generate a similar natural, helpful response:"""
         "response_metadata": {
             "type": "data",
             "has_results": True,
-            "row_count": row_count
+            "row_count": row_count,
+            "approximate": approximation is not None
         }
     }
 
@@ -215,26 +224,33 @@ def create_workflow() -> StateGraph:
 # Global workflow instance
 agent_workflow = create_workflow()
 
-async def process_query(user_query: str, session_id: str = "default") -> Dict[str, Any]:
+async def process_query(
+    user_query: str,
+    session_id: str = "default",
+    approximate: bool = False,
+    query_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Process user query through the workflow
     
     Args:
         user_query: User's query
         session_id: Session identifier
+        approximate: Whether an approximate answer from samples is acceptable
+        query_id: Identifier for cancelling the SQL query while it runs
         
     Returns:
         Final state with response
     """
     # Create initial state
-    initial_state = create_initial_state(user_query, session_id)
+    initial_state = create_initial_state(user_query, session_id, approximate, query_id)
     
     # Add conversation context
     context = conversation_memory.get_context_summary(session_id)
     initial_state["conversation_context"] = context
     
-    # Run workflow
-    final_state = agent_workflow.invoke(initial_state)
+    # Run workflow; nodes execute in a thread so the event loop can still serve cancellations
+    final_state = await agent_workflow.ainvoke(initial_state)
     
     # Save to conversation memory
     conversation_memory.add_message(
@@ -59,7 +59,8 @@ class GroqClient:
         self,
         question: str,
         schema_info: str,
-        examples: str = ""
+        examples: str = "",
+        resolved_values: str = ""
     ) -> str:
         """
         Generate SQL query from natural language
@@ -68,35 +69,59 @@ class GroqClient:
             question: Natural language question
             schema_info: Database schema information
             examples: Example queries for few-shot learning
+            resolved_values: Question terms already linked to exact database values
             
         Returns:
             Generated SQL query
         """
+        resolved_section = ""
+        if resolved_values:
+            resolved_section = f"""
+RESOLVED VALUES (terms in the question linked to exact database values):
+{resolved_values}
+When a resolved value fits the question, filter with an equality predicate on that exact
+value (e.g. c.customer_state = 'SP') instead of LIKE. For category values, join
+product_category_name_translation and compare the resolved column directly.
+"""
+        
         system_prompt = f"""You are an expert SQL query generator for an e-commerce database.
         
 Database Schema:
 {schema_info}
 
 {examples}
+{resolved_section}
+PREFERRED TABLE:
+fact_order_items has one row per order item with purchase date parts, customer and seller city/state,
+both category names, price, freight, the order's payment total and review score, and delivery metrics.
+Answer from it without joins whenever it has the columns needed; join the other tables only for columns
+it lacks (IDs, product dimensions, payment types, review text). order_payment_total and order_review_score
+repeat on every item of an order, so aggregate them over one row per order, never SUM them across items.
 
 CRITICAL RULES:
 1. Product categories are in PORTUGUESE in the database
-2. When user mentions category names in ENGLISH (e.g., electronics, furniture, toys):
+2. When user mentions category names in ENGLISH (e.g., electronics, furniture, toys) outside fact_order_items:
    - ALWAYS JOIN with product_category_name_translation table
    - Use: LEFT JOIN product_category_name_translation pct ON p.product_category_name = pct.product_category_name
    - Filter using: WHERE pct.product_category_name_english LIKE '%keyword%'
    - Also check Portuguese names as fallback
-3. Use LIKE with wildcards for flexible category matching
+3. Use LIKE with wildcards for flexible category matching only when no RESOLVED VALUE applies
 4. Common mappings: electronics→eletronicos/informatica, furniture→moveis, toys→brinquedos
 
 DATE/TIME QUERIES:
-5. For quarters: Use DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-6 months') for past 2 quarters
-6. For months: Use DATE((SELECT MAX(order_purchase_timestamp) FROM orders), '-N months') for past N months
-7. For years: Use STRFTIME('%Y', date_column) to extract year
-8. For month extraction: STRFTIME('%Y-%m', date_column) for year-month format
-9. For quarter calculation: CAST((CAST(STRFTIME('%m', date_column) AS INTEGER) + 2) / 3 AS INTEGER)
-10. Always use MAX(order_purchase_timestamp) as reference point for relative dates (not CURRENT_DATE)
+5. For quarters: Use DATE('<latest purchase timestamp>', '-6 months') for past 2 quarters
+6. For months: Use DATE('<latest purchase timestamp>', '-N months') for past N months
+7. For years, months and quarters of the purchase date use the indexed integer columns of orders:
+   purchase_year (2018), purchase_month (1-12), purchase_quarter (1-4), purchase_yyyymm (201809)
+8. Group by and filter whole periods on these columns (e.g. o.purchase_yyyymm BETWEEN 201804 AND 201809), never STRFTIME(order_purchase_timestamp)
+9. For other date columns use the built-in functions quarter(date_column) (1-4) and yyyymm(date_column) (201809), never STRFTIME arithmetic
+10. Always use the literal latest purchase timestamp from DATASET REFERENCE DATES as reference point for relative dates (not CURRENT_DATE, and never a SELECT MAX() subquery)
 11. Date column: order_purchase_timestamp in orders table
+12. Delivery times: use the precomputed orders columns delivery_days, approval_hours, carrier_handoff_days,
+    days_vs_estimate and is_late (AVG(o.is_late) is the late rate), never JULIANDAY differences
+
+JOINS:
+13. Join tables and count distinct entities on the integer *_key columns (e.g. o.order_key = oi.order_key), not the *_id columns
 
 Generate ONLY the SQL query without any explanation or markdown formatting.
 Use SQLite syntax. Ensure queries are safe and optimized."""
@@ -1,16 +1,18 @@
 """
 Helper utilities for data processing and formatting
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 import re
+from backend.database.results import QueryResult
+from backend.database.compaction import result_memory_bytes
 
-def format_dataframe_for_display(df: pd.DataFrame, max_rows: int = 100) -> Dict[str, Any]:
+def format_dataframe_for_display(df: Union[pd.DataFrame, QueryResult], max_rows: int = 100) -> Dict[str, Any]:
     """
     Format DataFrame for display in frontend
     
     Args:
-        df: Pandas DataFrame
+        df: Pandas DataFrame or small QueryResult
         max_rows: Maximum rows to include
         
     Returns:
@@ -24,35 +26,46 @@ def format_dataframe_for_display(df: pd.DataFrame, max_rows: int = 100) -> Dict[
             "column_count": 0
         }
     
-    # Limit rows
-    df_display = df.head(max_rows)
-    
-    # Convert to records
-    data = df_display.to_dict('records')
-    
-    # Get column names and types
-    columns = [
-        {
-            "name": col,
-            "type": str(df[col].dtype)
-        }
-        for col in df.columns
-    ]
+    if isinstance(df, QueryResult):
+        data = df.records(max_rows)
+        columns = [{"name": name, "type": dtype} for name, dtype in zip(df.columns, df.types)]
+    else:
+        # Limit rows
+        df_display = df.head(max_rows)
+        
+        # Convert to records
+        data = df_display.to_dict('records')
+        
+        # Get column names and types
+        columns = [
+            {
+                "name": col,
+                "type": str(df[col].dtype)
+            }
+            for col in df.columns
+        ]
     
     return {
         "columns": columns,
         "data": data,
         "row_count": len(df),
         "column_count": len(df.columns),
-        "truncated": len(df) > max_rows
+        "truncated": len(df) > max_rows,
+        "memory_bytes": result_memory_bytes(df)
     }
 
-def detect_chart_type(df: pd.DataFrame) -> str:
+def _is_numeric_column(df: Union[pd.DataFrame, QueryResult], index: int) -> bool:
+    """Whether the column at a position holds numbers"""
+    if isinstance(df, QueryResult):
+        return df.is_numeric(index)
+    return pd.api.types.is_numeric_dtype(df.iloc[:, index])
+
+def detect_chart_type(df: Union[pd.DataFrame, QueryResult]) -> str:
     """
     Detect appropriate chart type based on DataFrame structure
     
     Args:
-        df: Pandas DataFrame
+        df: Pandas DataFrame or small QueryResult
         
     Returns:
         Chart type ('bar', 'line', 'pie', 'scatter', 'table')
@@ -61,24 +74,23 @@ def detect_chart_type(df: pd.DataFrame) -> str:
         return "table"
     
     # Check for time series data
-    first_col = df.iloc[:, 0]
-    if pd.api.types.is_datetime64_any_dtype(first_col) or \
+    first_is_datetime = isinstance(df, pd.DataFrame) and pd.api.types.is_datetime64_any_dtype(df.iloc[:, 0])
+    if first_is_datetime or \
        any(keyword in str(df.columns[0]).lower() for keyword in ['date', 'time', 'year', 'month']):
         return "line"
     
     # Check for categorical data with counts/values
     if len(df) <= 10 and len(df.columns) == 2:
-        second_col = df.iloc[:, 1]
-        if pd.api.types.is_numeric_dtype(second_col):
+        if _is_numeric_column(df, 1):
+            second_sum = sum(v for v in df.column(1) if v is not None) if isinstance(df, QueryResult) else df.iloc[:, 1].sum()
             # If values sum to ~100, likely percentages (pie chart)
-            if 90 <= second_col.sum() <= 110:
+            if 90 <= second_sum <= 110:
                 return "pie"
             return "bar"
     
     # Check for scatter plot (two numeric columns)
     if len(df.columns) >= 2:
-        if pd.api.types.is_numeric_dtype(df.iloc[:, 0]) and \
-           pd.api.types.is_numeric_dtype(df.iloc[:, 1]):
+        if _is_numeric_column(df, 0) and _is_numeric_column(df, 1):
             return "scatter"
     
     # Default to bar chart for categorical data
@@ -6,12 +6,13 @@ import fix_pydantic
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
 import asyncio
 import json
+import uuid
 from datetime import datetime
 
 from backend.config import settings
@@ -20,6 +21,11 @@ from backend.graph.enhanced_workflow import process_enhanced_query, enhanced_age
 from backend.memory.conversation_memory import conversation_memory
 from backend.memory.enhanced_memory import enhanced_memory
 from backend.database.connection import db_manager
+from backend.database.async_connection import async_db_manager
+from backend.database.olap_cube import olap_cube
+from backend.database.columnar import dataframe_to_arrow, arrow_to_ipc, ARROW_STREAM_MEDIA_TYPE
+from backend.utils.helpers import format_dataframe_for_display, detect_chart_type
+from backend.agents.visualizer_agent import generate_chart_config
 
 # Create FastAPI app
 app = FastAPI(
@@ -41,14 +47,19 @@ app.add_middleware(
 class QueryRequest(BaseModel):
     query: str
     session_id: Optional[str] = "default"
+    approximate: Optional[bool] = False
+    query_id: Optional[str] = None  # generated when omitted
 
 class QueryResponse(BaseModel):
     response: str
+    query_id: Optional[str] = None
     query_type: Optional[str] = None
     sql_query: Optional[str] = None
     result_data: Optional[Dict[str, Any]] = None
     chart_type: Optional[str] = None
     chart_data: Optional[Dict[str, Any]] = None
+    response_metadata: Optional[Dict[str, Any]] = None
+    approximation: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     timestamp: str
 
@@ -90,12 +101,15 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Check database connection
-        tables = db_manager.get_all_tables()
+        tables = await async_db_manager.get_user_tables()
         
         return {
             "status": "healthy",
             "database": "connected",
             "tables": len(tables),
+            "memory_replica": db_manager.get_replica_stats(),
+            "duckdb_engine": db_manager.get_duckdb_stats(),
+            "olap_cube": olap_cube.stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -121,15 +135,19 @@ async def query_endpoint(request: QueryRequest):
     """
     try:
         # Process query
-        result = await process_query(request.query, request.session_id)
+        query_id = request.query_id or uuid.uuid4().hex
+        result = await process_query(request.query, request.session_id, request.approximate, query_id)
         
         return QueryResponse(
             response=result.get("response", ""),
+            query_id=query_id,
             query_type=result.get("query_type"),
             sql_query=result.get("sql_query"),
             result_data=result.get("result_dataframe"),
             chart_type=result.get("chart_type"),
             chart_data=result.get("chart_data"),
+            response_metadata=result.get("response_metadata"),
+            approximation=result.get("approximation"),
             error=result.get("error"),
             timestamp=datetime.now().isoformat()
         )
@@ -137,6 +155,27 @@ async def query_endpoint(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/{query_id}/cancel")
+async def cancel_query_endpoint(query_id: str):
+    """
+    Cancel a running query by the query_id given or returned with its request
+    
+    Only SQL running on the process pool (SQL_EXECUTOR_MODE=process_pool) can
+    be interrupted; inline queries run to completion.
+    
+    Args:
+        query_id: Query identifier
+        
+    Returns:
+        Whether a running query was cancelled
+    """
+    try:
+        cancelled = db_manager.cancel_query(query_id)
+        return {"query_id": query_id, "cancelled": cancelled}
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/conversation/{session_id}", response_model=ConversationHistory)
 async def get_conversation(session_id: str, limit: Optional[int] = 20):
     """
@@ -178,6 +217,40 @@ async def clear_conversation(session_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/arrow")
+async def query_arrow_endpoint(request: QueryRequest):
+    """
+    Process a user query and return the result table as an Arrow IPC stream
+    
+    The response text, SQL query and chart type are carried in the schema
+    metadata, so clients read one columnar payload instead of JSON records.
+    
+    Args:
+        request: Query request with user query and session ID
+        
+    Returns:
+        Arrow IPC stream response
+    """
+    try:
+        query_id = request.query_id or uuid.uuid4().hex
+        result = await process_query(request.query, request.session_id, request.approximate, query_id)
+        
+        table = await asyncio.to_thread(dataframe_to_arrow, result.get("query_result"))
+        metadata = {
+            "response": result.get("response", ""),
+            "query_id": query_id,
+            "query_type": result.get("query_type") or "",
+            "sql_query": result.get("sql_query") or "",
+            "chart_type": result.get("chart_type") or "",
+            "error": result.get("error") or "",
+            "timestamp": datetime.now().isoformat()
+        }
+        payload = await asyncio.to_thread(arrow_to_ipc, table, metadata)
+        return Response(content=payload, media_type=ARROW_STREAM_MEDIA_TYPE)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/query/enhanced", response_model=QueryResponse)
 async def enhanced_query_endpoint(request: QueryRequest):
     """
@@ -191,15 +264,19 @@ async def enhanced_query_endpoint(request: QueryRequest):
     """
     try:
         # Process query with enhanced workflow
-        result = await process_enhanced_query(request.query, request.session_id)
+        query_id = request.query_id or uuid.uuid4().hex
+        result = await process_enhanced_query(request.query, request.session_id, request.approximate, query_id)
         
         return QueryResponse(
             response=result.get("response", ""),
+            query_id=query_id,
             query_type=result.get("query_type"),
             sql_query=result.get("sql_query"),
             result_data=result.get("result_dataframe"),
             chart_type=result.get("chart_type"),
             chart_data=result.get("chart_data"),
+            response_metadata=result.get("response_metadata"),
+            approximation=result.get("approximation"),
             error=result.get("error"),
             timestamp=datetime.now().isoformat()
         )
@@ -236,14 +313,8 @@ async def get_session_profile(session_id: str):
 async def get_stats():
     """Get system statistics"""
     try:
-        tables = db_manager.get_all_tables()
-        table_stats = {}
-        
-        for table in tables:
-            query = f"SELECT COUNT(*) as count FROM {table}"
-            result = db_manager.execute_query(query)
-            # Convert numpy int64 to Python int for JSON serialization
-            table_stats[table] = int(result['count'].iloc[0])
+        tables = await async_db_manager.get_user_tables()
+        table_stats = await async_db_manager.get_table_counts(tables)
         
         return {
             "tables": table_stats,
@@ -255,6 +326,40 @@ async def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def send_refined_result(session_id: str, sql_query: str, query_id: Optional[str] = None):
+    """
+    Run the exact query behind an approximate answer and push it to the client
+    
+    Args:
+        session_id: Session identifier
+        sql_query: SQL query that was answered from samples
+        query_id: Identifier of the original query, which also cancels the refinement
+    """
+    try:
+        result_df = await async_db_manager.execute_result(
+            sql_query,
+            query_id=query_id,
+            compact=settings.COMPACT_QUERY_RESULTS
+        )
+        chart_type = detect_chart_type(result_df) if not result_df.empty else None
+        
+        await manager.send_message(session_id, {
+            "type": "refinement",
+            "data": {
+                "query_id": query_id,
+                "sql_query": sql_query,
+                "result_data": format_dataframe_for_display(result_df),
+                "chart_type": chart_type,
+                "chart_data": generate_chart_config(result_df, chart_type) if chart_type else None,
+                "response_metadata": {"approximate": False}
+            }
+        })
+    except Exception as e:
+        await manager.send_message(session_id, {
+            "type": "error",
+            "message": f"Exact result failed: {str(e)}"
+        })
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """
@@ -273,6 +378,8 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             message = json.loads(data)
             
             query = message.get("query", "")
+            approximate = bool(message.get("approximate", False))
+            query_id = message.get("query_id") or uuid.uuid4().hex
             
             if not query:
                 await manager.send_message(session_id, {
@@ -284,26 +391,34 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             # Send processing status
             await manager.send_message(session_id, {
                 "type": "status",
-                "message": "Processing your query..."
+                "message": "Processing your query...",
+                "query_id": query_id
             })
             
             # Process query
             try:
-                result = await process_query(query, session_id)
+                result = await process_query(query, session_id, approximate, query_id)
                 
                 # Send result
                 await manager.send_message(session_id, {
                     "type": "result",
                     "data": {
+                        "query_id": query_id,
                         "response": result.get("response", ""),
                         "query_type": result.get("query_type"),
                         "sql_query": result.get("sql_query"),
                         "result_data": result.get("result_dataframe"),
                         "chart_type": result.get("chart_type"),
                         "chart_data": result.get("chart_data"),
+                        "response_metadata": result.get("response_metadata"),
+                        "approximation": result.get("approximation"),
                         "error": result.get("error")
                     }
                 })
+                
+                # Refine estimates with the exact result in the background
+                if result.get("approximation") and result.get("sql_query"):
+                    asyncio.create_task(send_refined_result(session_id, result["sql_query"], query_id))
             
             except Exception as e:
                 await manager.send_message(session_id, {
@@ -327,11 +442,44 @@ async def startup_event():
     
     # Check database
     try:
-        tables = db_manager.get_all_tables()
+        tables = await async_db_manager.get_user_tables()
         print(f"✓ Database connected: {len(tables)} tables found")
     except Exception as e:
         print(f"⚠ Database warning: {str(e)}")
     
+    # Load in-memory replica for serving reads
+    if settings.DATABASE_SERVING_MODE == "memory":
+        try:
+            replica = await async_db_manager.run(db_manager.load_memory_replica)
+            if replica:
+                print(f"✓ In-memory replica loaded in {replica['load_seconds']:.2f}s "
+                      f"({replica['size_mb']} MB, dataset version {replica['dataset_version']})")
+            else:
+                print("⚠ In-memory replica needs a file-backed SQLite database")
+        except Exception as e:
+            print(f"⚠ In-memory replica failed, serving from disk: {str(e)}")
+    
+    # Load the DuckDB copy for analytical queries
+    if settings.ANALYTICAL_ENGINE != "sqlite":
+        try:
+            duckdb_stats = await async_db_manager.run(db_manager.load_duckdb_engine)
+            if duckdb_stats:
+                print(f"✓ DuckDB engine loaded from {duckdb_stats['source']} in {duckdb_stats['load_seconds']:.2f}s "
+                      f"({duckdb_stats['tables']} tables, {duckdb_stats['rows']} rows)")
+            else:
+                print("⚠ DuckDB engine needs a file-backed SQLite database or DUCKDB_PARQUET_DIR")
+        except Exception as e:
+            print(f"⚠ DuckDB engine failed, analytical queries stay on SQLite: {str(e)}")
+    
+    # Build the OLAP cube for fact-table aggregates
+    if settings.ENABLE_OLAP_CUBE:
+        try:
+            cube = await async_db_manager.run(olap_cube.build)
+            print(f"✓ OLAP cube built in {cube['build_seconds']:.2f}s "
+                  f"({cube['cells']} cells, {cube['size_mb']} MB)")
+        except Exception as e:
+            print(f"⚠ OLAP cube unavailable, aggregates served by SQLite: {str(e)}")
+    
     print(f"✓ Server running on http://{settings.HOST}:{settings.PORT}")
     print(f"✓ API docs available at http://{settings.HOST}:{settings.PORT}/docs")
     print("=" * 60)
@@ -341,6 +489,8 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("\nShutting down E-commerce Intelligence Agent...")
+    async_db_manager.shutdown()
+    db_manager.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run(
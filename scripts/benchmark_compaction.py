@@ -0,0 +1,65 @@
+"""
+Benchmark result memory: default dtypes against compact dtypes (downcast numbers,
+categorical strings) for wide query results
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.config import settings
+from backend.database.connection import DatabaseManager
+from backend.database.compaction import compact_dataframe, memory_report
+
+DEFAULT_QUERIES = [
+    "SELECT * FROM fact_order_items",
+    "SELECT * FROM orders",
+    "SELECT customer_state, order_status, product_category_name_english, price, freight_value "
+    "FROM fact_order_items"
+]
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Compare query result memory with and without compact dtypes')
+    parser.add_argument('--query', type=str, action='append', help='SQL query (repeatable)')
+    parser.add_argument('--ratio', type=float, default=settings.CATEGORICAL_MAX_UNIQUE_RATIO,
+                        help='Largest share of distinct values for a categorical column')
+    args = parser.parse_args()
+
+    manager = DatabaseManager()
+    manager.query_log = None
+
+    print("=" * 60)
+    print("Result Memory Benchmark")
+    print("=" * 60)
+    print(f"\n{'rows':>9} {'default MB':>11} {'compact MB':>11} {'saved':>7} {'ms':>7}  query")
+
+    for query in args.query or DEFAULT_QUERIES:
+        try:
+            df = manager.execute_query(query)
+        except Exception as e:
+            print(f"❌ {query[:60]}: {str(e)}")
+            continue
+
+        start = time.perf_counter()
+        compacted = compact_dataframe(df, args.ratio)
+        compact_ms = (time.perf_counter() - start) * 1000
+
+        default, compact = memory_report(df), memory_report(compacted)
+        saved = 1 - compact["bytes"] / max(default["bytes"], 1)
+        print(f"{len(df):>9,} {default['mb']:>11.2f} {compact['mb']:>11.2f} {saved:>7.0%} {compact_ms:>7.1f}  {query[:60]}")
+
+        changed = {
+            name: f"{default['dtypes'][name]} -> {dtype}"
+            for name, dtype in compact["dtypes"].items() if dtype != default["dtypes"][name]
+        }
+        for name, change in changed.items():
+            print(f"{'':>48}{name}: {change}")
+
+    manager.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark SQLite vs DuckDB execution of the common query patterns
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+from backend.config import settings
+from backend.database.connection import DatabaseManager
+from backend.database.duckdb_engine import DuckDBEngine
+from backend.database.columnar import PARQUET_PARTITIONS
+from backend.database.queries import QUERY_PATTERNS, get_query_pattern
+
+def time_query(run, query: str, repeats: int) -> float:
+    """
+    Median wall time of a query
+
+    Args:
+        run: Callable executing a query and returning a DataFrame
+        query: SQL query string
+        repeats: Number of timed runs
+
+    Returns:
+        Median time in milliseconds
+    """
+    run(query)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def same_result(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    """Compare two results ignoring row order of ties and numeric dtype differences"""
+    if left.shape != right.shape:
+        return False
+    left = left.sort_values(list(left.columns)).reset_index(drop=True)
+    right = right.sort_values(list(right.columns)).reset_index(drop=True)
+    right.columns = left.columns
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_exact=False, rtol=1e-9)
+    except AssertionError:
+        return False
+    return True
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark SQLite vs DuckDB query engines')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query')
+    parser.add_argument('--parquet-dir', type=str, default=None,
+                        help='Also export Parquet files here and benchmark DuckDB reading them')
+    args = parser.parse_args()
+
+    manager = DatabaseManager()
+    manager.query_log = None
+    if manager.database_path is None:
+        print("❌ The benchmark needs a file-backed SQLite database")
+        return
+
+    duckdb_engine = DuckDBEngine(manager.database_path)
+    engines = {"duckdb": duckdb_engine}
+    if args.parquet_dir:
+        duckdb_engine.export_parquet(args.parquet_dir, partition_by=PARQUET_PARTITIONS)
+        engines["parquet"] = DuckDBEngine(parquet_dir=args.parquet_dir)
+
+    print("=" * 78)
+    print(f"Engine Benchmark ({len(QUERY_PATTERNS)} query patterns, median of {args.repeats} runs, "
+          f"DuckDB loaded in {duckdb_engine.load_seconds:.2f}s)")
+    print("=" * 78)
+    header = f"\n{'pattern':<22} {'sqlite ms':>10}"
+    for name in engines:
+        header += f" {name + ' ms':>12} {'speedup':>8}"
+    print(header + f" {'scan rows':>10} {'auto':>7} {'match':>6}")
+
+    manager.analytical_engine = "sqlite"
+    for pattern in QUERY_PATTERNS:
+        query = manager.prepare_query(get_query_pattern(pattern, limit=10))
+        # Compare complete results: LIMIT may cut ties differently per engine
+        full_query = manager.prepare_query(get_query_pattern(pattern, limit=-1))
+        expected = manager.execute_query(full_query, rewrite=False)
+        sqlite_ms = time_query(lambda q: manager.execute_query(q, rewrite=False), query, args.repeats)
+
+        line = f"{pattern:<22} {sqlite_ms:>10.2f}"
+        matches = True
+        for engine in engines.values():
+            engine_ms = time_query(engine.execute, query, args.repeats)
+            matches = matches and same_result(expected, engine.execute(full_query))
+            line += f" {engine_ms:>12.2f} {sqlite_ms / engine_ms:>7.2f}x"
+
+        scanned = manager.estimate_scan_rows(query, duckdb_engine.row_counts)
+        choice = "duckdb" if scanned >= settings.DUCKDB_MIN_SCAN_ROWS else "sqlite"
+        print(line + f" {scanned:>10} {choice:>7} {'yes' if matches else 'NO':>6}")
+
+    for engine in engines.values():
+        engine.close()
+    manager.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark inline vs process-pool SQL execution under concurrent load
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.database.connection import DatabaseManager
+from backend.database.queries import QUERY_PATTERNS, get_query_pattern
+
+def run_load(manager: DatabaseManager, queries: list, concurrency: int, rounds: int) -> float:
+    """
+    Run every query `rounds` times from `concurrency` threads
+
+    Args:
+        manager: Database manager to execute through
+        queries: SQL queries
+        concurrency: Number of client threads
+        rounds: Repetitions of the query set
+
+    Returns:
+        Queries per second
+    """
+    workload = queries * rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(manager.execute_query, workload))
+    return len(workload) / (time.perf_counter() - start)
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark SQL executor modes')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Client thread counts to test')
+    parser.add_argument('--rounds', type=int, default=3, help='Repetitions of the query set')
+    args = parser.parse_args()
+
+    queries = [get_query_pattern(name, limit=10) for name in QUERY_PATTERNS]
+
+    inline = DatabaseManager()
+    inline.executor_mode = "inline"
+    pooled = DatabaseManager()
+    pooled.executor_mode = "process_pool"
+
+    # Start workers and warm caches before timing
+    for manager in (inline, pooled):
+        for query in queries:
+            manager.execute_query(query)
+
+    print("=" * 60)
+    print(f"SQL Executor Benchmark ({len(queries)} queries x {args.rounds} rounds, "
+          f"{pooled.executor.size} pool workers)")
+    print("=" * 60)
+    print(f"\n{'clients':>8} {'inline q/s':>12} {'pool q/s':>12} {'speedup':>9}")
+
+    for concurrency in args.concurrency:
+        inline_qps = run_load(inline, queries, concurrency, args.rounds)
+        pooled_qps = run_load(pooled, queries, concurrency, args.rounds)
+        print(f"{concurrency:>8} {inline_qps:>12.1f} {pooled_qps:>12.1f} {pooled_qps / inline_qps:>8.2f}x")
+
+    pooled.shutdown()
+    inline.shutdown()
+
+if __name__ == "__main__":
+    main()
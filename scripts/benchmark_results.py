@@ -0,0 +1,147 @@
+"""
+Benchmark result paths: pandas/JSON against Arrow IPC for large results, and
+DataFrames against cursor rows (QueryResult) for small results
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pyarrow as pa
+from backend.database.connection import DatabaseManager
+from backend.database.columnar import arrow_to_ipc
+from backend.utils.helpers import format_dataframe_for_display, detect_chart_type
+import backend.graph  # loads the agents package in dependency order
+from backend.agents.visualizer_agent import generate_chart_config
+
+DEFAULT_QUERY = "SELECT * FROM fact_order_items"
+
+DEFAULT_SMALL_QUERY = (
+    "SELECT customer_state, COUNT(DISTINCT order_key) AS orders, SUM(price) AS revenue "
+    "FROM fact_order_items GROUP BY customer_state ORDER BY revenue DESC LIMIT 20"
+)
+
+def json_path(manager: DatabaseManager, query: str) -> tuple:
+    """Current path: DataFrame, records, JSON text; returns payload size and Arrow bytes held"""
+    df = manager.execute_query(query, rewrite=False)
+    payload = json.dumps(df.to_dict('records'), default=str)
+    return len(payload.encode()), 0
+
+def arrow_path(manager: DatabaseManager, query: str) -> tuple:
+    """Arrow path: Arrow table, IPC stream; returns payload size and Arrow bytes held"""
+    allocated = pa.total_allocated_bytes()
+    table = manager.execute_arrow(query, rewrite=False)
+    payload = arrow_to_ipc(table)
+    return len(payload), pa.total_allocated_bytes() - allocated
+
+def respond(result) -> int:
+    """Build the display and chart payloads of a data answer; returns the JSON size"""
+    chart_type = detect_chart_type(result)
+    response = {
+        "result_data": format_dataframe_for_display(result),
+        "chart_type": chart_type,
+        "chart_data": generate_chart_config(result, chart_type)
+    }
+    return len(json.dumps(response, default=str))
+
+def dataframe_request(manager: DatabaseManager, query: str) -> tuple:
+    """Small-result request through a DataFrame"""
+    return respond(manager.execute_query(query, rewrite=False)), 0
+
+def cursor_request(manager: DatabaseManager, query: str) -> tuple:
+    """Small-result request through a QueryResult"""
+    return respond(manager.execute_result(query, rewrite=False)), 0
+
+def measure(run, manager: DatabaseManager, query: str, repeats: int) -> dict:
+    """
+    Time a result path and record its peak memory
+
+    Python allocations are tracked with tracemalloc; Arrow buffers live in
+    Arrow's own memory pool, so the Arrow bytes held at the end of the run are
+    added.
+
+    Args:
+        run: Result path function
+        manager: Database manager to execute through
+        query: SQL query string
+        repeats: Number of timed runs
+
+    Returns:
+        Dictionary with median milliseconds, peak MB and payload bytes
+    """
+    payload_bytes, _ = run(manager, query)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(manager, query)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    _, arrow_bytes = run(manager, query)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms": statistics.median(timings),
+        "peak_mb": (python_peak + arrow_bytes) / (1024 * 1024),
+        "payload_bytes": payload_bytes
+    }
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs Arrow result serialization')
+    parser.add_argument('--query', type=str, default=DEFAULT_QUERY, help='SQL query returning a large result')
+    parser.add_argument('--small-query', type=str, default=DEFAULT_SMALL_QUERY,
+                        help='SQL query returning a typical small answer')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per path')
+    args = parser.parse_args()
+
+    manager = DatabaseManager()
+    manager.query_log = None
+    query = manager.prepare_query(args.query)
+    rows = manager.execute_arrow(query, rewrite=False).num_rows
+
+    print("=" * 60)
+    print(f"Result Serialization Benchmark ({rows:,} rows, median of {args.repeats} runs)")
+    print("=" * 60)
+    print(f"\n{'path':<26} {'ms':>9} {'peak MB':>9} {'payload MB':>11}")
+
+    results = {
+        "pandas -> records -> JSON": measure(json_path, manager, query, args.repeats),
+        "Arrow -> IPC stream": measure(arrow_path, manager, query, args.repeats)
+    }
+    for name, result in results.items():
+        print(f"{name:<26} {result['ms']:>9.1f} {result['peak_mb']:>9.1f} "
+              f"{result['payload_bytes'] / (1024 * 1024):>11.2f}")
+
+    baseline, arrow = results.values()
+    print(f"\n✓ Arrow path: {baseline['ms'] / arrow['ms']:.2f}x faster, "
+          f"{baseline['peak_mb'] / max(arrow['peak_mb'], 1e-9):.2f}x less peak memory")
+
+    # Per-request cost of a typical small answer: execute, display rows, chart
+    small_query = manager.prepare_query(args.small_query)
+    small_rows = len(manager.execute_query(small_query, rewrite=False))
+    print(f"\nSmall-result request ({small_rows} rows: execute, display and chart formats)")
+    print(f"\n{'path':<26} {'ms':>9} {'peak KB':>9}")
+
+    small = {
+        "DataFrame": measure(dataframe_request, manager, small_query, args.repeats * 20),
+        "QueryResult (cursor rows)": measure(cursor_request, manager, small_query, args.repeats * 20)
+    }
+    for name, result in small.items():
+        print(f"{name:<26} {result['ms']:>9.3f} {result['peak_mb'] * 1024:>9.1f}")
+
+    baseline, rows = small.values()
+    print(f"\n✓ QueryResult path: {baseline['ms'] / rows['ms']:.2f}x faster, "
+          f"{baseline['peak_mb'] / max(rows['peak_mb'], 1e-9):.2f}x less peak memory per request")
+    manager.shutdown()
+
+if __name__ == "__main__":
+    main()
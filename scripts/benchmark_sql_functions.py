@@ -0,0 +1,104 @@
+"""
+Benchmark the registered SQL functions against the inline SQL expressions they replace
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.database.connection import DatabaseManager
+
+DELIVERED = (
+    "FROM orders WHERE order_delivered_customer_date IS NOT NULL "
+    "AND order_delivered_customer_date >= order_purchase_timestamp"
+)
+
+# Monday-based weekday of the purchase date and whole days to the delivery date
+_WEEKDAY = "((CAST(STRFTIME('%w', order_purchase_timestamp) AS INTEGER) + 6) % 7)"
+_DAYS = "CAST(JULIANDAY(DATE(order_delivered_customer_date)) - JULIANDAY(DATE(order_purchase_timestamp)) AS INTEGER)"
+
+# Function -> (query using the function, equivalent query with inline SQL)
+BENCHMARKS = {
+    "quarter": (
+        "SELECT quarter(order_purchase_timestamp) AS value FROM orders",
+        "SELECT (CAST(STRFTIME('%m', order_purchase_timestamp) AS INTEGER) + 2) / 3 AS value FROM orders"
+    ),
+    "yyyymm": (
+        "SELECT yyyymm(order_purchase_timestamp) AS value FROM orders",
+        "SELECT CAST(STRFTIME('%Y%m', order_purchase_timestamp) AS INTEGER) AS value FROM orders"
+    ),
+    "delivery_days": (
+        f"SELECT delivery_days(order_purchase_timestamp, order_delivered_customer_date) AS value {DELIVERED}",
+        f"SELECT JULIANDAY(order_delivered_customer_date) - JULIANDAY(order_purchase_timestamp) AS value {DELIVERED}"
+    ),
+    "business_days": (
+        f"SELECT business_days(order_purchase_timestamp, order_delivered_customer_date) AS value {DELIVERED}",
+        f"SELECT {_DAYS} / 7 * 5 + MAX(0, MIN({_WEEKDAY} + {_DAYS} % 7, 5) - {_WEEKDAY}) "
+        f"+ MAX(0, MIN({_WEEKDAY} + {_DAYS} % 7, 12) - 7) AS value {DELIVERED}"
+    ),
+    "price_bucket": (
+        "SELECT price_bucket(price) AS value FROM order_items",
+        "SELECT CASE WHEN price < 50 THEN '0-50' WHEN price < 100 THEN '50-100' "
+        "WHEN price < 200 THEN '100-200' WHEN price < 500 THEN '200-500' "
+        "WHEN price < 1000 THEN '500-1000' ELSE '1000+' END AS value FROM order_items"
+    ),
+    "pct_of_total": (
+        "SELECT pct_of_total(SUM(price), SUM(SUM(price)) OVER ()) AS value "
+        "FROM fact_order_items GROUP BY product_category_name_english",
+        "SELECT ROUND(100.0 * SUM(price) / SUM(SUM(price)) OVER (), 2) AS value "
+        "FROM fact_order_items GROUP BY product_category_name_english"
+    )
+}
+
+def time_query(manager: DatabaseManager, query: str, repeats: int):
+    """Best wall-clock time of several runs and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = manager.execute_query(query)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Compare SQL functions with equivalent inline expressions')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per query (best time is reported)')
+    parser.add_argument('--function', type=str, action='append', choices=list(BENCHMARKS),
+                        help='Function to benchmark (repeatable, default all)')
+    args = parser.parse_args()
+
+    manager = DatabaseManager()
+    manager.query_log = None
+
+    print("=" * 60)
+    print("SQL Function Benchmark")
+    print("=" * 60)
+    print(f"\n{'function':<15} {'rows':>9} {'inline ms':>10} {'function ms':>12} {'ratio':>7}  same result")
+
+    for name in args.function or BENCHMARKS:
+        function_query, inline_query = BENCHMARKS[name]
+        try:
+            function_ms, function_result = time_query(manager, function_query, args.repeats)
+            inline_ms, inline_result = time_query(manager, inline_query, args.repeats)
+        except Exception as e:
+            print(f"❌ {name}: {str(e)}")
+            continue
+
+        left = function_result['value'].sort_values(ignore_index=True)
+        right = inline_result['value'].sort_values(ignore_index=True)
+        if left.dtype.kind == "f" or right.dtype.kind == "f":
+            same = len(left) == len(right) and bool(((left - right).abs().fillna(0) < 1e-6).all())
+        else:
+            same = left.equals(right)
+
+        ratio = function_ms / inline_ms if inline_ms else float("inf")
+        print(f"{name:<15} {len(function_result):>9,} {inline_ms:>10.1f} {function_ms:>12.1f} "
+              f"{ratio:>6.2f}x  {'✓' if same else '⚠ differs'}")
+
+    manager.shutdown()
+
+if __name__ == "__main__":
+    main()
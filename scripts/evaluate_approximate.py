@@ -0,0 +1,146 @@
+"""
+Check approximate answers from the stratified samples against exact results
+
+Rebuilds the samples with several seeds, answers every query from each
+sample and compares the estimates with the exact result. Reports the mean
+signed relative error (bias), the mean absolute relative error and how
+often the exact value falls inside the reported 95% error bound.
+"""
+import sys
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.database.connection import DatabaseManager
+from backend.database.sampling import ApproximateExecutor, build_samples
+
+# Aggregate queries covering every sample family, rare strata and each estimator
+CHECK_QUERIES = {
+    "orders_by_state": (
+        "SELECT customer_state, COUNT(DISTINCT order_key) AS orders "
+        "FROM fact_order_items GROUP BY customer_state"
+    ),
+    "revenue_by_state": (
+        "SELECT customer_state, ROUND(SUM(price), 2) AS revenue, AVG(freight_value) AS avg_freight "
+        "FROM fact_order_items GROUP BY customer_state"
+    ),
+    "orders_by_month": (
+        "SELECT purchase_yyyymm, COUNT(*) AS orders FROM orders GROUP BY purchase_yyyymm"
+    ),
+    "revenue_by_year": (
+        "SELECT o.purchase_year, COUNT(*) AS items, SUM(oi.price) AS revenue "
+        "FROM orders o JOIN order_items oi ON oi.order_id = o.order_id GROUP BY o.purchase_year"
+    ),
+    "total_revenue": (
+        "SELECT SUM(price) AS revenue, AVG(price) AS avg_price FROM fact_order_items"
+    ),
+    "zip_points_by_state": (
+        "SELECT geolocation_state, COUNT(*) AS points FROM geolocation GROUP BY geolocation_state"
+    ),
+    # Unaliased aggregates must come back under the column names of the exact query
+    "unaliased_by_year": (
+        "SELECT purchase_year, COUNT(*), SUM(price), ROUND(AVG(price), 2) "
+        "FROM fact_order_items GROUP BY purchase_year"
+    )
+}
+
+# Coverage below this suggests biased estimates or understated error bounds
+MIN_COVERAGE = 0.9
+
+def compare(exact: pd.DataFrame, estimate: pd.DataFrame, bounds: dict) -> pd.DataFrame:
+    """
+    Match estimated cells to exact cells by the group columns
+
+    Args:
+        exact: Exact query result
+        estimate: Approximate query result
+        bounds: Error bound lists per estimated column
+
+    Returns:
+        One row per estimated cell with exact value, estimate and bound
+    """
+    groups = [column for column in exact.columns if column not in bounds]
+    estimate = estimate.assign(**{f"{column}__bound": values for column, values in bounds.items()})
+    merged = exact.merge(estimate, on=groups, how="left", suffixes=("", "__estimate")) if groups else \
+        exact.assign(**{f"{column}__estimate": estimate[column].to_numpy() for column in bounds},
+                     **{f"{column}__bound": estimate[f"{column}__bound"].to_numpy() for column in bounds})
+
+    cells = []
+    for column in bounds:
+        cells.append(pd.DataFrame({
+            "column": column,
+            "exact": pd.to_numeric(merged[column], errors="coerce").astype(float),
+            "estimate": pd.to_numeric(merged[f"{column}__estimate"], errors="coerce").astype(float).fillna(0),
+            "bound": pd.to_numeric(merged[f"{column}__bound"], errors="coerce").astype(float).fillna(0)
+        }))
+    return pd.concat(cells, ignore_index=True)
+
+def main():
+    """Main check function"""
+    parser = argparse.ArgumentParser(description='Compare sample estimates with exact results')
+    parser.add_argument('--seeds', type=int, default=20, help='Number of samples to build and check')
+    parser.add_argument('--fraction', type=float, default=None, help='Sampling fraction (defaults to settings)')
+    args = parser.parse_args()
+
+    manager = DatabaseManager()
+    manager.query_log = None
+    # The DuckDB copy is not refreshed when the samples are rebuilt below
+    manager.analytical_engine = "sqlite"
+    executor = ApproximateExecutor(manager)
+
+    exact = {name: manager.execute_query(query) for name, query in CHECK_QUERIES.items()}
+    cells = {name: [] for name in CHECK_QUERIES}
+    mismatched = set()
+
+    print("=" * 60)
+    print("Approximate Answer Check")
+    print("=" * 60)
+
+    try:
+        for seed in range(args.seeds):
+            build_samples(manager, fraction=args.fraction, seed=seed)
+            executor.refresh()
+            for name, query in CHECK_QUERIES.items():
+                answer = executor.execute(query, max_relative_error=float("inf"))
+                if answer is None:
+                    print(f"❌ {name}: not answerable from the samples")
+                    continue
+                estimate, info = answer
+                if list(estimate.columns) != list(exact[name].columns) or \
+                        not set(info["error_bounds"]) <= set(estimate.columns):
+                    mismatched.add(name)
+                    print(f"❌ {name}: estimate columns {list(estimate.columns)} "
+                          f"do not match {list(exact[name].columns)}")
+                    continue
+                cells[name].append(compare(exact[name], estimate, info["error_bounds"]))
+    finally:
+        # Leave the default samples in place
+        build_samples(manager, fraction=args.fraction)
+
+    print(f"\n{'query':<22} {'column':<22} {'cells':>6} {'bias':>8} {'abs err':>8} {'coverage':>9}")
+    failures = len(mismatched)
+    for name, frames in cells.items():
+        if not frames:
+            failures += 1
+            continue
+        frame = pd.concat(frames, ignore_index=True)
+        frame = frame[frame["exact"] != 0]
+        for column, group in frame.groupby("column", sort=False):
+            relative = (group["estimate"] - group["exact"]) / group["exact"].abs()
+            covered = (group["estimate"] - group["exact"]).abs() <= group["bound"] + 1e-6
+            coverage = float(covered.mean())
+            ok = coverage >= MIN_COVERAGE
+            failures += not ok
+            print(f"{name:<22} {column:<22} {len(group):>6} {relative.mean():>+8.1%} "
+                  f"{relative.abs().mean():>8.1%} {coverage:>8.0%}  {'✓' if ok else '⚠'}")
+
+    print(f"\n{'✓ Estimates match exact results within their bounds' if not failures else f'⚠ {failures} checks failed'}")
+    manager.shutdown()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Offline text-to-SQL accuracy and latency evaluation harness
+
+Runs a golden set of questions through the router and SQL agent nodes
+concurrently, compares the returned result sets against the results of the
+expected SQL, and reports execution accuracy, route accuracy, retry rate and
+per-node latency percentiles.
+
+LLM modes:
+    live    - call the Groq API
+    record  - call the Groq API and save every completion to a recording file
+    replay  - answer completions from a recording file (no network)
+    oracle  - stub that returns the expected route and SQL (no network); checks
+              the rewrite/execution/comparison pipeline end to end
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import importlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+DEFAULT_RECORDING = Path(__file__).parent / "eval_recording.json"
+
+# Natural language questions for the reusable QUERY_PATTERNS
+PATTERN_QUESTIONS = {
+    "top_products": ("Which 10 products were ordered most often?", {"limit": 10}),
+    "revenue_by_category": ("Show revenue, order count and average price by product category", {}),
+    "customer_orders": ("How many orders, customers and what average order value does each state have?", {}),
+    "seller_performance": ("Who are the top 10 sellers by revenue and what are their ratings?", {"limit": 10}),
+    "delivery_performance": ("What is the average delivery time in days for each customer state?", {})
+}
+
+# Route-only cases that must not reach the SQL agent
+ROUTE_CASES = [
+    {"question": "Translate 'cama_mesa_banho' to English", "expected_route": "translation"},
+    {"question": "Hello, what can you do?", "expected_route": "utility"},
+    {"question": "What is the population of São Paulo?", "expected_route": "knowledge_search"}
+]
+
+def build_golden_set() -> List[Dict[str, Any]]:
+    """
+    Build the golden set from SQL_EXAMPLES, QUERY_PATTERNS and route-only cases
+
+    Returns:
+        List of golden cases
+    """
+    from backend.config import SQL_EXAMPLES
+    from backend.database.queries import get_query_pattern
+
+    cases = []
+
+    for i, example in enumerate(SQL_EXAMPLES, 1):
+        cases.append({
+            "id": f"example_{i}",
+            "question": example["question"],
+            "expected_route": "data_query",
+            "expected_sql": example["sql"]
+        })
+
+    for name, (question, params) in PATTERN_QUESTIONS.items():
+        cases.append({
+            "id": f"pattern_{name}",
+            "question": question,
+            "expected_route": "data_query",
+            "expected_sql": get_query_pattern(name, **params)
+        })
+
+    for i, case in enumerate(ROUTE_CASES, 1):
+        cases.append({"id": f"route_{i}", "expected_sql": None, **case})
+
+    return cases
+
+def _completion(content: str) -> Any:
+    """Build a minimal object shaped like a chat completion response"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _messages_key(messages: List[Dict[str, str]], model: Optional[str]) -> str:
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def create_llm_client(mode: str, recording_path: Path, golden_set: List[Dict[str, Any]]):
+    """
+    Create the LLM client used by the agents for this run
+
+    Args:
+        mode: One of live, record, replay, oracle
+        recording_path: Recording file for record/replay modes
+        golden_set: Golden cases (used by the oracle stub)
+
+    Returns:
+        Client exposing the GroqClient interface
+    """
+    from backend.llm.groq_client import GroqClient
+
+    class RecordingClient(GroqClient):
+        """Records completions to, or replays them from, a JSON file"""
+
+        def __init__(self, replay: bool):
+            super().__init__(api_key=None if not replay else "replay")
+            self.replay = replay
+            self.recordings: Dict[str, str] = {}
+            if recording_path.exists():
+                with open(recording_path, 'r') as f:
+                    self.recordings = json.load(f)
+
+        def chat_completion(self, messages, model=None, temperature=None, max_tokens=2048, stream=False):
+            key = _messages_key(messages, model or self.reasoning_model)
+            if self.replay:
+                if key not in self.recordings:
+                    raise Exception("No recorded completion for this prompt")
+                return _completion(self.recordings[key])
+
+            response = super().chat_completion(messages, model, temperature, max_tokens, stream)
+            self.recordings[key] = response.choices[0].message.content
+            return response
+
+        def save(self):
+            with open(recording_path, 'w') as f:
+                json.dump(self.recordings, f, indent=1, sort_keys=True)
+
+    class OracleClient(GroqClient):
+        """Answers routing and SQL generation with the golden expectations"""
+
+        def __init__(self):
+            super().__init__(api_key="oracle")
+            self.cases = {case["question"]: case for case in golden_set}
+
+        def _case_for(self, text: str) -> Optional[Dict[str, Any]]:
+            for question, case in self.cases.items():
+                if question in text:
+                    return case
+            return None
+
+        def chat_completion(self, messages, model=None, temperature=None, max_tokens=2048, stream=False):
+            case = self._case_for(messages[-1]["content"])
+            if case and "query router" in messages[0]["content"]:
+                return _completion(case["expected_route"])
+            return _completion("")
+
+        def generate_sql(self, question, schema_info, examples="", resolved_values=""):
+            case = self._case_for(question)
+            return case["expected_sql"] if case and case["expected_sql"] else "SELECT 1"
+
+        def save(self):
+            pass
+
+    if mode == "oracle":
+        return OracleClient()
+    if mode in ("record", "replay"):
+        return RecordingClient(replay=(mode == "replay"))
+
+    client = GroqClient()
+    client.save = lambda: None
+    return client
+
+def normalize_result(df: pd.DataFrame) -> List[tuple]:
+    """
+    Normalize a result DataFrame into comparable row tuples
+
+    Args:
+        df: Query result
+
+    Returns:
+        List of row tuples with floats rounded and nulls unified
+    """
+    def normalize(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return None
+        if isinstance(value, (float, np.floating)):
+            return round(float(value), 4)
+        if isinstance(value, np.integer):
+            return int(value)
+        return str(value)
+
+    return [tuple(normalize(v) for v in row) for row in df.itertuples(index=False, name=None)]
+
+def results_match(expected: pd.DataFrame, actual: pd.DataFrame, ordered: bool) -> bool:
+    """
+    Compare two result sets, ignoring column names and column order
+
+    Args:
+        expected: Result of the expected SQL
+        actual: Result of the generated SQL
+        ordered: Whether row order must match
+
+    Returns:
+        True if the result sets are equivalent
+    """
+    if expected.shape != actual.shape:
+        return False
+
+    # Align actual columns to expected ones by their values
+    expected_columns = [sorted(map(str, normalize_result(expected[[c]]))) for c in expected.columns]
+    actual_columns = [sorted(map(str, normalize_result(actual[[c]]))) for c in actual.columns]
+    order = []
+    remaining = list(range(len(actual_columns)))
+    for values in expected_columns:
+        match = next((i for i in remaining if actual_columns[i] == values), None)
+        if match is None:
+            return False
+        order.append(match)
+        remaining.remove(match)
+
+    expected_rows = normalize_result(expected)
+    actual_rows = normalize_result(actual.iloc[:, order])
+
+    if ordered:
+        return expected_rows == actual_rows
+    return sorted(map(str, expected_rows)) == sorted(map(str, actual_rows))
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds"""
+    if not values:
+        return {}
+    data = np.array(values) * 1000
+    return {
+        "p50": round(float(np.percentile(data, 50)), 1),
+        "p90": round(float(np.percentile(data, 90)), 1),
+        "p99": round(float(np.percentile(data, 99)), 1),
+        "max": round(float(data.max()), 1)
+    }
+
+async def evaluate_case(case: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    Run one golden case through the router and SQL agent nodes
+
+    Args:
+        case: Golden case
+        semaphore: Concurrency limiter
+
+    Returns:
+        Case result with timings
+    """
+    from backend.graph.state import create_initial_state
+    from backend.agents.router_agent import router_agent
+    from backend.agents.sql_agent import sql_agent
+    from backend.database.connection import db_manager
+    from backend.database.results import to_dataframe
+
+    async with semaphore:
+        state = create_initial_state(case["question"], f"eval_{case['id']}")
+        result = {"id": case["id"], "question": case["question"], "timings": {}}
+
+        start = time.perf_counter()
+        state.update(await asyncio.to_thread(router_agent, state))
+        result["timings"]["router"] = time.perf_counter() - start
+
+        route = state.get("query_type")
+        result["route"] = route
+        result["route_correct"] = route == case["expected_route"]
+
+        if not case.get("expected_sql"):
+            return result
+
+        result["correct"] = False
+        result["retried"] = False
+
+        if route != "data_query":
+            result["error"] = f"Routed to {route}"
+            return result
+
+        start = time.perf_counter()
+        output = await asyncio.to_thread(sql_agent, state)
+        result["timings"]["sql_agent"] = time.perf_counter() - start
+
+        result["sql_query"] = output.get("sql_query")
+        result["retried"] = output.get("retry_count", 0) > 0
+
+        if output.get("error"):
+            result["error"] = output["error"]
+            return result
+
+        start = time.perf_counter()
+        expected_df = await asyncio.to_thread(db_manager.execute_query, case["expected_sql"])
+        result["timings"]["expected_sql"] = time.perf_counter() - start
+
+        ordered = "order by" in case["expected_sql"].lower()
+        result["correct"] = results_match(expected_df, to_dataframe(output["query_result"]), ordered)
+        return result
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """
+    Aggregate case results into the evaluation report
+
+    Args:
+        results: Case results
+        elapsed: Wall-clock time for the whole run in seconds
+
+    Returns:
+        Report dictionary
+    """
+    sql_cases = [r for r in results if "correct" in r]
+    node_timings: Dict[str, List[float]] = {}
+    for r in results:
+        for node, seconds in r["timings"].items():
+            node_timings.setdefault(node, []).append(seconds)
+
+    return {
+        "cases": len(results),
+        "sql_cases": len(sql_cases),
+        "accuracy": round(sum(r["correct"] for r in sql_cases) / len(sql_cases), 3) if sql_cases else None,
+        "route_accuracy": round(sum(r["route_correct"] for r in results) / len(results), 3) if results else None,
+        "retry_rate": round(sum(r["retried"] for r in sql_cases) / len(sql_cases), 3) if sql_cases else None,
+        "latency_ms": {node: percentiles(values) for node, values in node_timings.items()},
+        "wall_clock_s": round(elapsed, 2),
+        "failures": [
+            {k: r.get(k) for k in ("id", "question", "route", "sql_query", "error")}
+            for r in results
+            if not r["route_correct"] or r.get("correct") is False
+        ]
+    }
+
+async def run_evaluation(args) -> Dict[str, Any]:
+    """Run the golden set and build the report"""
+    golden_set = build_golden_set()
+
+    if args.golden:
+        with open(args.golden, 'r') as f:
+            golden_set.extend(json.load(f))
+
+    if args.case:
+        golden_set = [case for case in golden_set if case["id"] in args.case]
+
+    client = create_llm_client(args.llm, Path(args.recording), golden_set)
+
+    # Point every agent at the evaluation client. The agents package re-exports
+    # functions under the module names, so patch the modules themselves.
+    import backend.graph
+    for module_name in ("backend.agents.router_agent", "backend.agents.sql_agent"):
+        importlib.import_module(module_name).groq_client = client
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(evaluate_case(case, semaphore) for case in golden_set))
+    elapsed = time.perf_counter() - start
+
+    client.save()
+    return summarize(results, elapsed)
+
+def print_report(report: Dict[str, Any]):
+    """Print the evaluation report"""
+    print("=" * 60)
+    print("Text-to-SQL Evaluation")
+    print("=" * 60)
+    print(f"\nCases: {report['cases']} ({report['sql_cases']} with expected SQL)")
+    print(f"Execution accuracy: {report['accuracy']}")
+    print(f"Route accuracy:     {report['route_accuracy']}")
+    print(f"Retry rate:         {report['retry_rate']}")
+    print(f"Wall clock:         {report['wall_clock_s']}s")
+
+    print("\nLatency per node (ms):")
+    for node, stats in report["latency_ms"].items():
+        print(f"  • {node}: " + ", ".join(f"{k} {v}" for k, v in stats.items()))
+
+    if report["failures"]:
+        print(f"\nFailures ({len(report['failures'])}):")
+        for failure in report["failures"]:
+            print(f"  ✗ {failure['id']}: {failure['question']}")
+            if failure.get("error"):
+                print(f"      {failure['error']}")
+
+def main():
+    """Main evaluation function"""
+    parser = argparse.ArgumentParser(description='Evaluate text-to-SQL accuracy and latency')
+    parser.add_argument('--llm', choices=['live', 'record', 'replay', 'oracle'], default='replay',
+                        help='LLM mode (default: replay)')
+    parser.add_argument('--recording', default=str(DEFAULT_RECORDING), help='Recording file for record/replay')
+    parser.add_argument('--golden', help='JSON file with additional golden cases')
+    parser.add_argument('--case', action='append', help='Only run the given case id (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Cases evaluated concurrently')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    # Offline modes never reach the API, but the global client still needs a key
+    if args.llm in ('replay', 'oracle'):
+        os.environ.setdefault("GROQ_API_KEY", "offline-evaluation")
+
+    report = asyncio.run(run_evaluation(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
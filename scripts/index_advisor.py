@@ -0,0 +1,59 @@
+"""
+Summarize the slow-query log and propose indexes for frequent full scans
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.database.index_advisor import index_advisor
+
+def main():
+    """Main advisor function"""
+    parser = argparse.ArgumentParser(description='Propose indexes from the slow-query log')
+    parser.add_argument('--top', type=int, default=10, help='Maximum number of recommendations')
+    parser.add_argument('--min-queries', type=int, default=1,
+                        help='Minimum slow statements that must use a column')
+    parser.add_argument('--apply', action='store_true', help='Create the recommended indexes')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Slow Query Report")
+    print("=" * 60)
+
+    fingerprints = [f for f in index_advisor.log.get_fingerprints(limit=args.top) if f['slow_calls']]
+    if not fingerprints:
+        print("\nNo slow queries recorded yet (set ENABLE_QUERY_LOG=true to collect them)")
+    for entry in fingerprints:
+        print(f"\n[{entry['fingerprint']}] {entry['calls']} calls, {entry['slow_calls']} slow, "
+              f"avg {entry['avg_ms']:.1f} ms, max {entry['max_ms']:.1f} ms")
+        print(f"  {entry['normalized_sql'][:200]}")
+
+    recommendations = index_advisor.recommend(top=args.top, min_queries=args.min_queries)
+
+    print("\n" + "=" * 60)
+    print("Index Recommendations")
+    print("=" * 60)
+
+    if not recommendations:
+        print("\nNo index recommendations")
+        return
+
+    for rec in recommendations:
+        print(f"\n{rec['statement']};")
+        print(f"  {rec['predicate_kind']} column in {rec['queries']} slow statements "
+              f"({rec['slow_ms']:.0f} ms of unindexed reads on {rec['row_count']:,} rows)")
+        print(f"  estimated saving: {rec['estimated_saving_ms']:.0f} ms "
+              f"({rec['saved_fraction']:.0%} of scan time, selectivity {rec['selectivity']:.4g})")
+
+    if args.apply:
+        print("\nApplying indexes...")
+        for statement in index_advisor.apply(recommendations):
+            print(f"  ✓ {statement}")
+    else:
+        print("\nRun with --apply to create these indexes")
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ Data ingestion script to load CSV files into SQLite database
 """
 import sys
 import os
+import time
+import sqlite3
+import itertools
 from pathlib import Path
+from typing import Dict, Optional
 import pandas as pd
 import argparse
 from datetime import datetime
@@ -13,6 +17,18 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from backend.config import settings
 from backend.database.connection import db_manager
+from backend.database.models import Base
+from backend.database.surrogate_keys import SurrogateKeyAssigner, create_views, physical_table
+from backend.database.fact_tables import build_fact_order_items
+from backend.database.metadata import build_dataset_metadata
+from backend.database.value_index import build_value_index
+from backend.database.text_search import build_search_indexes
+from backend.database.geo_index import build_geo_index, build_shipping_distances
+from backend.database.sampling import build_samples
+from backend.database.data_profile import build_data_profile
+from backend.database.partitioning import partition_tables, merge_partitions
+from backend.database.introspection import schema_introspector
+from backend.database.columnar import write_parquet_snapshot
 from backend.llm.embeddings import embedding_generator
 import chromadb
 
@@ -40,29 +56,179 @@ DATE_COLUMNS = {
     "order_reviews": ["review_creation_date", "review_answer_timestamp"]
 }
 
-def load_csv_to_db(csv_path: Path, table_name: str):
+# Source CSV column names that differ from the models
+COLUMN_RENAMES = {
+    "products": {
+        "product_name_lenght": "product_name_length",
+        "product_description_lenght": "product_description_length"
+    }
+}
+
+# Zip prefixes are codes, not numbers: keep them as 5-character strings
+ZIP_COLUMNS = {
+    "customers": "customer_zip_code_prefix",
+    "sellers": "seller_zip_code_prefix",
+    "geolocation": "geolocation_zip_code_prefix"
+}
+
+# Timestamps are stored as integer epoch seconds, the source's resolution
+EPOCH = pd.Timestamp("1970-01-01")
+
+# Timestamp -> prefix of the derived calendar columns (<prefix>_year, _month, _quarter, _yyyymm)
+CALENDAR_COLUMNS = {
+    "orders": ("order_purchase_timestamp", "purchase")
+}
+
+# Delivery metric -> (start timestamp, end timestamp, seconds per unit)
+DELIVERY_METRICS = {
+    "delivery_days": ("order_purchase_timestamp", "order_delivered_customer_date", 86400),
+    "approval_hours": ("order_purchase_timestamp", "order_approved_at", 3600),
+    "carrier_handoff_days": ("order_approved_at", "order_delivered_carrier_date", 86400),
+    "days_vs_estimate": ("order_estimated_delivery_date", "order_delivered_customer_date", 86400)
+}
+
+# Surrogate keys follow this order, so order keys increase with purchase time
+KEY_ORDER_COLUMNS = {
+    "orders": "order_purchase_timestamp"
+}
+
+INSERT_BATCH_SIZE = 50000
+
+def add_delivery_metrics(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Load CSV file into database table
+    Compute delivery durations from epoch-second order timestamps
+    
+    Args:
+        df: Orders with timestamps in epoch seconds
+        
+    Returns:
+        Orders with the DELIVERY_METRICS columns and is_late (NULL until delivered)
+    """
+    for metric, (start, end, unit) in DELIVERY_METRICS.items():
+        df[metric] = (df[end] - df[start]).astype("Float64") / unit
+    df["is_late"] = (df["days_vs_estimate"] > 0).astype("Int64")
+    return df
+
+def load_csv_to_db(csv_path: Path, table_name: str, key_assigner: SurrogateKeyAssigner):
+    """
+    Load CSV file into a table created from its SQLAlchemy model
     
     Args:
         csv_path: Path to CSV file
         table_name: Name of database table
+        key_assigner: Assigns integer keys in place of the hex identifiers
     """
     print(f"Loading {table_name}...")
+    table = Base.metadata.tables[physical_table(table_name)]
     
     # Read CSV
-    df = pd.read_csv(csv_path)
+    zip_column = ZIP_COLUMNS.get(table_name)
+    df = pd.read_csv(csv_path, dtype={zip_column: str} if zip_column else None)
+    df = df.rename(columns=COLUMN_RENAMES.get(table_name, {}))
+    
+    if zip_column:
+        df[zip_column] = df[zip_column].str.zfill(5)
     
-    # Parse date columns
+    # Parse date columns into epoch seconds
+    calendar = CALENDAR_COLUMNS.get(table_name)
     if table_name in DATE_COLUMNS:
         for col in DATE_COLUMNS[table_name]:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
+                parsed = pd.to_datetime(df[col], errors='coerce')
+                if calendar and col == calendar[0]:
+                    prefix = calendar[1]
+                    df[f"{prefix}_year"] = parsed.dt.year.astype("Int64")
+                    df[f"{prefix}_month"] = parsed.dt.month.astype("Int64")
+                    df[f"{prefix}_quarter"] = parsed.dt.quarter.astype("Int64")
+                    df[f"{prefix}_yyyymm"] = (parsed.dt.year * 100 + parsed.dt.month).astype("Int64")
+                df[col] = ((parsed - EPOCH) // pd.Timedelta(seconds=1)).astype("Int64")
     
-    # Load into database
-    df.to_sql(table_name, db_manager.engine, if_exists='replace', index=False)
+    if table_name == "orders":
+        df = add_delivery_metrics(df)
     
-    print(f"  ✓ Loaded {len(df)} rows into {table_name}")
+    if table_name in KEY_ORDER_COLUMNS:
+        df = df.sort_values(KEY_ORDER_COLUMNS[table_name], kind='stable')
+    df = key_assigner.encode(df)
+    
+    columns = [column.name for column in table.columns if column.name in df.columns]
+    df = df[columns]
+    
+    # Keep the first row per primary key, inserted in key order
+    key = [column.name for column in table.primary_key.columns]
+    if all(column in df.columns for column in key):
+        duplicates = df.duplicated(subset=key)
+        if duplicates.any():
+            print(f"  ⚠ Dropping {int(duplicates.sum())} rows with duplicate {', '.join(key)}")
+            df = df[~duplicates]
+        df = df.sort_values(key)
+    
+    # Recreate the typed table and bulk insert
+    table.drop(db_manager.engine, checkfirst=True)
+    table.create(db_manager.engine)
+    
+    insert = (
+        f"INSERT INTO {table.name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    with db_manager.engine.begin() as connection:
+        while True:
+            batch = list(itertools.islice(rows, INSERT_BATCH_SIZE))
+            if not batch:
+                break
+            connection.exec_driver_sql(insert, batch)
+    
+    print(f"  ✓ Loaded {len(df)} rows into {table.name}")
+
+def measure_storage() -> Optional[Dict[str, float]]:
+    """
+    Measure database file size and full-scan speed over the ingested tables
+    
+    Returns:
+        Dictionary with file size, rows scanned and scan time, or None if the
+        database file does not exist
+    """
+    path = db_manager.database_path
+    if path is None or not os.path.exists(path):
+        return None
+    
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    rows = 0
+    start = time.perf_counter()
+    for table_name in CSV_FILES:
+        try:
+            for _ in connection.execute(f"SELECT * FROM {table_name}"):
+                rows += 1
+        except sqlite3.Error:
+            continue
+    scan_seconds = time.perf_counter() - start
+    
+    # Split between table and index pages, when SQLite has the dbstat table
+    try:
+        index_bytes = connection.execute(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat "
+            "WHERE name IN (SELECT name FROM sqlite_master WHERE type = 'index')"
+        ).fetchone()[0]
+    except sqlite3.Error:
+        index_bytes = None
+    connection.close()
+    
+    return {
+        "file_bytes": os.path.getsize(path),
+        "index_bytes": index_bytes,
+        "rows": rows,
+        "scan_seconds": scan_seconds,
+        "rows_per_second": rows / scan_seconds if scan_seconds else 0.0
+    }
+
+def format_storage(report: Dict[str, float]) -> str:
+    """Format a storage measurement for printing"""
+    indexes = ""
+    if report['index_bytes'] is not None:
+        indexes = f" ({report['index_bytes'] / (1024 * 1024):.1f} MB indexes)"
+    return (f"{report['file_bytes'] / (1024 * 1024):.1f} MB{indexes}, "
+            f"full scan of {report['rows']:,} rows in {report['scan_seconds']:.2f}s "
+            f"({report['rows_per_second']:,.0f} rows/s)")
 
 def create_vector_store():
     """Create vector store for product embeddings"""
@@ -165,6 +331,16 @@ def main():
     # Create database directory
     settings.DATABASE_DIR.mkdir(exist_ok=True)
     
+    # Measure the existing database for comparison
+    storage_before = measure_storage()
+    if storage_before:
+        print(f"\nExisting database: {format_storage(storage_before)}")
+    
+    # Keyed tables are recreated and reloaded unpartitioned
+    merged = merge_partitions(db_manager)
+    if merged:
+        print(f"\nMerged {merged} time partitions back into orders and order items")
+    
     # Drop tables if force flag is set
     if args.force:
         print("\n⚠ Force flag set - dropping existing tables...")
@@ -177,6 +353,8 @@ def main():
     
     # Load CSV files
     print("\nLoading CSV files...")
+    key_assigner = SurrogateKeyAssigner(db_manager)
+    key_assigner.reset()
     for table_name, csv_file in CSV_FILES.items():
         csv_path = settings.DATA_DIR / csv_file
         
@@ -185,10 +363,135 @@ def main():
             continue
         
         try:
-            load_csv_to_db(csv_path, table_name)
+            load_csv_to_db(csv_path, table_name, key_assigner)
         except Exception as e:
             print(f"  ❌ Error loading {table_name}: {str(e)}")
     
+    # Expose the keyed tables under their original names
+    print("\nCreating views...")
+    try:
+        views = create_views(db_manager)
+        print(f"  ✓ Created {len(views)} views with original IDs: {', '.join(views)}")
+    except Exception as e:
+        print(f"  ❌ View creation failed: {str(e)}")
+    
+    # Collapse geolocation points to zip-prefix centroids
+    print("\nBuilding zip centroids and spatial index...")
+    try:
+        geo = build_geo_index(db_manager)
+        print(f"  ✓ {geo['points']:,} points -> {geo['zip_prefixes']:,} zip prefixes "
+              f"({geo['dropped_points']:,} out-of-bounds points dropped), "
+              f"{geo['neighbor_rows']:,} neighbor rows")
+    except Exception as e:
+        print(f"  ⚠ Zip centroid creation failed: {str(e)}")
+    
+    # Distance between seller and customer for every order item
+    print("\nComputing shipping distances...")
+    try:
+        shipping = build_shipping_distances(db_manager)
+        print(f"  ✓ {shipping['items'] - shipping['missing']:,} of {shipping['items']:,} order items "
+              f"({shipping['missing']:,} without a known zip centroid)")
+    except Exception as e:
+        print(f"  ⚠ Shipping distances failed: {str(e)}")
+    
+    # Denormalize order items for join-free queries
+    print("\nBuilding fact table...")
+    try:
+        fact_rows = build_fact_order_items(db_manager)
+        print(f"  ✓ fact_order_items: {fact_rows:,} rows")
+    except Exception as e:
+        print(f"  ❌ Fact table creation failed: {str(e)}")
+    
+    # Compute dataset reference constants
+    print("\nComputing dataset reference constants...")
+    try:
+        constants = build_dataset_metadata(db_manager)
+        if constants:
+            print(f"  ✓ Reference date: {constants['reference_date']} "
+                  f"(last complete month {constants['last_complete_month']}, "
+                  f"last complete quarter {constants['last_complete_quarter']})")
+        else:
+            print("  ⚠ No orders found - reference constants skipped")
+    except Exception as e:
+        print(f"  ⚠ Reference constants failed: {str(e)}")
+    
+    # Build value-linking index
+    print("\nBuilding value index...")
+    try:
+        value_count = build_value_index(db_manager)
+        print(f"  ✓ Indexed {value_count:,} distinct values")
+    except Exception as e:
+        print(f"  ⚠ Value index creation failed: {str(e)}")
+    
+    # Build full-text indexes over category names and review text
+    print("\nBuilding full-text search indexes...")
+    try:
+        search_counts = build_search_indexes(db_manager)
+        for table, count in search_counts.items():
+            print(f"  ✓ {table}: {count:,} rows")
+    except Exception as e:
+        print(f"  ⚠ Full-text index creation failed: {str(e)}")
+    
+    # Build stratified samples for approximate answers
+    print("\nBuilding query samples...")
+    try:
+        samples = build_samples(db_manager)
+        for family, sizes in samples.items():
+            print(f"  ✓ {family}: sampled {sizes['sample_rows']:,} of {sizes['population_rows']:,} rows")
+    except Exception as e:
+        print(f"  ⚠ Sample creation failed: {str(e)}")
+    
+    # Profile column distributions for distribution questions
+    print("\nProfiling columns...")
+    try:
+        profiled = build_data_profile(db_manager)
+        print(f"  ✓ Profiled {profiled} columns")
+    except Exception as e:
+        print(f"  ⚠ Data profile failed: {str(e)}")
+    
+    # Split orders and order items by purchase period
+    if settings.TIME_PARTITIONING != "none":
+        print(f"\nPartitioning orders by purchase {settings.TIME_PARTITIONING}...")
+        try:
+            catalog = partition_tables(db_manager, settings.TIME_PARTITIONING)
+            for partition in catalog["partitions"]:
+                print(f"  ✓ {partition['name']}: {partition['orders']:,} orders, {partition['order_items']:,} items")
+        except Exception as e:
+            print(f"  ❌ Partitioning failed: {str(e)}")
+    
+    # Refresh planner statistics and compact the file
+    print("\nCompacting database...")
+    try:
+        db_manager.execute_raw_query("ANALYZE")
+        db_manager.execute_raw_query("VACUUM")
+        storage_after = measure_storage()
+        if storage_after:
+            print(f"  ✓ {format_storage(storage_after)}")
+            if storage_before:
+                print(f"  ✓ File size {storage_after['file_bytes'] / storage_before['file_bytes']:.0%} of before, "
+                      f"scan speed {storage_after['rows_per_second'] / storage_before['rows_per_second']:.2f}x")
+    except Exception as e:
+        print(f"  ⚠ Compaction failed: {str(e)}")
+    
+    # Introspect schema and cache column statistics
+    print("\nIntrospecting schema...")
+    try:
+        schema_stats = schema_introspector.build()
+        print(f"  ✓ Cached statistics for {len(schema_stats['relations'])} tables "
+              f"(dataset version {schema_stats['dataset_version']})")
+    except Exception as e:
+        print(f"  ⚠ Schema introspection failed: {str(e)}")
+    
+    # Write the columnar snapshot read by DuckDB and Arrow clients
+    if settings.ENABLE_PARQUET_SNAPSHOT and db_manager.database_path:
+        print("\nWriting Parquet snapshot...")
+        try:
+            snapshot = write_parquet_snapshot(db_manager.database_path, str(settings.PARQUET_DIR))
+            print(f"  ✓ {snapshot['tables']} tables, {snapshot['size_mb']} MB in {settings.PARQUET_DIR} "
+                  f"(partitioned by purchase year: {', '.join(snapshot['partitioned'])})")
+        except Exception as e:
+            print(f"  ⚠ Parquet snapshot failed: {str(e)}")
+    
     # Create vector store
     if not args.skip_vectors:
         try:
@@ -202,7 +505,7 @@ def main():
     print("=" * 60)
     
     try:
-        tables = db_manager.get_all_tables()
+        tables = db_manager.get_user_tables()
         print(f"\nTables created: {len(tables)}")
         for table in tables:
             query = f"SELECT COUNT(*) as count FROM {table}"